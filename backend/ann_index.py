@@ -0,0 +1,224 @@
+"""
+FullCircle ANN Index
+Inverted-file (IVF) index over the candidate pool's unit tag vectors. Spherical k-means splits
+the pool into lists, and a query only scans the few lists whose centroids sit closest to it
+instead of every posting of every query tag. Built offline, stored next to the model artifacts
+in model_artifacts/ann_index/, loaded by predict.py when it matches the catalog.
+
+    python ann_index.py build    # cluster the catalog in model_artifacts/ and write the index
+    python ann_index.py info     # what's on disk and whether it still matches the catalog
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+import artifacts
+
+INDEX_DIRNAME = 'ann_index'
+INDEX_FORMAT_VERSION = 1
+INDEX_ARRAYS = ['centroids', 'list_indptr', 'rows', 'entry_indptr', 'entry_columns', 'entry_values']
+KMEANS_SAMPLE = 100_000  # rows the centroids are fitted on, assignment still covers the whole pool
+ASSIGN_CHUNK = 65_536  # rows per matrix product while assigning, bounds the float32 scratch
+
+
+class IVFIndex(NamedTuple):
+    # rows[list_indptr[l]:list_indptr[l+1]] are the catalog rows in list l. their tag vectors
+    # are stored in the same order as a CSR block (entry_*), so a list is one contiguous slice
+    centroids: np.ndarray
+    list_indptr: np.ndarray
+    rows: np.ndarray
+    entry_indptr: np.ndarray
+    entry_columns: np.ndarray
+    entry_values: np.ndarray
+    manifest: Dict
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+
+def index_path(model_dir: str) -> str:
+    return os.path.join(model_dir, INDEX_DIRNAME)
+
+
+def _assign(unit_rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(unit_rows), dtype=np.int32)
+    for start in range(0, len(unit_rows), ASSIGN_CHUNK):
+        block = np.asarray(unit_rows[start:start + ASSIGN_CHUNK], dtype=np.float32)
+        labels[start:start + ASSIGN_CHUNK] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def spherical_kmeans(unit_rows: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Centroids (unit length) that maximize cosine to their members."""
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(unit_rows, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        # per-list sums as one sparse one-hot product, np.add.at is far slower at 100k rows
+        membership = sparse.csr_matrix(
+            (np.ones(len(labels), dtype=np.float32), (labels, np.arange(len(labels)))), shape=(n_lists, len(labels))
+        )
+        sums = np.asarray(membership @ sample, dtype=np.float32)
+        counts = np.bincount(labels, minlength=n_lists)
+        # an emptied list restarts on a random row instead of staying dead
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def build_ivf(
+    catalog_unit: np.ndarray,
+    candidate_pool_rows: np.ndarray,
+    metadata: Dict,
+    n_lists: Optional[int] = None,
+    iterations: int = 10,
+    seed: int = 0,
+) -> IVFIndex:
+    # only the candidate pool goes in, nothing else is ever recommended
+    pool_rows = np.asarray(candidate_pool_rows, dtype=np.int32)
+    if len(pool_rows) == 0:
+        raise ValueError("candidate pool is empty, nothing to index")
+    if n_lists is None:
+        n_lists = int(np.sqrt(len(pool_rows)))
+    n_lists = max(1, min(n_lists, len(pool_rows)))
+
+    rng = np.random.default_rng(seed)
+    fit_rows = pool_rows
+    if len(pool_rows) > KMEANS_SAMPLE:
+        fit_rows = np.sort(rng.choice(pool_rows, size=KMEANS_SAMPLE, replace=False))
+    centroids = spherical_kmeans(catalog_unit[fit_rows], n_lists, iterations=iterations, seed=seed)
+
+    labels = np.concatenate([
+        _assign(catalog_unit[pool_rows[start:start + ASSIGN_CHUNK]], centroids)
+        for start in range(0, len(pool_rows), ASSIGN_CHUNK)
+    ])
+    # stable, so every list keeps its rows in catalog order
+    order = np.argsort(labels, kind='stable')
+    rows = pool_rows[order]
+    list_indptr = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=n_lists), out=list_indptr[1:])
+
+    entry_indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    columns, values = [], []
+    for start in range(0, len(rows), ASSIGN_CHUNK):
+        block = np.asarray(catalog_unit[rows[start:start + ASSIGN_CHUNK]], dtype=np.float32)
+        block_rows, block_columns = np.nonzero(block)
+        columns.append(block_columns.astype(np.int16))
+        values.append(block[block_rows, block_columns])
+        entry_indptr[start + 1:start + 1 + len(block)] = np.bincount(block_rows, minlength=len(block))
+    np.cumsum(entry_indptr, out=entry_indptr)
+
+    return IVFIndex(
+        centroids=centroids.astype(np.float32),
+        list_indptr=list_indptr,
+        rows=rows,
+        entry_indptr=entry_indptr,
+        entry_columns=np.concatenate(columns),
+        entry_values=np.concatenate(values).astype(np.float32),
+        manifest={
+            'format_version': INDEX_FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'catalog_digest': artifacts.catalog_digest(pool_rows, metadata),
+            'n_artists': int(catalog_unit.shape[0]),
+            'n_indexed': int(len(rows)),
+            'n_lists': int(n_lists),
+            'kmeans_iterations': int(iterations),
+            'kmeans_rows': int(len(fit_rows)),
+            'seed': int(seed),
+        },
+    )
+
+
+def search(index: IVFIndex, query: np.ndarray, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Cosine similarity for every indexed row in the nprobe lists closest to the unit query.
+
+    Returns (row ids, similarities) in storage order. Rows of lists that weren't probed are
+    simply missing, so this is approximate: a true neighbour filed under a far centroid is lost.
+    """
+    nprobe = max(1, min(nprobe, index.n_lists))
+    closeness = index.centroids @ query
+    probe = np.argpartition(-closeness, nprobe - 1)[:nprobe] if nprobe < index.n_lists else np.arange(index.n_lists)
+
+    # member positions of the probed lists, then the CSR entries of those members: both are
+    # unions of contiguous slices, same repeat/arange trick as scoring.score_postings
+    starts = index.list_indptr[probe]
+    lengths = index.list_indptr[probe + 1] - starts
+    n_members = int(lengths.sum())
+    if n_members == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+    members = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(n_members)
+
+    entry_starts = index.entry_indptr[members]
+    entry_lengths = index.entry_indptr[members + 1] - entry_starts
+    n_entries = int(entry_lengths.sum())
+    positions = np.repeat(entry_starts - (np.cumsum(entry_lengths) - entry_lengths), entry_lengths) + np.arange(n_entries)
+
+    weights = index.entry_values[positions] * query[index.entry_columns[positions]]
+    owner = np.repeat(np.arange(n_members), entry_lengths)
+    return index.rows[members], np.bincount(owner, weights=weights, minlength=n_members)
+
+
+def write_index(index: IVFIndex, model_dir: str) -> str:
+    return artifacts.write_sidecar(
+        index_path(model_dir), {name: getattr(index, name) for name in INDEX_ARRAYS}, index.manifest
+    )
+
+
+def load_index(model_dir: str, candidate_pool_rows: np.ndarray, metadata: Dict) -> Optional[IVFIndex]:
+    """The index in model_dir/ann_index/, or None when there isn't one or it was built for another catalog."""
+    loaded = artifacts.load_sidecar(
+        index_path(model_dir), INDEX_ARRAYS, INDEX_FORMAT_VERSION, candidate_pool_rows, metadata,
+        rebuild="python ann_index.py build",
+    )
+    if loaded is None:
+        return None
+    arrays, manifest = loaded
+    return IVFIndex(manifest=manifest, **arrays)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FullCircle ANN index tools")
+    parser.add_argument('command', choices=['build', 'info'])
+    parser.add_argument('--model-dir', default=artifacts.MODEL_DIR)
+    parser.add_argument('--lists', type=int, default=None, help="number of IVF lists (default sqrt of the pool size)")
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    loaded = artifacts.load_artifacts(args.model_dir)
+    if args.command == 'build':
+        started = time.perf_counter()
+        index = build_ivf(
+            loaded.catalog_unit, loaded.candidate_pool_rows, loaded.metadata,
+            n_lists=args.lists, iterations=args.iterations, seed=args.seed,
+        )
+        path = write_index(index, args.model_dir)
+        sizes = np.diff(index.list_indptr)
+        print(f"✓ Indexed {len(index.rows):,} of {len(loaded.artist_names):,} artists into {index.n_lists} lists "
+              f"in {time.perf_counter() - started:.1f} s")
+        print(f"  list sizes: median {int(np.median(sizes))}, max {int(sizes.max())}, empty {int((sizes == 0).sum())}")
+        print(f"✓ Wrote {path}")
+    else:
+        manifest = artifacts.read_sidecar_manifest(index_path(args.model_dir))
+        if manifest is None:
+            print(f"No ANN index in {index_path(args.model_dir)}")
+        else:
+            print(json.dumps(manifest, indent=2))
+            current = manifest.get('catalog_digest') == artifacts.catalog_digest(loaded.candidate_pool_rows, loaded.metadata)
+            print(f"{'✓ Matches' if current else '✗ Does not match'} the catalog in {args.model_dir}")
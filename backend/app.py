@@ -1,23 +1,77 @@
 import os
 import json
+import hashlib
 import uvicorn
-from typing import List
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+from urllib.parse import urlencode
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+import metrics
+from batcher import BatcherOverloaded, MicroBatcher
+from model_reloader import ModelReloader
+from rec_cache import RecommendationCache, make_key
 
 try:
     import predict 
 except ImportError:
     raise RuntimeError("Could not import predict.py. Check the backend folder structure.")
-metadata = {}
 api_version = 'v1.0.0'
-n_artists = len(predict.all_artists_df)
+MAX_BATCH_ITEMS = 100
+RECOMMEND_THRESHOLD = 0.60
+RECOMMEND_TOP_N = 10
+# browsers / the CDN may reuse a GET /recommend response this long, then revalidate with If-None-Match
+HTTP_CACHE_MAX_AGE = int(os.getenv("FC_HTTP_CACHE_MAX_AGE", "300"))
+
+recommendation_cache = RecommendationCache(
+    max_entries=int(os.getenv("FC_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("FC_CACHE_TTL_SECONDS", "3600")),
+)
+
+# picks up a retrained model_artifacts/ in the background and swaps the bundle in (0 = off)
+model_reloader = ModelReloader(
+    predict.MODEL_DIR,
+    load_bundle=predict.load_model_bundle,
+    swap_bundle=predict.swap_bundle,
+    interval_seconds=float(os.getenv("FC_RELOAD_INTERVAL_SECONDS", "5")),
+)
+
+REQUESTS_TOTAL = metrics.Counter(
+    "fullcircle_requests_total", "HTTP requests by route and status code.", labels=("route", "status")
+)
+REQUEST_SECONDS = metrics.Histogram(
+    "fullcircle_request_seconds", "End-to-end HTTP request latency by route.", labels=("route",)
+)
+
+def _run_recommend_batch(queries: List[dict]) -> List[List[dict]]:
+    return predict.generate_recommendations_batch(
+        queries, threshold=RECOMMEND_THRESHOLD, top_n=RECOMMEND_TOP_N
+    )
+
+# concurrent /recommend calls that land within the window share one scoring pass
+recommend_batcher = MicroBatcher(
+    _run_recommend_batch,
+    window_ms=float(os.getenv("FC_BATCH_WINDOW_MS", "0.5")),
+    max_batch=int(os.getenv("FC_BATCH_MAX_SIZE", "32")),
+    max_queue=int(os.getenv("FC_BATCH_MAX_QUEUE", "256")),
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    recommend_batcher.start()
+    model_reloader.start()
+    yield
+    model_reloader.stop()
+    await recommend_batcher.stop()
 
 app = FastAPI(
     title="FullCircle Recommendation API",
     description="FastAPI interface for the FullCircle ML Recommender.",
-    version=api_version
+    version=api_version,
+    lifespan=lifespan
 )
 
 origins = [
@@ -34,50 +88,151 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    metrics.RequestMetricsMiddleware,
+    routes=["/health", "/metrics", "/recommend", "/recommend/batch"],
+    requests=REQUESTS_TOTAL,
+    latency=REQUEST_SECONDS,
+)
+
 class RecommendationRequest(BaseModel):
     artist_name: str
     tags: List[str]
     weighted_similarity: bool = True
     exclude_artists: List[str] = []
-    
+    # candidate search, None = the server's FC_SEARCH. 'ivf' / 'lsa' need an ANN index / tag embedding, else they run exact
+    search: Optional[Literal['exact', 'ivf', 'lsa']] = None
+
+class BatchRecommendationRequest(BaseModel):
+    items: List[RecommendationRequest]
+
+def _format_response(request: RecommendationRequest, recommendations: List[dict]) -> dict:
+    if recommendations and 'message' in recommendations[0]:
+        return {
+            "message": recommendations[0]['message'],
+            "artist_name_input": request.artist_name,
+            "prediction_probability": recommendations[0]['probability'],
+            "weighted_similarity_enabled": request.weighted_similarity
+        }
+    return {
+        "artist_name_input": request.artist_name,
+        "prediction_probability": recommendations[0]['prediction_confidence'],
+        "weighted_similarity_enabled": request.weighted_similarity,
+        "recommendations": recommendations
+    }
+
+def _cache_key(request: RecommendationRequest, model_version: str) -> tuple:
+    return make_key(
+        model_version,
+        predict.preprocess_tags(request.tags),
+        request.weighted_similarity,
+        RECOMMEND_THRESHOLD,
+        RECOMMEND_TOP_N,
+        request.artist_name,
+        request.exclude_artists,
+        request.search or predict.DEFAULT_SEARCH,
+    )
+
 @app.get("/health", summary="API Health Check")
 def health_check():
+    bundle = predict.current_bundle()
     return {
         "status": "online",
-        "model_version": metadata.get('trained_at', 'N/A'),
-        "n_artists_in_db": n_artists,
-        "n_features": metadata.get('n_features', 'N/A')
+        "model_version": bundle.metadata.get('trained_at', 'N/A'),
+        "bundle_version": bundle.version,
+        "artifact_source": bundle.source,
+        "n_artists_in_db": len(bundle.artist_names),
+        "n_features": len(bundle.feature_names),
+        "loaded_at": bundle.loaded_at,
+        "load_time_ms": round(bundle.load_seconds * 1000, 1),
+        "search": {
+            "default": predict.search_mode(bundle),
+            "ann_index": bundle.ann_index.manifest if bundle.ann_index is not None else None,
+            "embedding": bundle.embedding.manifest if bundle.embedding is not None else None,
+        },
+        "reloader": model_reloader.stats(),
+        "cache": recommendation_cache.stats(),
+        "batcher": recommend_batcher.stats()
     }
 
-@app.post("/recommend", summary="Generate Recommendations")
-def get_recommendations(request: RecommendationRequest):
-    if not request.tags:
-        raise HTTPException(
-            status_code=400,
-            detail="Tags list cannot be empty. Please provide at least one tag."
+@app.get("/metrics", summary="Prometheus Metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # stage histograms + request counters live in the metrics registry, cache/batcher/catalog
+    # numbers are read from their owners at scrape time
+    cache = recommendation_cache.stats()
+    batcher = recommend_batcher.stats()
+    reloader = model_reloader.stats()
+    extra = metrics.render_sample(
+        "fullcircle_catalog_artists", "Artists in the loaded catalog.", len(predict.current_bundle().artist_names)
+    )
+    extra += metrics.render_sample("fullcircle_model_reloads_total", "Successful model reloads.", reloader["reloads"], "counter")
+    extra += metrics.render_sample(
+        "fullcircle_model_reload_failures_total", "Model reloads that failed and kept the old bundle.", reloader["failures"], "counter"
+    )
+    extra += metrics.render_sample("fullcircle_cache_entries", "Entries in the recommendation cache.", cache["size"])
+    for key in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        extra += metrics.render_sample(
+            f"fullcircle_cache_{key}_total", f"Recommendation cache {key}.", cache[key], "counter"
         )
-    try:
-        recommendations = predict.generate_recommendations(
-            new_artist_name=request.artist_name, 
-            new_artist_tags=request.tags,
-            weighted=request.weighted_similarity,
-            threshold=0.60, 
-            top_n=10,
-            exclude_artists=request.exclude_artists
+    extra += metrics.render_sample("fullcircle_batcher_queue_depth", "Queries waiting for the micro-batcher.", batcher["queue_depth"])
+    for key in ("batches", "items", "rejected", "split_batches"):
+        extra += metrics.render_sample(
+            f"fullcircle_batcher_{key}_total", f"Micro-batcher {key}.", batcher[key], "counter"
         )
-        if recommendations and 'message' in recommendations[0]:
-            return {
-                "message": recommendations[0]['message'],
-                "artist_name_input": request.artist_name,
-                "prediction_probability": recommendations[0]['probability'],
-                "weighted_similarity_enabled": request.weighted_similarity
-            }
-        return {
-            "artist_name_input": request.artist_name,
-            "prediction_probability": recommendations[0]['prediction_confidence'],
-            "weighted_similarity_enabled": request.weighted_similarity,
-            "recommendations": recommendations
-        }
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
+
+def _canonical_query(request: RecommendationRequest) -> List[tuple]:
+    # everything that changes the response body, in one fixed order. tags are case- and
+    # order-insensitive after preprocess_tags (repeats kept, they change term frequency), the
+    # exclude list matches case-insensitively. artist_name is echoed back, so it stays as sent
+    params = [("artist_name", request.artist_name)]
+    params += [("tags", tag) for tag in sorted(predict.preprocess_tags(request.tags))]
+    params.append(("weighted_similarity", "true" if request.weighted_similarity else "false"))
+    params += [("exclude_artists", name) for name in sorted({name.lower() for name in request.exclude_artists})]
+    params.append(("search", request.search or predict.DEFAULT_SEARCH))
+    return params
+
+def _etag(model_version: str, canonical: List[tuple]) -> str:
+    payload = json.dumps([api_version, model_version, RECOMMEND_THRESHOLD, RECOMMEND_TOP_N, canonical])
+    return '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest() + '"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match compares weakly, so W/"x" matches "x"
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def _tags_error(request: RecommendationRequest) -> Optional[str]:
+    # the 400 every recommend endpoint gives, checked before anything is cached or revalidated
+    if not request.tags:
+        return "Tags list cannot be empty. Please provide at least one tag."
+    if not predict.preprocess_tags(request.tags):
+        return "None of the tags can be used (too short or filtered out). Please provide at least one descriptive tag."
+    return None
+
+async def _recommend(request: RecommendationRequest, model_version: str) -> dict:
+    error = _tags_error(request)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    try:
+        recommendation_cache.sync_version(model_version)
+        cache_key = _cache_key(request, model_version)
+        recommendations = recommendation_cache.get(cache_key)
+        if recommendations is None:
+            recommendations = await recommend_batcher.submit({
+                "artist_name": request.artist_name,
+                "tags": request.tags,
+                "weighted": request.weighted_similarity,
+                "exclude_artists": request.exclude_artists,
+                "search": request.search,
+            })
+            recommendation_cache.put(cache_key, recommendations)
+        return _format_response(request, recommendations)
+    except BatcherOverloaded as e:
+        raise HTTPException(status_code=503, detail=f"Server is busy, try again shortly: {e}")
     except Exception as e:
         print(f"Prediction Error: {e}")
         raise HTTPException(
@@ -85,5 +240,107 @@ def get_recommendations(request: RecommendationRequest):
             detail=f"An internal error occurred during prediction: {e}"
         )
 
+@app.post("/recommend", summary="Generate Recommendations")
+async def get_recommendations(request: RecommendationRequest):
+    return await _recommend(request, predict.current_bundle().version)
+
+@app.get("/recommend", summary="Generate Recommendations (cacheable)")
+async def get_recommendations_cacheable(
+    http_request: Request,
+    artist_name: str,
+    tags: List[str] = Query(default=[]),
+    weighted_similarity: bool = True,
+    exclude_artists: List[str] = Query(default=[]),
+    search: Optional[Literal['exact', 'ivf', 'lsa']] = None
+):
+    # same response as POST /recommend, but addressable: ?artist_name=..&tags=jazz&tags=pop.
+    # the ETag is known before any scoring, so a revalidation that matches never touches the model
+    request = RecommendationRequest(
+        artist_name=artist_name,
+        tags=tags,
+        weighted_similarity=weighted_similarity,
+        exclude_artists=exclude_artists,
+        search=search,
+    )
+    # invalid requests get POST's 400 and no cache headers, never a 304 (If-None-Match: * would match anything)
+    error = _tags_error(request)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    model_version = predict.current_bundle().version
+    canonical = _canonical_query(request)
+    headers = {
+        "ETag": _etag(model_version, canonical),
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+        "Content-Location": "/recommend?" + urlencode(canonical),
+    }
+    if _etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+        # a revalidation of the 200 below, which must repeat its ETag and Cache-Control
+        return Response(status_code=304, headers=headers)
+
+    # errors (503 busy, 500) come back as HTTPException without these headers, only a 200 is cacheable
+    body = await _recommend(request, model_version)
+    return JSONResponse(content=body, headers=headers)
+
+@app.post("/recommend/batch", summary="Generate Recommendations for Many Artists")
+def get_batch_recommendations(request: BatchRecommendationRequest):
+    # one featurize + predict_proba + scoring pass for every item. results (or a
+    # per-item error) come back in the same order the items were sent
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items in one batch ({len(request.items)}). The limit is {MAX_BATCH_ITEMS}."
+        )
+
+    # one bundle for the whole batch, cache keys included
+    bundle = predict.current_bundle()
+    recommendation_cache.sync_version(bundle.version)
+
+    results = [None] * len(request.items)
+    cache_keys = {}
+    valid = []
+    for i, item in enumerate(request.items):
+        error = _tags_error(item)
+        if error:
+            results[i] = {"error": error}
+            continue
+        cache_keys[i] = _cache_key(item, bundle.version)
+        cached = recommendation_cache.get(cache_keys[i])
+        if cached is not None:
+            results[i] = _format_response(item, cached)
+        else:
+            valid.append(i)
+    if not valid:
+        return {"results": results}
+
+    try:
+        batch_recommendations = predict.generate_recommendations_batch(
+            [
+                {
+                    "artist_name": request.items[i].artist_name,
+                    "tags": request.items[i].tags,
+                    "weighted": request.items[i].weighted_similarity,
+                    "exclude_artists": request.items[i].exclude_artists,
+                    "search": request.items[i].search,
+                }
+                for i in valid
+            ],
+            threshold=RECOMMEND_THRESHOLD,
+            top_n=RECOMMEND_TOP_N,
+            bundle=bundle
+        )
+    except Exception as e:
+        print(f"Batch Prediction Error: {e}")
+        for i in valid:
+            results[i] = {"error": f"An internal error occurred during prediction: {e}"}
+        return {"results": results}
+
+    for i, recommendations in zip(valid, batch_recommendations):
+        recommendation_cache.put(cache_keys[i], recommendations)
+        try:
+            results[i] = _format_response(request.items[i], recommendations)
+        except Exception as e:
+            results[i] = {"error": f"An internal error occurred during prediction: {e}"}
+    return {"results": results}
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,542 @@
+"""
+FullCircle Model Artifacts
+Versioned, fast-loading artifact bundle (.npy + JSON) written by training and read by predict.py.
+
+    python artifacts.py export     # convert the legacy pickles in model_artifacts/ into a bundle
+    python artifacts.py diagnose   # the catalog sanity checks predict.py used to run on every import
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import scoring
+
+MODEL_DIR = 'model_artifacts'
+BUNDLE_DIRNAME = 'bundle'
+# bundle/ (and each sidecar) is a symlink to a versioned sibling like bundle.v-<ns>. the live one and
+# the one before it are kept, a load that resolved the old link may still be reading it
+KEEP_VERSIONS = 2
+SWAP_WAIT_SECONDS = 2.0  # how long a load waits for a bundle write in progress before giving up
+BUNDLE_FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (1, 2)  # v1 bundles have no precomputed scoring arrays, those get built at load
+
+# precomputed at training time (format v2) and opened with mmap_mode='r', so every
+# forked worker maps the same page-cache pages instead of holding a private copy
+SCORING_ARRAYS = [
+    'catalog_unit',
+    'postings_indptr', 'postings_indices', 'postings_data',
+    'tag_list_indptr', 'tag_list_ranks', 'tag_column_rank', 'tag_rank_to_column',
+    'candidate_pool', 'candidate_pool_rows',
+]
+
+# order of the behavioral block (columns 300-306) in every feature vector
+BEHAVIORAL_FEATURES = [
+    'late_night_ratio', 'weekend_ratio', 'consistency_score', 'consistency_std',
+    'late_weekend_interaction', 'consistency_x_late_night', 'all_behavioral',
+]
+
+# optional top-k neighbour table for seeds already in the catalog (manifest 'neighbour_k' > 0).
+# built row by row through the postings, so it's for training-sized catalogs, not millions
+NEIGHBOUR_K = 50
+NEIGHBOUR_TABLE_MAX_ARTISTS = 20_000
+NEIGHBOUR_ARRAYS = {
+    'neighbour_rows': 'rows',
+    'neighbour_similarities': 'similarities',
+    'neighbour_shared_indptr': 'shared_indptr',
+    'neighbour_shared_ranks': 'shared_ranks',
+    'seed_probability': 'seed_probability',
+}
+
+# the TfidfVectorizer settings that matter at transform time
+VECTORIZER_PARAMS = [
+    'lowercase', 'token_pattern', 'stop_words', 'ngram_range', 'analyzer', 'strip_accents',
+    'binary', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf',
+]
+
+
+class NameTable:
+    """Artist names as one UTF-8 blob plus offsets, so loading is two np.load calls."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_names(cls, names: List[str]) -> "NameTable":
+        encoded = [name.encode('utf-8') for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row_id: int) -> str:
+        return self.blob[self.offsets[row_id]:self.offsets[row_id + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class LoadedArtifacts(NamedTuple):
+    source: str  # 'bundle' or 'legacy'
+    model: object
+    tfidf: object
+    feature_names: List[str]
+    behavioral_means: Dict[str, float]
+    metadata: Dict
+    artist_names: NameTable
+    labels: np.ndarray
+    features: np.ndarray
+    name_index: scoring.NameIndex
+    catalog_unit: np.ndarray
+    postings: scoring.Postings
+    tag_lists: scoring.TagLists
+    candidate_pool: np.ndarray
+    candidate_pool_rows: np.ndarray
+    neighbours: Optional[scoring.NeighbourTable]
+
+
+def bundle_path(model_dir: str = MODEL_DIR) -> str:
+    return os.path.join(model_dir, BUNDLE_DIRNAME)
+
+
+def vectorizer_to_json(tfidf) -> Dict:
+    params = tfidf.get_params()
+    return {
+        'vocabulary': {term: int(i) for term, i in tfidf.vocabulary_.items()},
+        'idf': [float(w) for w in tfidf.idf_],
+        'params': {name: params[name] for name in VECTORIZER_PARAMS},
+    }
+
+
+def vectorizer_from_json(vocab_json: Dict):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(vocab_json['params'])
+    params['ngram_range'] = tuple(params['ngram_range'])
+    tfidf = TfidfVectorizer(vocabulary=vocab_json['vocabulary'], **params)
+    tfidf.idf_ = np.asarray(vocab_json['idf'], dtype=np.float64)
+    return tfidf
+
+
+def derive_scoring_arrays(features: np.ndarray, labels: np.ndarray, idf: np.ndarray) -> Dict[str, np.ndarray]:
+    catalog_unit = scoring.build_unit_matrix(features)
+    postings = scoring.build_postings(catalog_unit)
+    tag_lists = scoring.build_tag_lists(features, idf)
+    candidate_pool = scoring.build_candidate_pool(features, labels, scoring.LOW_HISTORY_THRESHOLD)
+    return {
+        'catalog_unit': catalog_unit,
+        'postings_indptr': postings.indptr,
+        'postings_indices': postings.indices,
+        'postings_data': postings.data,
+        'tag_list_indptr': tag_lists.indptr,
+        'tag_list_ranks': tag_lists.ranks,
+        'tag_column_rank': tag_lists.column_rank,
+        'tag_rank_to_column': tag_lists.rank_to_column,
+        'candidate_pool': candidate_pool,
+        'candidate_pool_rows': np.flatnonzero(candidate_pool).astype(np.int32),
+    }
+
+
+def seed_probabilities(model, features: np.ndarray, behavioral_means: Dict[str, float]) -> np.ndarray:
+    # what the request path predicts for a seed: its TF-IDF tags plus the liked-artist behavioral means
+    behavioral = np.array([behavioral_means[name] for name in BEHAVIORAL_FEATURES])
+    matrix = np.hstack([
+        np.asarray(features[:, :scoring.TAG_DIM], dtype=np.float64),
+        np.tile(behavioral, (features.shape[0], 1)),
+    ])
+    return model.predict_proba(matrix)[:, 1]
+
+
+def derive_neighbour_table(model, features, behavioral_means, idf, arrays, k) -> scoring.NeighbourTable:
+    return scoring.build_neighbour_table(
+        features,
+        postings=scoring.Postings(
+            indptr=arrays['postings_indptr'],
+            indices=arrays['postings_indices'],
+            data=arrays['postings_data'],
+            n_rows=features.shape[0],
+        ),
+        tag_lists=scoring.TagLists(
+            indptr=arrays['tag_list_indptr'],
+            ranks=arrays['tag_list_ranks'],
+            column_rank=arrays['tag_column_rank'],
+            rank_to_column=arrays['tag_rank_to_column'],
+        ),
+        candidate_pool=arrays['candidate_pool'],
+        idf=idf,
+        seed_probability=seed_probabilities(model, features, behavioral_means),
+        k=k,
+    )
+
+
+def _assemble(source, model, tfidf, feature_names, behavioral_means, metadata,
+              artist_names, labels, features, name_index, arrays, neighbours=None) -> LoadedArtifacts:
+    return LoadedArtifacts(
+        source=source,
+        model=model,
+        tfidf=tfidf,
+        feature_names=feature_names,
+        behavioral_means=behavioral_means,
+        metadata=metadata,
+        artist_names=artist_names,
+        labels=labels,
+        features=features,
+        name_index=name_index,
+        catalog_unit=arrays['catalog_unit'],
+        postings=scoring.Postings(
+            indptr=arrays['postings_indptr'],
+            indices=arrays['postings_indices'],
+            data=arrays['postings_data'],
+            n_rows=len(artist_names),
+        ),
+        tag_lists=scoring.TagLists(
+            indptr=arrays['tag_list_indptr'],
+            ranks=arrays['tag_list_ranks'],
+            column_rank=arrays['tag_column_rank'],
+            rank_to_column=arrays['tag_rank_to_column'],
+        ),
+        candidate_pool=arrays['candidate_pool'],
+        candidate_pool_rows=arrays['candidate_pool_rows'],
+        neighbours=neighbours,
+    )
+
+
+def _write_json(path: str, payload) -> None:
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+
+
+def write_bundle(
+    bundle_dir: str,
+    model,
+    tfidf,
+    feature_names: List[str],
+    behavioral_means: Dict[str, float],
+    artist_names: List[str],
+    labels: np.ndarray,
+    features: np.ndarray,
+    metadata: Dict,
+    neighbour_k: int = NEIGHBOUR_K,
+) -> str:
+    # everything goes into a sibling temp dir first, then gets swapped in, so a crash
+    # halfway through never leaves predict.py looking at a half-written bundle
+    staging_dir = f"{bundle_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    names = NameTable.from_names(list(artist_names))
+    name_index = scoring.build_name_index(names)
+
+    np.save(os.path.join(staging_dir, 'features.npy'), np.ascontiguousarray(features, dtype=np.float32))
+    np.save(os.path.join(staging_dir, 'labels.npy'), np.asarray(labels, dtype=np.int32))
+    np.save(os.path.join(staging_dir, 'name_bytes.npy'), names.blob)
+    np.save(os.path.join(staging_dir, 'name_offsets.npy'), names.offsets)
+    np.save(os.path.join(staging_dir, 'name_hashes.npy'), name_index.hashes)
+    np.save(os.path.join(staging_dir, 'name_rows.npy'), name_index.rows)
+    float_features = np.ascontiguousarray(features, dtype=np.float32)
+    scoring_arrays = derive_scoring_arrays(float_features, np.asarray(labels), tfidf.idf_)
+    for name, array in scoring_arrays.items():
+        np.save(os.path.join(staging_dir, f'{name}.npy'), array)
+    if len(names) > NEIGHBOUR_TABLE_MAX_ARTISTS:
+        neighbour_k = 0
+    if neighbour_k > 0:
+        table = derive_neighbour_table(model, float_features, behavioral_means, tfidf.idf_, scoring_arrays, neighbour_k)
+        for name, field in NEIGHBOUR_ARRAYS.items():
+            np.save(os.path.join(staging_dir, f'{name}.npy'), getattr(table, field))
+    model.save_model(os.path.join(staging_dir, 'model.json'))
+    _write_json(os.path.join(staging_dir, 'vocab.json'), vectorizer_to_json(tfidf))
+    _write_json(os.path.join(staging_dir, 'feature_names.json'), [str(name) for name in feature_names])
+    _write_json(os.path.join(staging_dir, 'behavioral_means.json'), behavioral_means)
+    _write_json(os.path.join(staging_dir, 'metadata.json'), metadata)
+    _write_json(os.path.join(staging_dir, 'manifest.json'), {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'trained_at': metadata.get('trained_at'),
+        'n_artists': int(len(names)),
+        'n_features': int(features.shape[1]),
+        'low_history_threshold': scoring.LOW_HISTORY_THRESHOLD,
+        'neighbour_k': int(neighbour_k),
+    })
+
+    return _swap_into_place(staging_dir, bundle_dir)
+
+
+def _versions(target_dir: str) -> List[str]:
+    parent, name = os.path.split(os.path.abspath(target_dir))
+    prefix = f"{name}.v-"
+    versions = [entry for entry in os.listdir(parent) if entry.startswith(prefix) and entry[len(prefix):].isdigit()]
+    return sorted(versions, key=lambda entry: int(entry[len(prefix):]))
+
+
+def _swap_into_place(staging_dir: str, target_dir: str) -> str:
+    # the finished staging dir becomes a new version and target_dir, a symlink, is flipped to it with
+    # os.replace: one atomic rename, so there's never a moment without a target_dir to load from
+    parent, name = os.path.split(os.path.abspath(target_dir))
+    version = f"{name}.v-{time.time_ns()}"
+    os.rename(staging_dir, os.path.join(parent, version))
+
+    link = f"{target_dir}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    try:
+        # relative, so the model dir still works when it's copied or mounted somewhere else
+        os.symlink(version, link, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        # no symlinks here (Windows without developer mode): the plain rename swap, brief gap included
+        retired_dir = f"{target_dir}.old-{os.getpid()}"
+        if os.path.exists(target_dir):
+            os.rename(target_dir, retired_dir)
+        os.rename(os.path.join(parent, version), target_dir)
+        shutil.rmtree(retired_dir, ignore_errors=True)
+        return target_dir
+
+    if os.path.isdir(target_dir) and not os.path.islink(target_dir):
+        # written before versioned dirs: becomes the oldest version, the one rename that still has a gap
+        os.rename(target_dir, os.path.join(parent, f"{name}.v-0"))
+    os.replace(link, target_dir)
+
+    for old in _versions(target_dir)[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(parent, old), ignore_errors=True)
+    return target_dir
+
+
+def _swap_in_progress(target_dir: str) -> bool:
+    # a bundle has existed here (versions, or the rename fallback's retired dir) but the link isn't
+    # there right now. a lone .tmp- staging dir doesn't count: that's the first bundle still being
+    # written, or one a crash left behind, and the legacy pickles are all there is either way
+    parent, name = os.path.split(os.path.abspath(target_dir))
+    if not os.path.isdir(parent):
+        return False
+    return bool(_versions(target_dir)) or any(entry.startswith(f"{name}.old-") for entry in os.listdir(parent))
+
+
+def catalog_digest(candidate_pool_rows: np.ndarray, metadata: Dict) -> str:
+    # sidecars (ANN index, embedding) are only valid for the catalog they were built from.
+    # trained_at changes on every retrain, the pool rows catch a changed label threshold
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(str(metadata.get('trained_at')).encode())
+    digest.update(np.ascontiguousarray(candidate_pool_rows, dtype=np.int32).tobytes())
+    return digest.hexdigest()
+
+
+def write_sidecar(target_dir: str, arrays: Dict[str, np.ndarray], manifest: Dict) -> str:
+    """Optional derived arrays that live next to the bundle, staged and swapped in the same way."""
+    staging_dir = f"{target_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging_dir, f'{name}.npy'), array)
+    _write_json(os.path.join(staging_dir, 'manifest.json'), manifest)
+    return _swap_into_place(staging_dir, target_dir)
+
+
+def read_sidecar_manifest(target_dir: str) -> Optional[Dict]:
+    try:
+        return _read_json(os.path.join(target_dir, 'manifest.json'))
+    except FileNotFoundError:
+        return None
+
+
+def load_sidecar(
+    target_dir: str, names: List[str], format_version: int, candidate_pool_rows: np.ndarray, metadata: Dict, rebuild: str
+) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+    """(arrays, manifest), or None when there's no sidecar or it was built for another catalog."""
+    # every file from the same version, even if the link flips halfway through
+    target_dir = os.path.realpath(target_dir)
+    manifest = read_sidecar_manifest(target_dir)
+    if manifest is None:
+        return None
+    if manifest.get('format_version') != format_version:
+        print(f"Ignoring {target_dir}: format {manifest.get('format_version')}, expected {format_version}")
+        return None
+    if manifest.get('catalog_digest') != catalog_digest(candidate_pool_rows, metadata):
+        print(f"Ignoring stale {target_dir}: built for a different catalog, re-run `{rebuild}`")
+        return None
+
+    def array(name):
+        # mapped and viewed as plain ndarrays, same as the bundle
+        return np.asarray(np.load(os.path.join(target_dir, f'{name}.npy'), mmap_mode='r'))
+
+    return {name: array(name) for name in names}, manifest
+
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_bundle(bundle_dir: str) -> LoadedArtifacts:
+    import xgboost as xgb
+
+    # resolve the link once: every file comes from the same version even if training flips it mid-load
+    bundle_dir = os.path.realpath(bundle_dir)
+    manifest = _read_json(os.path.join(bundle_dir, 'manifest.json'))
+    format_version = manifest.get('format_version')
+    if format_version not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(
+            f"Bundle format {format_version} in {bundle_dir} is not supported "
+            f"(expected one of {SUPPORTED_FORMAT_VERSIONS}). Re-run training or `python artifacts.py export`."
+        )
+
+    def array(name):
+        # read-only memory maps: the OS shares these pages between every worker process. viewed
+        # as plain ndarrays, np.memmap's per-slice bookkeeping was a real share of a table lookup
+        return np.asarray(np.load(os.path.join(bundle_dir, f'{name}.npy'), mmap_mode='r'))
+
+    model = xgb.XGBClassifier()
+    model.load_model(os.path.join(bundle_dir, 'model.json'))
+    tfidf = vectorizer_from_json(_read_json(os.path.join(bundle_dir, 'vocab.json')))
+    labels = array('labels')
+    features = array('features')
+
+    neighbours = None
+    if format_version >= 2:
+        arrays = {name: array(name) for name in SCORING_ARRAYS}
+        if manifest.get('low_history_threshold') != scoring.LOW_HISTORY_THRESHOLD:
+            pool = scoring.build_candidate_pool(features, labels, scoring.LOW_HISTORY_THRESHOLD)
+            arrays['candidate_pool'] = pool
+            arrays['candidate_pool_rows'] = np.flatnonzero(pool).astype(np.int32)
+        elif manifest.get('neighbour_k'):
+            # ranked over the stored pool, so only usable while that pool is the live one
+            neighbours = scoring.NeighbourTable(**{field: array(name) for name, field in NEIGHBOUR_ARRAYS.items()})
+    else:
+        arrays = derive_scoring_arrays(features, labels, tfidf.idf_)
+
+    return _assemble(
+        source='bundle',
+        model=model,
+        tfidf=tfidf,
+        feature_names=_read_json(os.path.join(bundle_dir, 'feature_names.json')),
+        behavioral_means=_read_json(os.path.join(bundle_dir, 'behavioral_means.json')),
+        metadata=_read_json(os.path.join(bundle_dir, 'metadata.json')),
+        artist_names=NameTable(array('name_bytes'), array('name_offsets')),
+        labels=labels,
+        features=features,
+        name_index=scoring.NameIndex(hashes=array('name_hashes'), rows=array('name_rows')),
+        arrays=arrays,
+        neighbours=neighbours,
+    )
+
+
+def load_legacy(model_dir: str) -> LoadedArtifacts:
+    # the original five pickles. slow (one ndarray object per DataFrame row) but still supported
+    import pandas as pd
+
+    def unpickle(name):
+        with open(os.path.join(model_dir, name), 'rb') as f:
+            return pickle.load(f)
+
+    all_artists_df = pd.read_pickle(os.path.join(model_dir, 'all_artists_df.pkl'))
+    names = NameTable.from_names(all_artists_df['artist_name'].tolist())
+    try:
+        metadata = _read_json(os.path.join(model_dir, 'model_metadata.json'))
+    except FileNotFoundError:
+        metadata = {}
+
+    tfidf = unpickle('tfidf_vectorizer.pkl')
+    labels = all_artists_df['label'].to_numpy()
+    features = np.vstack(all_artists_df['features'].values)
+
+    return _assemble(
+        source='legacy',
+        model=unpickle('final_xgb_model.pkl'),
+        tfidf=tfidf,
+        feature_names=unpickle('feature_names.pkl'),
+        behavioral_means=unpickle('behavioral_means.pkl'),
+        metadata=metadata,
+        artist_names=names,
+        labels=labels,
+        features=features,
+        name_index=scoring.build_name_index(names),
+        arrays=derive_scoring_arrays(features, labels, tfidf.idf_),
+    )
+
+
+def load_artifacts(model_dir: str = MODEL_DIR) -> LoadedArtifacts:
+    bundle_dir = bundle_path(model_dir)
+    deadline = time.monotonic() + SWAP_WAIT_SECONDS
+    while not os.path.exists(os.path.join(bundle_dir, 'manifest.json')):
+        if not _swap_in_progress(bundle_dir):
+            return load_legacy(model_dir)
+        # a bundle is being written or swapped in: wait for it rather than quietly serving the old pickles
+        if time.monotonic() > deadline:
+            raise FileNotFoundError(
+                f"{bundle_dir} is missing while a bundle write is in progress next to it, not falling back to the legacy pickles"
+            )
+        time.sleep(0.05)
+    return load_bundle(bundle_dir)
+
+
+def artifact_fingerprint(model_dir: str = MODEL_DIR) -> str:
+    # changes whenever any top-level artifact is rewritten or the bundle link flips to a new version
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(model_dir)):
+        try:
+            stat = os.stat(os.path.join(model_dir, name))
+        except FileNotFoundError:
+            continue  # an old bundle version pruned between listdir and stat
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def export_legacy(model_dir: str = MODEL_DIR) -> str:
+    legacy = load_legacy(model_dir)
+    return write_bundle(
+        bundle_path(model_dir),
+        model=legacy.model,
+        tfidf=legacy.tfidf,
+        feature_names=legacy.feature_names,
+        behavioral_means=legacy.behavioral_means,
+        artist_names=list(legacy.artist_names),
+        labels=legacy.labels,
+        features=legacy.features,
+        metadata=legacy.metadata,
+    )
+
+
+def diagnose(loaded: LoadedArtifacts) -> None:
+    features = loaded.features
+    n_artists = len(loaded.artist_names)
+    tag_sums = np.abs(features[:, :scoring.TAG_DIM]).sum(axis=1)
+    zero_rows = np.flatnonzero(np.abs(features).sum(axis=1) == 0)
+    idf_map = dict(zip(loaded.tfidf.get_feature_names_out(), loaded.tfidf.idf_))
+
+    print(f"Source: {loaded.source}")
+    print(f"TF-IDF vocabulary: {len(idf_map)} terms")
+    print(f"Rarity of 'icelandic' tag (IDF): {idf_map.get('icelandic', 'NOT FOUND')}")
+    print(f"Features per artist: {len(loaded.feature_names)}")
+    print(f"Behavioral means: {loaded.behavioral_means}")
+    print(f"\nArtists with non-zero TF-IDF features: {int((tag_sums > 0).sum())}/{n_artists}")
+    print(f"Artists with ONLY behavioral features: {int((tag_sums == 0).sum())}/{n_artists}")
+    for row_id in zero_rows[:5]:
+        print(f"  Zero-vector artist: {loaded.artist_names[row_id]}")
+    print(f"Total zero-vector artists: {len(zero_rows)}/{n_artists}")
+    if loaded.neighbours is not None:
+        print(f"Neighbour table: top {loaded.neighbours.k} per artist, both weighting modes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FullCircle model artifact tools")
+    parser.add_argument('command', choices=['export', 'diagnose'])
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        path = export_legacy(args.model_dir)
+        print(f"✓ Wrote artifact bundle to {path}")
+    else:
+        started = time.perf_counter()
+        loaded = load_artifacts(args.model_dir)
+        print(f"Loaded artifacts in {(time.perf_counter() - started) * 1000:.1f} ms")
+        diagnose(loaded)
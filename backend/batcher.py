@@ -0,0 +1,192 @@
+"""
+FullCircle Micro-Batcher
+Collects /recommend queries that arrive within a short window and answers them with one
+generate_recommendations_batch pass, instead of one full scoring pass per request.
+
+    python batcher.py check   # batching, and one failing query in a batch failing alone
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class BatcherOverloaded(Exception):
+    """Raised by submit() when the queue is already at max_queue."""
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        run_batch: Callable[[List[Dict]], List[Any]],
+        window_ms: float = 0.5,
+        max_batch: int = 32,
+        max_queue: int = 256,
+    ):
+        # run_batch takes a list of queries and returns one result per query, in order.
+        # it is blocking, so it runs on the default executor and the event loop keeps
+        # accepting requests while a batch is being scored
+        self.run_batch = run_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.rejected = 0
+        self.split_batches = 0  # batches that raised and were re-run one query at a time
+
+    def start(self) -> None:
+        # has to happen on the loop that will serve requests (and after any worker fork)
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # nobody is going to answer whatever is still queued
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("batcher stopped"))
+
+    async def submit(self, query: Dict) -> Any:
+        if self._task is None:
+            raise RuntimeError("MicroBatcher.start() has not been called")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((query, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise BatcherOverloaded(f"recommendation queue is full ({self.max_queue} waiting)")
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict, asyncio.Future]]:
+        # block for the first query, then give the rest of the window to stragglers.
+        # whatever queued up while the previous batch was scoring is picked up right away
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # a client that disconnected cancels its future, no point scoring it
+            batch = [(query, future) for query, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                results = await loop.run_in_executor(None, self.run_batch, [query for query, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(e)
+                    continue
+                # one bad query shouldn't fail everyone it happened to share a window with:
+                # run each on its own so only the one that raises gets the error
+                self.split_batches += 1
+                await self._answer_one_by_one(loop, batch)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _answer_one_by_one(self, loop, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        for query, future in batch:
+            if future.done():
+                continue
+            try:
+                results = await loop.run_in_executor(None, self.run_batch, [query])
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(results[0])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "rejected": self.rejected,
+            "split_batches": self.split_batches,
+        }
+
+
+def _check() -> None:
+    calls = []
+
+    def run_batch(queries: List[Dict]) -> List[Any]:
+        calls.append(len(queries))
+        if any(query.get("poison") for query in queries):
+            raise ValueError("poisoned query")
+        return [query["n"] * 2 for query in queries]
+
+    async def main() -> None:
+        batcher = MicroBatcher(run_batch, window_ms=20, max_batch=8)
+        batcher.start()
+        queries = [{"n": n, "poison": n == 3} for n in range(6)]
+        results = await asyncio.gather(*(batcher.submit(query) for query in queries), return_exceptions=True)
+        await batcher.stop()
+
+        assert calls[0] == len(queries), calls  # all six went out as one batch first
+        assert isinstance(results[3], ValueError), results
+        assert [r for n, r in enumerate(results) if n != 3] == [n * 2 for n in range(6) if n != 3], results
+        assert batcher.split_batches == 1, batcher.stats()
+        print(f"✓ one poisoned query in a batch of {len(queries)} fails alone, the other {len(queries) - 1} are answered")
+
+        # a batch of one that raises just gets its error, no retry
+        calls.clear()
+        batcher = MicroBatcher(run_batch, window_ms=1)
+        batcher.start()
+        try:
+            await batcher.submit({"n": 0, "poison": True})
+            raise AssertionError("poisoned query didn't raise")
+        except ValueError:
+            pass
+        await batcher.stop()
+        assert calls == [1] and batcher.split_batches == 0, (calls, batcher.stats())
+        print("✓ a failing batch of one raises once, without a retry")
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FullCircle micro-batcher")
+    parser.add_argument('command', choices=['check'])
+    parser.parse_args()
+    _check()
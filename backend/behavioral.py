@@ -0,0 +1,121 @@
+"""
+FullCircle Behavioral Features
+Per-artist listening-habit features (late night / weekend share, listening consistency and their
+interactions). Training builds them from play_aggregates' per-artist SQL aggregates; the same
+features can be computed from a raw play table in one vectorized pass (plays sorted by
+(artist, played_at), every per-artist number a segment reduction over that order).
+"""
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+
+LATE_NIGHT_HOURS = (23, 4)  # 23:00 through 04:59
+WEEKEND_DAYS = (5, 6)  # dayofweek, 0 = Monday
+
+
+def _segment_sums(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # per-segment sum that rounds exactly like Series.sum() on that segment: numpy sums a contiguous
+    # row pairwise, so segments of equal length are stacked and summed along rows. one numpy call
+    # per distinct length (a few hundred at most), never one per artist
+    sums = np.zeros(len(starts), dtype=np.float64)
+    for length in np.unique(lengths[lengths > 0]):
+        segments = np.flatnonzero(lengths == length)
+        sums[segments] = values[starts[segments, None] + np.arange(length)].sum(axis=1)
+    return sums
+
+
+def _segment_std(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # sample std (ddof=1) the way pandas computes it for one Series: mean first, then the summed
+    # squared deviations over n - 1. NaN below two values, same as pandas
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = _segment_sums(values, starts, lengths) / lengths
+        deviations = (np.repeat(means, lengths) - values) ** 2
+        variance = _segment_sums(deviations, starts, lengths) / (lengths - 1)
+    variance[lengths < 2] = np.nan
+    return np.sqrt(variance)
+
+
+def behavioral_features(plays: pd.DataFrame, artists: Iterable[str]) -> pd.DataFrame:
+    """The behavioral columns for every artist, in the given order, as a frame keyed by 'artist'.
+
+    plays has one row per play with artist_names and a parsed played_at. Artists without plays
+    get zeros, artists with a single play a consistency of 0, and artists with exactly two plays
+    a NaN consistency (the std of one gap), which is what training has always produced.
+    """
+    plays = plays.sort_values(['artist_names', 'played_at'], kind='stable')
+    names = plays['artist_names'].to_numpy()
+    played_at = plays['played_at']
+
+    # plays are grouped now, so each artist is one contiguous segment
+    boundaries = np.flatnonzero(names[1:] != names[:-1]) + 1 if len(names) else np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], boundaries]) if len(names) else np.empty(0, dtype=np.int64)
+    counts = np.diff(np.append(starts, len(names)))
+    owner = np.repeat(np.arange(len(starts)), counts)
+
+    hours = played_at.dt.hour.to_numpy()
+    late_night = (hours >= LATE_NIGHT_HOURS[0]) | (hours <= LATE_NIGHT_HOURS[1])
+    weekend = played_at.dt.dayofweek.isin(WEEKEND_DAYS).to_numpy()
+    late_night_ratio = np.bincount(owner, weights=late_night, minlength=len(starts)) / counts
+    weekend_ratio = np.bincount(owner, weights=weekend, minlength=len(starts)) / counts
+
+    # whole days between consecutive plays of the same artist: the first play of every segment
+    # has no predecessor, so those gaps are dropped and each segment keeps count - 1 of them
+    gaps = played_at.diff().dt.days.to_numpy(dtype=np.float64)
+    first = np.zeros(len(names), dtype=bool)
+    first[starts] = True
+    gaps = gaps[~first]
+    consistency_std = _segment_std(gaps, starts - np.arange(len(starts)), counts - 1)
+    consistency_score = 1 / (consistency_std + 1)
+    # a single play has no gap at all, that's a plain 0 rather than NaN
+    consistency_std[counts == 1] = 0
+    consistency_score[counts == 1] = 0
+
+    features = pd.DataFrame({
+        'late_night_ratio': late_night_ratio,
+        'weekend_ratio': weekend_ratio,
+        'consistency_score': consistency_score,
+        'consistency_std': consistency_std,
+    }, index=names[starts] if len(names) else [])
+    return _finish(features, artists)
+
+
+def behavioral_from_aggregates(aggregates: pd.DataFrame, artists: Iterable[str]) -> pd.DataFrame:
+    """Same frame as behavioral_features, from play_aggregates.artist_behavior's per-artist counts.
+
+    The gap std comes from exact integer moments, n*sum(x^2) - sum(x)^2 over n*(n-1), which is
+    one rounding instead of pandas' two passes: equal to the raw-play path to within a few ulps.
+    """
+    plays = aggregates['plays'].to_numpy(dtype=np.float64)
+    n = aggregates['gaps'].to_numpy(dtype=np.int64)
+    gap_sum = aggregates['gap_days_sum'].to_numpy(dtype=np.int64)
+    gap_sumsq = aggregates['gap_days_sumsq'].to_numpy(dtype=np.int64)
+
+    # gaps add up to the history's span in days, so these stay far below 2^53 and convert exactly
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (n * gap_sumsq - gap_sum * gap_sum).astype(np.float64) / (n * (n - 1)).astype(np.float64)
+    variance[n < 2] = np.nan
+    consistency_std = np.sqrt(variance)
+    consistency_score = 1 / (consistency_std + 1)
+    consistency_std[n == 0] = 0
+    consistency_score[n == 0] = 0
+
+    features = pd.DataFrame({
+        'late_night_ratio': aggregates['late_night_plays'].to_numpy(dtype=np.float64) / plays,
+        'weekend_ratio': aggregates['weekend_plays'].to_numpy(dtype=np.float64) / plays,
+        'consistency_score': consistency_score,
+        'consistency_std': consistency_std,
+    }, index=aggregates['artist_names'].to_numpy())
+    return _finish(features, artists)
+
+
+def _finish(features: pd.DataFrame, artists: Iterable[str]) -> pd.DataFrame:
+    features = features.reindex(list(artists), fill_value=0)
+    features['late_weekend_interaction'] = features['late_night_ratio'] * features['weekend_ratio']
+    features['consistency_x_late_night'] = features['consistency_score'] * features['late_night_ratio']
+    features['all_behavioral'] = features['late_night_ratio'] * features['weekend_ratio'] * features['consistency_score']
+    features = features[artifacts.BEHAVIORAL_FEATURES]
+    features.index.name = 'artist'
+    return features.reset_index()
@@ -0,0 +1,16 @@
+"""
+FullCircle Benchmarks
+Synthetic model artifacts, microbenchmarks for the prediction path, an in-process HTTP load
+generator for /recommend, a data-loading report and a hyperparameter search report for
+training, and a Last.fm fetching report against a local stand-in. Run from backend/:
+
+    python -m benchmarks generate --artists 100k --out bench_artifacts/100k
+    python -m benchmarks run --model-dir bench_artifacts/100k --out results.json
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks ann --model-dir bench_artifacts/100k   # after python ann_index.py build
+    python -m benchmarks lsa --model-dir bench_artifacts/100k --dimensions 32,48,64
+    python -m benchmarks generate-plays --plays 150k --out bench_artifacts/plays.db
+    python -m benchmarks plays --db bench_artifacts/plays.db   # training's data loading, SQL vs pandas
+    python -m benchmarks search --artists 1500   # halving / xgbcv vs the exhaustive grid
+    python -m benchmarks lastfm --artists 100 --failure-rate 0.05   # no network, benchmarks/lastfm_stub.py
+"""
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from benchmarks import compare, synthetic
+
+
+def _environment(model_dir: str) -> dict:
+    import numpy as np
+    import sklearn
+    import xgboost
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created_at': datetime.now().isoformat(),
+        'git_commit': commit,
+        'model_dir': model_dir,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'xgboost': xgboost.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="FullCircle benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="write synthetic model artifacts")
+    generate.add_argument('--artists', default='1k', help="1k, 100k, 1m or a plain number")
+    generate.add_argument('--out', required=True)
+    generate.add_argument('--seed', type=int, default=0)
+
+    plays = commands.add_parser('generate-plays', help="write a synthetic listening_history.db")
+    plays.add_argument('--plays', default='150k', help="150k, 1m or a plain number")
+    plays.add_argument('--out', required=True)
+    plays.add_argument('--seed', type=int, default=0)
+
+    run = commands.add_parser('run', help="microbenchmarks + HTTP load against a model dir")
+    run.add_argument('--model-dir', required=True)
+    run.add_argument('--out', default='benchmark_results.json')
+    run.add_argument('--seconds', type=float, default=1.0, help="time per microbenchmark")
+    run.add_argument('--http-seconds', type=float, default=5.0, help="time per HTTP concurrency level")
+    run.add_argument('--concurrency', default='1,8,32')
+    run.add_argument('--skip-http', action='store_true')
+
+    ann = commands.add_parser('ann', help="recall@k vs latency of the IVF index against exact search")
+    ann.add_argument('--model-dir', required=True)
+    ann.add_argument('--out', default=None)
+    ann.add_argument('--nprobe', default='1,2,4,8,16,32')
+    ann.add_argument('--k', type=int, default=10)
+    ann.add_argument('--seconds', type=float, default=1.0, help="time per setting")
+
+    lsa = commands.add_parser('lsa', help="ranking overlap vs latency of LSA embeddings against exact search")
+    lsa.add_argument('--model-dir', required=True)
+    lsa.add_argument('--out', default=None)
+    lsa.add_argument('--dimensions', default='32,48,64')
+    lsa.add_argument('--k', type=int, default=10)
+    lsa.add_argument('--seconds', type=float, default=1.0, help="time per setting")
+
+    loading = commands.add_parser('plays', help="training's data loading: SQL aggregates vs reading every play")
+    loading.add_argument('--db', required=True)
+    loading.add_argument('--out', default=None)
+    loading.add_argument('--repeats', type=int, default=3)
+
+    lastfm = commands.add_parser('lastfm', help="Last.fm fetching throughput and retries against a local stand-in")
+    lastfm.add_argument('--artists', type=int, default=100)
+    lastfm.add_argument('--latency-ms', type=float, default=200.0)
+    lastfm.add_argument('--failure-rate', type=float, default=0.05)
+    lastfm.add_argument('--workers', default='1,4,8')
+    lastfm.add_argument('--rate', type=float, default=5.0, help="requests per second allowed to the pool")
+    lastfm.add_argument('--out', default=None)
+
+    hyper = commands.add_parser('search', help="hyperparameter search strategies: wall-clock and CV score vs the full grid")
+    hyper.add_argument('--artists', default='1500', help="training set size, 1500 is about the real one")
+    hyper.add_argument('--strategies', default='halving,xgbcv')
+    hyper.add_argument('--budget', type=float, default=None, help="seconds per strategy (grid ignores it)")
+    hyper.add_argument('--seed', type=int, default=0)
+    hyper.add_argument('--out', default=None)
+
+    diff = commands.add_parser('compare', help="flag regressions against a stored baseline")
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+    diff.add_argument('--tolerance', type=float, default=0.15, help="allowed slowdown, 0.15 = 15%%")
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        synthetic.generate(synthetic.parse_size(args.artists), args.out, seed=args.seed)
+        return 0
+
+    if args.command == 'generate-plays':
+        synthetic.generate_plays(synthetic.parse_size(args.plays), args.out, seed=args.seed)
+        return 0
+
+    if args.command == 'plays':
+        from benchmarks import play_loading
+
+        print(f"\nData loading ({args.db}, median of {args.repeats}):")
+        results = play_loading.run(args.db, repeats=args.repeats)
+        if args.out:
+            environment = _environment(None)
+            environment['db'] = args.db
+            with open(args.out, 'w') as f:
+                json.dump({'environment': environment, 'results': results}, f, indent=2)
+            print(f"\n✓ Wrote {args.out}")
+        return 0
+
+    if args.command == 'lastfm':
+        from benchmarks import lastfm_fetching
+
+        print(f"\nLast.fm fetching ({args.artists} artists, {args.latency_ms:g} ms latency, "
+              f"{args.failure_rate:.0%} transient failures, local stand-in):")
+        workers = [int(w) for w in args.workers.split(',')]
+        results = lastfm_fetching.run(args.artists, args.latency_ms, args.failure_rate, workers, rate=args.rate)
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump({'environment': _environment(None), 'results': results}, f, indent=2)
+            print(f"\n✓ Wrote {args.out}")
+        return 0
+
+    if args.command == 'search':
+        from benchmarks import search_parity
+
+        n_artists = synthetic.parse_size(args.artists)
+        print(f"\nHyperparameter search ({n_artists:,} synthetic artists, 5 folds):")
+        results = search_parity.run(n_artists, args.strategies.split(','), time_budget=args.budget, seed=args.seed)
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump({'environment': _environment(None), 'results': results}, f, indent=2)
+            print(f"\n✓ Wrote {args.out}")
+        return 0
+
+    if args.command in ('run', 'ann', 'lsa'):
+        # predict.py loads at import, so point it at the benchmark artifacts first. no reloader,
+        # and no diagnostics sampling, those would only add noise
+        os.environ['FC_MODEL_DIR'] = args.model_dir
+        os.environ['FC_RELOAD_INTERVAL_SECONDS'] = '0'
+        os.environ['FC_DIAGNOSTIC_SAMPLE_EVERY'] = '0'
+        import predict
+
+    if args.command == 'ann':
+        from benchmarks import ann_recall
+
+        bundle = predict.current_bundle()
+        print(f"\nIVF vs exact ({len(bundle.artist_names):,} artists, top {args.k}):")
+        nprobes = [int(n) for n in args.nprobe.split(',')]
+        results = ann_recall.run(nprobes, k=args.k, min_seconds=args.seconds)
+        if args.out:
+            environment = _environment(args.model_dir)
+            environment['n_artists'] = len(bundle.artist_names)
+            environment['ann_index'] = bundle.ann_index.manifest
+            with open(args.out, 'w') as f:
+                json.dump({'environment': environment, 'results': results}, f, indent=2)
+            print(f"\n✓ Wrote {args.out}")
+        return 0 if results['ann.full_probe']['matches_exact'] else 1
+
+    if args.command == 'lsa':
+        from benchmarks import lsa_overlap
+
+        bundle = predict.current_bundle()
+        print(f"\nLSA vs exact ({len(bundle.artist_names):,} artists, top {args.k}):")
+        dimensions = [int(d) for d in args.dimensions.split(',')]
+        results = lsa_overlap.run(dimensions, k=args.k, min_seconds=args.seconds)
+        if args.out:
+            environment = _environment(args.model_dir)
+            environment['n_artists'] = len(bundle.artist_names)
+            with open(args.out, 'w') as f:
+                json.dump({'environment': environment, 'results': results}, f, indent=2)
+            print(f"\n✓ Wrote {args.out}")
+        return 0
+
+    if args.command == 'run':
+        from benchmarks import http_load, micro
+
+        bundle = predict.current_bundle()
+        print(f"\nMicrobenchmarks ({len(bundle.artist_names):,} artists):")
+        results = micro.run(min_seconds=args.seconds)
+        if not args.skip_http:
+            print("\nHTTP load (in-process uvicorn):")
+            levels = [int(level) for level in args.concurrency.split(',')]
+            results.update(http_load.run(levels, seconds=args.http_seconds))
+
+        environment = _environment(args.model_dir)
+        environment['n_artists'] = len(bundle.artist_names)
+        environment['model_version'] = bundle.version
+        with open(args.out, 'w') as f:
+            json.dump({'environment': environment, 'results': results}, f, indent=2)
+        print(f"\n✓ Wrote {args.out}")
+        return 0
+
+    baseline, current = compare.load(args.baseline), compare.load(args.current)
+    lines, regressions = compare.compare(baseline, current, tolerance=args.tolerance)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        return 1
+    print(f"\n✓ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
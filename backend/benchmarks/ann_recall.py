@@ -0,0 +1,71 @@
+"""
+FullCircle ANN Recall Report
+Recall@k and latency of generate_recommendations with search='ivf' at several nprobe settings,
+against search='exact' on the same queries.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from benchmarks.micro import measure, sample_queries
+
+
+def recall_at_k(exact: List[Dict], approximate: List[Dict], k: int) -> float:
+    # tie-aware: an approximate hit counts when it scores at least the lowest positive exact
+    # similarity. artists with identical tag sets tie a lot, and which of them fills the last slot
+    # is arbitrary. the exact path pads short lists with zero-overlap artists in catalog order;
+    # those aren't neighbours to find, so only the positive slots are in the denominator
+    positive = [r['similarity_to_input'] for r in exact[:k] if r['similarity_to_input'] > 0]
+    if not positive:
+        return 1.0
+    cutoff = positive[-1] - 1e-6
+    hits = sum(1 for r in approximate[:k] if r['similarity_to_input'] >= cutoff and r['similarity_to_input'] > 0)
+    return min(hits, len(positive)) / len(positive)
+
+
+def _postings_lookups(predict) -> int:
+    # every exact candidate search, the ivf path's fallback included, observes this series once
+    series = predict.CANDIDATES_SCORED._series.get(("postings",))
+    return series[2] if series else 0
+
+
+def run(nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32), k: int = 10, n_queries: int = 200,
+        min_seconds: float = 1.0) -> Dict[str, Dict[str, float]]:
+    import predict
+
+    bundle = predict.current_bundle()
+    if bundle.ann_index is None:
+        raise SystemExit("No ANN index for this catalog, run `python ann_index.py build --model-dir ...` first")
+    queries = sample_queries(bundle, n=n_queries)
+
+    def recommend(query, search, nprobe=None):
+        # threshold 0, every query gets a ranked list to compare
+        return predict.generate_recommendations(
+            query['artist_name'], query['tags'], threshold=0.0, top_n=k, search=search, nprobe=nprobe
+        )
+
+    exact = [recommend(q, 'exact') for q in queries]
+    results = {'ann.exact': dict(measure(lambda q: recommend(q, 'exact'), queries, min_seconds=min_seconds), recall=1.0)}
+    print(f"  {'exact':12} recall@{k} 1.000   p50 {results['ann.exact']['p50_us']:9.1f} us   p99 {results['ann.exact']['p99_us']:9.1f} us")
+
+    n_lists = bundle.ann_index.n_lists
+    # probing every list always runs too: it scans the whole pool, so it has to match exact
+    nprobes = sorted({nprobe for nprobe in nprobes if nprobe <= n_lists} | {n_lists})
+    for nprobe in nprobes:
+        # probed lists holding fewer than k hits send the query to exact search, which is why a
+        # low nprobe can score above a slightly higher one
+        lookups = _postings_lookups(predict)
+        recall = float(np.mean([recall_at_k(e, recommend(q, 'ivf', nprobe), k) for q, e in zip(queries, exact)]))
+        fallback = (_postings_lookups(predict) - lookups) / len(queries)
+        stats = measure(lambda q: recommend(q, 'ivf', nprobe), queries, min_seconds=min_seconds)
+        stats.update(recall=recall, nprobe=nprobe, scanned=nprobe / n_lists, exact_fallback=fallback)
+        results[f"ann.ivf.nprobe{nprobe}"] = stats
+        print(f"  ivf x{nprobe:<8} recall@{k} {recall:.3f}   p50 {stats['p50_us']:9.1f} us   p99 {stats['p99_us']:9.1f} us"
+              f"   ({nprobe}/{n_lists} lists, {fallback:.0%} fell back to exact)")
+
+    full = results[f"ann.ivf.nprobe{n_lists}"]['recall']
+    full_probe_ok = abs(full - 1.0) < 1e-9
+    results['ann.full_probe'] = {'recall': full, 'matches_exact': full_probe_ok}
+    print(f"  {'✓' if full_probe_ok else '✗'} probing all {n_lists} lists gives recall@{k} {full:.3f}"
+          f"{'' if full_probe_ok else ', expected 1.000'}")
+    return results
@@ -0,0 +1,45 @@
+"""
+FullCircle Benchmark Compare
+Diffs two results files and flags anything that got slower than the tolerance allows.
+"""
+import json
+from typing import Dict, List, Tuple
+
+# metric -> (bigger is better, can fail the comparison). p99 is too noisy run to run to gate on,
+# it is still shown
+TRACKED_METRICS = {
+    'p50_us': (False, True),
+    'p99_us': (False, False),
+    'p50_ms': (False, True),
+    'p99_ms': (False, False),
+    'rps': (True, True),
+}
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.15) -> Tuple[List[str], List[str]]:
+    """(report lines, regressions). A regression is a tracked metric worse by more than tolerance."""
+    lines, regressions = [], []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        if name not in current['results'] or name not in baseline['results']:
+            lines.append(f"  {name:40} only in {'baseline' if name in baseline['results'] else 'current'}")
+            continue
+        before, after = baseline['results'][name], current['results'][name]
+        for metric, (higher_is_better, gates) in TRACKED_METRICS.items():
+            if metric not in before or metric not in after or not before[metric]:
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                flag = "REGRESSION" if gates else "slower"
+            else:
+                flag = "improved" if worse < -tolerance else ""
+            line = f"  {name:40} {metric:7} {before[metric]:12.2f} -> {after[metric]:12.2f}  {change:+7.1%}  {flag}"
+            lines.append(line)
+            if flag == "REGRESSION":
+                regressions.append(line.strip())
+    return lines, regressions
@@ -0,0 +1,108 @@
+"""
+FullCircle HTTP Load Generator
+Runs app.py under uvicorn on a background thread and drives POST /recommend from client threads
+over keep-alive http.client connections. Client and server share one interpreter (and its GIL),
+so absolute numbers understate a real deployment; use them to compare runs on the same box.
+"""
+import http.client
+import json
+import socket
+import threading
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class InProcessServer:
+    def __init__(self, app, port: int = 0):
+        import uvicorn
+
+        self.port = port or _free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self.server.run, name="bench-uvicorn", daemon=True)
+
+    def __enter__(self) -> "InProcessServer":
+        self._thread.start()
+        deadline = time.monotonic() + 60
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=30)
+        return False
+
+
+def drive(port: int, queries: Sequence[Dict], concurrency: int, seconds: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client(worker: int):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        local_latencies, local_statuses = [], {}
+        i = worker
+        while time.perf_counter() < stop_at:
+            # unique artist name per request, so every call misses the result cache and does the work
+            query = dict(queries[i % len(queries)], artist_name=f"Load Seed {worker}-{i}")
+            body = json.dumps(query)
+            started = time.perf_counter()
+            connection.request("POST", "/recommend", body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            local_latencies.append(time.perf_counter() - started)
+            local_statuses[str(response.status)] = local_statuses.get(str(response.status), 0) + 1
+            i += concurrency
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(worker,)) for worker in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies) else 0.0,
+        'p99_ms': float(np.percentile(latencies_ms, 99)) if len(latencies) else 0.0,
+        'statuses': statuses,
+    }
+
+
+def run(concurrency_levels: Sequence[int] = (1, 8, 32), seconds: float = 5.0) -> Dict[str, Dict[str, float]]:
+    import app
+    import predict
+    from benchmarks.micro import sample_queries
+
+    queries = [dict(q, exclude_artists=[]) for q in sample_queries(predict.current_bundle())]
+    results = {}
+    with InProcessServer(app.app) as server:
+        drive(server.port, queries, concurrency=1, seconds=min(1.0, seconds))  # warm up
+        for concurrency in concurrency_levels:
+            results[f"http.recommend.c{concurrency}"] = stats = drive(server.port, queries, concurrency, seconds)
+            print(
+                f"  POST /recommend x{concurrency:<3}  {stats['rps']:8.1f} req/s   "
+                f"p50 {stats['p50_ms']:7.2f} ms   p99 {stats['p99_ms']:7.2f} ms   {stats['statuses']}"
+            )
+    return results
@@ -0,0 +1,56 @@
+"""
+FullCircle Last.fm Fetching Report
+Throughput, rate-limit compliance and retry behaviour of lastfm_fetch against the local stand-in
+(benchmarks/lastfm_stub.py), so none of it needs the network. The baseline is how the scripts
+used to fetch: one artist at a time, no rate limit, no retries.
+"""
+import time
+from typing import Dict, List
+
+import lastfm_fetch
+from benchmarks.lastfm_stub import StubLastfm, stub_tags
+
+UNKNOWN_EVERY = 50  # one artist in 50 doesn't exist on Last.fm
+RATE_WINDOW_SECONDS = 5.0  # Last.fm averages its limit, a 1s window would mostly measure arrival jitter
+
+
+def _artists(n: int) -> List[str]:
+    return [f"Unknown Artist {i}" if i % UNKNOWN_EVERY == 0 else f"Artist {i}" for i in range(n)]
+
+
+def run(n_artists: int, latency_ms: float, failure_rate: float, workers: List[int],
+        rate: float = lastfm_fetch.LASTFM_RATE) -> Dict[str, Dict]:
+    artists = _artists(n_artists)
+    settings = [('sequential', {'workers': 1, 'rate': 0, 'max_attempts': 1})]
+    settings += [(f"pool.{w}", {'workers': w, 'rate': rate}) for w in workers]
+
+    results = {}
+    with StubLastfm(latency_ms=latency_ms, failure_rate=failure_rate) as stub:
+        client = lastfm_fetch.LastfmClient('stub', base_url=stub.url)
+        for name, options in settings:
+            stub.reset()
+            report = lastfm_fetch.fetch_all(artists, client.top_tags, **options)
+            wrong = sum(1 for artist, tags in report.values.items() if tags != stub_tags(artist, limit=10))
+            stats = {
+                'seconds': report.seconds,
+                'artists_per_second': len(artists) / report.seconds,
+                'requests': report.requests,
+                'retries': report.retries,
+                'fetched': len(report.values),
+                'not_found': len(report.not_found),
+                'failed': len(report.errors),
+                'peak_requests_per_second': stub.peak_rate(RATE_WINDOW_SECONDS) / RATE_WINDOW_SECONDS,
+                'peak_requests_in_1s': stub.peak_rate(1.0),
+                'injected_failures': sum(count for outcome, count in stub.counts.items() if outcome != 'ok'),
+                'wrong_tags': wrong,
+            }
+            results[f"lastfm.{name}"] = stats
+            limit = f"≤{options['rate']:g}/s" if options['rate'] else "no limit"
+            print(f"  {name:11} {stats['seconds']:7.1f} s  {stats['artists_per_second']:5.1f} artists/s  "
+                  f"peak {stats['peak_requests_per_second']:4.1f} req/s over {RATE_WINDOW_SECONDS:g}s ({limit})  "
+                  f"{stats['fetched']:,} ok / {stats['not_found']:,} unknown / {stats['failed']:,} failed  "
+                  f"{stats['retries']:,} retries for {stats['injected_failures']:,} injected failures"
+                  + (f"  ✗ {wrong} wrong" if wrong else ""))
+            # let the stub's last handler threads finish before the next setting's clock starts
+            time.sleep(latency_ms / 1000)
+    return results
@@ -0,0 +1,171 @@
+"""
+FullCircle Last.fm Stand-in
+A local HTTP server that answers artist.getTopTags and artist.getSimilar the way Last.fm's JSON
+API does, with a fixed latency, a share of transient failures (HTTP 500, error 16, or 429 with
+error 29) and its own rate ceiling. Tags are derived from the artist name, so every run sees the
+same catalog; names starting with "Unknown" get Last.fm's error 6. Every request is logged with
+its arrival time, which is what the fetch report checks the rate limit against.
+
+    python -m benchmarks.lastfm_stub --port 8765 --latency-ms 200 --failure-rate 0.05
+    FC_LASTFM_API_URL=http://127.0.0.1:8765/2.0/ python tag_store.py ...
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+TAG_POOL = [
+    'indie', 'pop', 'rock', 'hip-hop', 'rap', 'jazz', 'soul', 'rnb', 'electronic', 'folk',
+    'bedroom pop', 'shoegaze', 'dream pop', 'lo-fi', 'alternative', 'punk', 'icelandic', 'k-pop',
+    'latin', 'reggaeton', 'ambient', 'house', 'trap', 'singer-songwriter', 'classical', 'metal',
+]
+
+
+def _seed(artist: str) -> int:
+    return int.from_bytes(hashlib.md5(artist.strip().lower().encode()).digest()[:8], 'little')
+
+
+def stub_tags(artist: str, limit: int = 100) -> List[Tuple[str, int]]:
+    # Last.fm scales every artist's top tag to 100
+    rng = random.Random(_seed(artist))
+    names = rng.sample(TAG_POOL, rng.randint(3, 12))
+    weights = sorted((rng.randint(1, 99) for _ in names[1:]), reverse=True)
+    return list(zip(names, [100] + weights))[:limit]
+
+
+def stub_similar(artist: str, limit: int = 100) -> List[Tuple[str, float]]:
+    rng = random.Random(_seed(artist) ^ 1)
+    matches = sorted((rng.random() for _ in range(limit)), reverse=True)
+    return [(f"Stub Artist {rng.randrange(100_000)}", round(match, 6)) for match in matches]
+
+
+class StubLastfm:
+    """The server plus its knobs. Start with start() (or as a context manager), point a
+    LastfmClient at url, read request_times afterwards."""
+
+    def __init__(self, latency_ms: float = 200.0, failure_rate: float = 0.0, max_rate: float = 0.0,
+                 port: int = 0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.max_rate = max_rate  # answer 429 / error 29 above this many requests in the last second, 0 = never
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_times: List[float] = []
+        self.counts: Dict[str, int] = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/2.0/"
+
+    def start(self) -> "StubLastfm":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubLastfm":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.request_times = []
+            self.counts = {}
+
+    def peak_rate(self, window: float = 1.0) -> int:
+        """Most requests that arrived within any window seconds (half-open)."""
+        times = sorted(self.request_times)
+        peak, start = 0, 0
+        for end, t in enumerate(times):
+            while t - times[start] >= window:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+    def _outcome(self, now: float) -> str:
+        with self.lock:
+            self.request_times.append(now)
+            recent = sum(1 for t in self.request_times[-64:] if now - t < 1.0)
+            if self.max_rate and recent > self.max_rate:
+                outcome = 'rate_limited'
+            elif self.rng.random() < self.failure_rate:
+                outcome = self.rng.choice(['http_500', 'temporary', 'rate_limited'])
+            else:
+                outcome = 'ok'
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        return outcome
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, status: int, payload: Dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                outcome = stub._outcome(time.monotonic())
+                params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                time.sleep(stub.latency)
+
+                if outcome == 'http_500':
+                    self._send(500, {'error': 8, 'message': 'Operation failed - Most likely the backend service failed.'})
+                    return
+                if outcome == 'temporary':
+                    self._send(200, {'error': 16, 'message': 'There was a temporary error processing your request.'})
+                    return
+                if outcome == 'rate_limited':
+                    self._send(429, {'error': 29, 'message': 'Rate Limit Exceded'})
+                    return
+
+                artist = params.get('artist', '')
+                method = params.get('method', '').lower()
+                if artist.startswith('Unknown') or not artist:
+                    self._send(200, {'error': 6, 'message': 'The artist you supplied could not be found'})
+                elif method == 'artist.gettoptags':
+                    tags = [{'name': name, 'count': count, 'url': ''} for name, count in stub_tags(artist)]
+                    self._send(200, {'toptags': {'tag': tags, '@attr': {'artist': artist}}})
+                elif method == 'artist.getsimilar':
+                    similar = stub_similar(artist, int(params.get('limit', 100)))
+                    artists = [{'name': name, 'match': str(match), 'url': ''} for name, match in similar]
+                    self._send(200, {'similarartists': {'artist': artists, '@attr': {'artist': artist}}})
+                else:
+                    self._send(400, {'error': 3, 'message': 'Invalid Method - No method with that name in this package'})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Last.fm stand-in")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=200.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--max-rate', type=float, default=0.0, help="answer 429 above this many req/s, 0 = never")
+    args = parser.parse_args()
+
+    stub = StubLastfm(args.latency_ms, args.failure_rate, args.max_rate, port=args.port)
+    print(f"✓ Last.fm stand-in on {stub.url} (Ctrl+C to stop)")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
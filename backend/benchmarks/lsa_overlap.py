@@ -0,0 +1,77 @@
+"""
+FullCircle LSA Overlap Report
+Ranking overlap, similarity retained and latency of generate_recommendations with search='lsa' at
+several embedding sizes, against search='exact' on the same queries. Embeddings are fitted in
+memory, nothing is written to the model dir.
+"""
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+import scoring
+from benchmarks.micro import measure, sample_queries
+
+
+def _true_query(predict, bundle, query: Dict) -> np.ndarray:
+    # the unit tag query the request path scores, so lsa picks can be re-scored with exact cosine
+    _, vector = predict.predict_artist_probability(query['artist_name'], query['tags'], bundle)
+    if bundle.idf_weights is not None:
+        vector[:300] = predict._idf_weighted(bundle, vector[:300])
+    return scoring.unit_vector(vector)
+
+
+def _rows(bundle, recommendations: List[Dict]) -> np.ndarray:
+    return np.array([int(scoring.lookup_rows(bundle.name_index, [r['artist']])[0]) for r in recommendations], dtype=np.int64)
+
+
+def run(dimensions: Sequence[int] = (32, 48, 64), k: int = 10, n_queries: int = 200,
+        min_seconds: float = 1.0) -> Dict[str, Dict[str, float]]:
+    import embedding
+    import predict
+
+    bundle = predict.current_bundle()
+    queries = sample_queries(bundle, n=n_queries)
+
+    def recommend(query, search, target):
+        # threshold 0, every query gets a ranked list to compare
+        return predict.generate_recommendations(
+            query['artist_name'], query['tags'], threshold=0.0, top_n=k, bundle=target, search=search
+        )
+
+    exact = [recommend(q, 'exact', bundle) for q in queries]
+    true_queries = [_true_query(predict, bundle, q) for q in queries]
+    results = {'lsa.exact': dict(measure(lambda q: recommend(q, 'exact', bundle), queries, min_seconds=min_seconds),
+                                 overlap=1.0, retained=1.0, bytes=int(bundle.catalog_unit.nbytes))}
+    print(f"  {'exact':10} overlap@{k} 1.000   retained 1.000   p50 {results['lsa.exact']['p50_us']:9.1f} us"
+          f"   {bundle.catalog_unit.nbytes / 1e6:8.1f} MB tag block")
+
+    for d in dimensions:
+        started = time.perf_counter()
+        tag_embedding = embedding.fit_lsa(bundle.catalog_unit, bundle.candidate_pool_rows, bundle.metadata, d)
+        fit_seconds = time.perf_counter() - started
+        target = bundle._replace(embedding=tag_embedding)
+
+        overlaps, retained = [], []
+        for query, truth, exact_result in zip(queries, true_queries, exact):
+            if not exact_result:
+                continue
+            reduced = recommend(query, 'lsa', target)
+            exact_scores = np.array([r['similarity_to_input'] for r in exact_result])
+            # re-scored with exact cosine: tie-aware overlap (a pick counts when it's as similar as
+            # the exact k-th) and how much of the exact top-k similarity the reduced picks keep
+            picked = np.asarray(bundle.catalog_unit[_rows(bundle, reduced)], dtype=np.float32) @ truth if reduced else np.empty(0)
+            overlaps.append(float(np.sum(picked >= exact_scores[-1] - 1e-6)) / len(exact_scores))
+            retained.append(float(picked.sum() / exact_scores.sum()) if exact_scores.sum() > 0 else 1.0)
+
+        stats = measure(lambda q: recommend(q, 'lsa', target), queries, min_seconds=min_seconds)
+        stats.update(
+            overlap=float(np.mean(overlaps)), retained=float(np.mean(retained)), dimensions=d,
+            bytes=int(tag_embedding.vectors.nbytes), fit_seconds=fit_seconds,
+            explained_variance=tag_embedding.manifest['explained_variance'],
+        )
+        results[f"lsa.d{d}"] = stats
+        print(f"  lsa {d:<6} overlap@{k} {stats['overlap']:.3f}   retained {stats['retained']:.3f}   "
+              f"p50 {stats['p50_us']:9.1f} us   {stats['bytes'] / 1e6:8.1f} MB vectors   "
+              f"(variance {stats['explained_variance']:.1%}, fit {fit_seconds:.1f} s)")
+    return results
@@ -0,0 +1,82 @@
+"""
+FullCircle Microbenchmarks
+Per-call latency of the prediction path (tag cleanup, featurization, model, full recommendation)
+against whatever artifacts predict.py loaded.
+"""
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+def sample_queries(bundle, n: int = 200, seed: int = 0) -> List[Dict]:
+    # seeds built from real catalog rows so they overlap the catalog like a user's artist would,
+    # plus some case/whitespace noise for preprocess_tags to clean up
+    rng = np.random.default_rng(seed)
+    tag_names = [str(name) for name in bundle.tag_names]
+    queries = []
+    for i in range(n):
+        row = int(rng.integers(len(bundle.artist_names)))
+        tags = [tag_names[j] for j in np.flatnonzero(np.asarray(bundle.features[row, :len(tag_names)]) > 0)]
+        if not tags:
+            tags = list(rng.choice(tag_names, size=3, replace=False))
+        tags = [tag.upper() if k % 3 == 0 else f" {tag} " for k, tag in enumerate(tags)]
+        queries.append({'artist_name': f"Benchmark Seed {i}", 'tags': tags})
+    return queries
+
+
+def measure(fn: Callable, inputs: Sequence, min_seconds: float = 1.0, warmup: int = 20) -> Dict[str, float]:
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+
+    timings = []
+    deadline = time.perf_counter() + min_seconds
+    i = 0
+    while time.perf_counter() < deadline or len(timings) < 50:
+        value = inputs[i % len(inputs)]
+        started = time.perf_counter_ns()
+        fn(value)
+        timings.append(time.perf_counter_ns() - started)
+        i += 1
+
+    timings_us = np.asarray(timings, dtype=np.float64) / 1000.0
+    return {
+        'n': len(timings),
+        'mean_us': float(timings_us.mean()),
+        'p50_us': float(np.percentile(timings_us, 50)),
+        'p99_us': float(np.percentile(timings_us, 99)),
+    }
+
+
+def run(min_seconds: float = 1.0) -> Dict[str, Dict[str, float]]:
+    import predict
+
+    bundle = predict.current_bundle()
+    queries = sample_queries(bundle)
+    clean = [predict.preprocess_tags(q['tags']) for q in queries]
+    batches = [queries[i:i + 16] for i in range(0, len(queries), 16)]
+
+    cases = [
+        ('preprocess_tags', lambda q: predict.preprocess_tags(q['tags']), queries),
+        ('create_feature_vector', lambda tags: predict.create_feature_vector(tags), clean),
+        ('predict_artist_probability', lambda q: predict.predict_artist_probability(q['artist_name'], q['tags']), queries),
+        # threshold 0 so every query goes all the way through scoring instead of stopping at the low-score reply
+        ('generate_recommendations', lambda q: predict.generate_recommendations(q['artist_name'], q['tags'], threshold=0.0), queries),
+        ('generate_recommendations_batch16', lambda batch: predict.generate_recommendations_batch(batch, threshold=0.0), batches),
+    ]
+    if bundle.neighbours is not None:
+        # seeds named like catalog rows, answered from the neighbour table
+        catalog_seeds = [dict(q, artist_name=bundle.artist_names[i * 7 % len(bundle.artist_names)]) for i, q in enumerate(queries)]
+        cases.append(
+            ('generate_recommendations_catalog_seed', lambda q: predict.generate_recommendations(q['artist_name'], q['tags'], threshold=0.0), catalog_seeds)
+        )
+    if bundle.ann_index is not None:
+        cases.append(
+            ('generate_recommendations_ivf', lambda q: predict.generate_recommendations(q['artist_name'], q['tags'], threshold=0.0, search='ivf'), queries)
+        )
+
+    results = {}
+    for name, fn, inputs in cases:
+        results[f"micro.{name}"] = stats = measure(fn, inputs, min_seconds=min_seconds)
+        print(f"  {name:38} p50 {stats['p50_us']:10.1f} us   p99 {stats['p99_us']:10.1f} us   n={stats['n']}")
+    return results
@@ -0,0 +1,144 @@
+"""
+FullCircle Play Loading Report
+Wall-clock and peak memory of training's data-loading stage (play table -> daily counts and
+behavioral features) with the SQL aggregates against the old pandas path that read every play.
+Each approach runs in a fresh interpreter so peak RSS isn't shared between them.
+
+    python -m benchmarks.play_loading --db listening_history.db --mode sql   # one run, JSON out
+"""
+import argparse
+import json
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+import behavioral
+import play_aggregates
+
+MODES = ('pandas', 'sql')
+
+# the two queries training ran before the aggregation moved into SQLite
+LEGACY_DAILY_QUERY = """
+SELECT artist_names, played_at, COUNT(*) as play_count
+FROM plays
+GROUP BY artist_names, DATE(played_at)
+ORDER BY played_at
+"""
+LEGACY_PLAYS_QUERY = """
+SELECT artist_names, played_at, COUNT(*) as plays
+FROM plays
+GROUP BY artist_names, played_at
+"""
+
+
+def load_pandas(db_path: str):
+    conn = sqlite3.connect(db_path)
+    daily = pd.read_sql_query(LEGACY_DAILY_QUERY, conn)
+    conn.close()
+    daily['played_at'] = pd.to_datetime(daily['played_at'], format='ISO8601')
+
+    conn = sqlite3.connect(db_path)
+    plays = pd.read_sql_query(LEGACY_PLAYS_QUERY, conn)
+    conn.close()
+    plays['played_at'] = pd.to_datetime(plays['played_at'], format='ISO8601')
+    artists = daily['artist_names'].unique()
+    return daily, behavioral.behavioral_features(plays, artists)
+
+
+def load_sql(db_path: str):
+    daily, aggregates = play_aggregates.load(db_path)
+    artists = daily['artist_names'].unique()
+    return daily, behavioral.behavioral_from_aggregates(aggregates, artists)
+
+
+def measure_once(db_path: str, mode: str) -> Dict:
+    # python-side peak from tracemalloc (numpy and pandas buffers included), process peak from
+    # ru_maxrss, which also counts SQLite's page cache and sorter
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    started = time.perf_counter()
+    daily, features = (load_sql if mode == 'sql' else load_pandas)(db_path)
+    seconds = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'seconds': seconds,
+        'traced_peak_mb': traced_peak / 1e6,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        'rss_growth_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1e3,
+        'daily_rows': len(daily),
+        'artists': len(features),
+    }
+
+
+def parity(db_path: str) -> Dict[str, float]:
+    """Largest relative difference per behavioral column between the two paths (NaN-aware), and
+    whether both give every artist the same number of days and plays."""
+    old_daily, old = load_pandas(db_path)
+    new_daily, new = load_sql(db_path)
+    new = new.set_index('artist').loc[old['artist']]
+    totals = [daily.groupby('artist_names')['play_count'].agg(['size', 'sum']) for daily in (old_daily, new_daily)]
+    report = {'daily_counts_equal': float(totals[0].equals(totals[1]))}
+    for column in old.columns[1:]:
+        a, b = old[column].to_numpy(dtype=np.float64), new[column].to_numpy(dtype=np.float64)
+        both_nan = np.isnan(a) & np.isnan(b)
+        if (np.isnan(a) != np.isnan(b)).any():
+            report[column] = float('inf')
+            continue
+        with np.errstate(invalid='ignore', divide='ignore'):
+            relative = np.abs(a - b) / np.maximum(np.abs(a), np.finfo(np.float64).tiny)
+        report[column] = float(relative[~both_nan].max()) if (~both_nan).any() else 0.0
+    return report
+
+
+def run(db_path: str, repeats: int = 3) -> Dict[str, Dict]:
+    with sqlite3.connect(db_path) as conn:
+        n_plays = conn.execute("SELECT COUNT(*) FROM plays").fetchone()[0]
+    results = {}
+    for mode in MODES:
+        if mode == 'sql':
+            # built once on first use, so it's timed on its own rather than inside every run.
+            # the pandas path went first, on the table as training found it
+            started = time.perf_counter()
+            conn = sqlite3.connect(db_path)
+            play_aggregates.ensure_index(conn)
+            conn.close()
+            results['plays.index_build'] = {'seconds': time.perf_counter() - started}
+            print(f"  index   {results['plays.index_build']['seconds'] * 1000:8.0f} ms   (once, {play_aggregates.PLAYS_INDEX})")
+        runs = []
+        for _ in range(repeats):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.play_loading', '--db', db_path, '--mode', mode],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        stats = dict(runs[0])
+        stats['seconds'] = float(np.median([r['seconds'] for r in runs]))
+        results[f"plays.{mode}"] = stats
+        print(f"  {mode:7} {stats['seconds'] * 1000:8.0f} ms   traced peak {stats['traced_peak_mb']:7.1f} MB   "
+              f"peak RSS {stats['peak_rss_mb']:7.1f} MB (+{stats['rss_growth_mb']:.1f})   "
+              f"{stats['daily_rows']:,} artist-days, {stats['artists']:,} artists")
+
+    differences = parity(db_path)
+    daily_equal = differences.pop('daily_counts_equal') == 1.0
+    worst = max(differences, key=differences.get)
+    print(f"  {'✓' if daily_equal else '✗'} per-artist day and play counts {'match' if daily_equal else 'differ'}, "
+          f"behavioral features within {differences[worst]:.1e} relative ({worst}) over {n_plays:,} plays")
+    differences['daily_counts_equal'] = daily_equal
+    results['plays.parity'] = differences
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--mode', choices=MODES, required=True)
+    args = parser.parse_args()
+    print(json.dumps(measure_once(args.db, args.mode)))
@@ -0,0 +1,36 @@
+"""
+FullCircle Hyperparameter Search Report
+Wall-clock of each hyperparameter_search strategy on a synthetic training set shaped like the real
+one (300 TF-IDF tag columns + 7 behavioral), and how its best CV accuracy and parameters compare
+with the exhaustive grid's on the same folds.
+"""
+from typing import Dict, List, Optional
+
+import hyperparameter_search
+from benchmarks import synthetic
+
+
+def run(n_artists: int, strategies: List[str], time_budget: Optional[float] = None, seed: int = 0) -> Dict[str, Dict]:
+    X, y = synthetic.training_set(n_artists, seed=seed)
+    # the grid goes first: everything else is reported against it
+    strategies = ['grid'] + [s for s in strategies if s != 'grid']
+
+    results = {}
+    for strategy in strategies:
+        result = hyperparameter_search.search(X, y, strategy=strategy, time_budget=time_budget, verbose=0)
+        stats = dict(result.summary(), best_score=result.best_score, best_params=result.best_params)
+        results[f"search.{strategy}"] = stats
+        print(f"  {strategy:8} {result.seconds:7.1f} s  best CV accuracy {result.best_score:.4f}  "
+              f"{result.evaluated:3} points, {result.boosting_rounds:,} boosting rounds"
+              f"{'' if result.complete else ' (stopped by the time budget)'}  {result.best_params}")
+
+    grid = results['search.grid']
+    for strategy in strategies[1:]:
+        stats = results[f"search.{strategy}"]
+        stats['speedup'] = grid['seconds'] / stats['seconds']
+        stats['score_delta'] = stats['best_score'] - grid['best_score']
+        stats['same_params'] = stats['best_params'] == grid['best_params']
+        mark = '✓' if stats['score_delta'] >= -0.005 else '✗'
+        print(f"  {mark} {strategy}: {stats['speedup']:.1f}x faster than grid, best score "
+              f"{stats['score_delta']:+.4f} vs grid, {'same' if stats['same_params'] else 'different'} parameters")
+    return results
@@ -0,0 +1,172 @@
+"""
+FullCircle Synthetic Artifacts
+Deterministic stand-in for a training run: tag documents, a fitted TfidfVectorizer, an XGBoost
+model and the artist table, written as a normal model_artifacts/ bundle. Also a synthetic
+listening_history.db for the data-loading benchmark. No Last.fm or Spotify.
+"""
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+import artifacts
+
+BEHAVIORAL_FEATURES = artifacts.BEHAVIORAL_FEATURES
+GENRE_TAGS = [
+    'jazz', 'indie', 'pop', 'rock', 'hip-hop', 'rap', 'soul', 'rnb', 'latin', 'reggaeton',
+    'icelandic', 'bedroom', 'folk', 'electronic', 'house', 'techno', 'ambient', 'chillhop',
+    'lo-fi', 'trap', 'korean', 'british', 'country', 'metal', 'punk', 'emo', 'funk', 'disco',
+    'classical', 'piano', 'female', 'vocalists', 'male', 'singer-songwriter', 'alternative',
+    'shoegaze', 'dream', 'psychedelic', 'blues', 'gospel',
+]
+N_FILLER_TAGS = 600
+TRANSFORM_CHUNK = 50_000  # rows per tfidf.transform call, keeps the float64 scratch small at 1M
+
+
+def parse_size(text: str) -> int:
+    """'1k', '100k', '1m' or a plain integer."""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def _filler_tag(i: int) -> str:
+    # letters only, training's token_pattern is [a-z-]{2,}
+    word = ''
+    i += 26
+    while i:
+        i, digit = divmod(i, 26)
+        word = chr(97 + digit) + word
+    return 'tag' + word
+
+
+def tag_documents(n_artists: int, rng: np.random.Generator) -> List[str]:
+    # popular genre tags plus a slowly decaying tail, 0-11 tags per artist like Last.fm top tags.
+    # flat enough that even 1k artists give min_df=5 on 300+ terms
+    vocabulary = GENRE_TAGS + [_filler_tag(i) for i in range(N_FILLER_TAGS)]
+    weights = np.r_[np.full(len(GENRE_TAGS), 5.0), 10.0 / np.arange(1, N_FILLER_TAGS + 1) ** 0.3]
+    weights /= weights.sum()
+    counts = rng.integers(0, 12, size=n_artists)
+    picks = rng.choice(len(vocabulary), size=int(counts.sum()), p=weights)
+    documents, start = [], 0
+    for count in counts:
+        # duplicates happen on real profiles too, keep them
+        documents.append(" | ".join(vocabulary[j] for j in picks[start:start + count]))
+        start += count
+    return documents
+
+
+def _labelled_features(n_artists: int, rng: np.random.Generator):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    documents = tag_documents(n_artists, rng)
+
+    # same settings as train_recommendation_model.py
+    tfidf = TfidfVectorizer(max_features=300, min_df=5, stop_words='english', token_pattern=r'[a-z-]{2,}')
+    tfidf.fit(documents)
+    n_tags = len(tfidf.vocabulary_)
+    if n_tags != 300:
+        raise ValueError(f"synthetic vocabulary came out at {n_tags} tags, need 300 (try more artists)")
+
+    features = np.zeros((n_artists, n_tags + len(BEHAVIORAL_FEATURES)), dtype=np.float32)
+    for start in range(0, n_artists, TRANSFORM_CHUNK):
+        features[start:start + TRANSFORM_CHUNK, :n_tags] = tfidf.transform(documents[start:start + TRANSFORM_CHUNK]).toarray()
+    features[:, n_tags:] = rng.random((n_artists, len(BEHAVIORAL_FEATURES)), dtype=np.float32)
+
+    # labels follow a hidden linear score so the model has something real to learn
+    weights = rng.normal(size=features.shape[1]).astype(np.float32)
+    score = features @ weights + rng.normal(scale=0.5, size=n_artists).astype(np.float32)
+    labels = (score > np.quantile(score, 0.7)).astype(np.int32)
+    return tfidf, features, labels
+
+
+def training_set(n_artists: int, seed: int = 0):
+    """(X, y) shaped like training's feature matrix: 300 TF-IDF tag columns + the 7 behavioral ones."""
+    _, features, labels = _labelled_features(n_artists, np.random.default_rng(seed))
+    return features, labels
+
+
+def generate(n_artists: int, out_dir: str, seed: int = 0, n_train: int = 20_000) -> str:
+    import xgboost as xgb
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    tfidf, features, labels = _labelled_features(n_artists, rng)
+    n_tags = len(tfidf.vocabulary_)
+
+    train_rows = rng.choice(n_artists, size=min(n_train, n_artists), replace=False)
+    model = xgb.XGBClassifier(
+        n_estimators=100, max_depth=5, learning_rate=0.1,
+        objective='binary:logistic', eval_metric='logloss', random_state=42, n_jobs=1,
+    )
+    model.fit(features[train_rows], labels[train_rows])
+
+    liked = features[labels == 1, n_tags:]
+    behavioral_means = dict(zip(BEHAVIORAL_FEATURES, liked.mean(axis=0).astype(float).tolist()))
+    feature_names = [str(name) for name in tfidf.get_feature_names_out()] + BEHAVIORAL_FEATURES
+    artist_names = ["Laufey"] + [f"Artist {i}" for i in range(1, n_artists)]
+    metadata = {
+        'trained_at': datetime(2025, 1, 1).isoformat(),  # fixed, the same seed gives the same artifacts
+        'synthetic': True,
+        'seed': seed,
+        'n_artists': n_artists,
+        'n_features': int(features.shape[1]),
+        'behavioral_means': behavioral_means,
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    artifacts.write_bundle(
+        artifacts.bundle_path(out_dir),
+        model=model,
+        tfidf=tfidf,
+        feature_names=feature_names,
+        behavioral_means=behavioral_means,
+        artist_names=artist_names,
+        labels=labels,
+        features=features,
+        metadata=metadata,
+    )
+    # last, same as training, so a running API with the reloader on sees a finished directory
+    with open(os.path.join(out_dir, 'model_metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"✓ Generated {n_artists:,} synthetic artists in {out_dir}/ ({time.perf_counter() - started:.1f} s)")
+    return out_dir
+
+
+def generate_plays(n_plays: int, out_path: str, n_artists: Optional[int] = None, seed: int = 0, years: int = 3) -> str:
+    """A listening_history.db with the real plays schema: Zipf-popular artists over a few years,
+    timestamps in both Spotify formats (recently-played API with ms, extended history without)."""
+    rng = np.random.default_rng(seed)
+    n_artists = n_artists or max(100, n_plays // 50)
+    artists = rng.zipf(1.3, size=n_plays) % n_artists
+    # unique seconds, played_at is the primary key
+    offsets = np.sort(rng.choice(years * 365 * 86_400, size=n_plays, replace=False))
+    millis = rng.integers(0, 1000, size=n_plays)
+
+    stamps = np.datetime_as_string(np.datetime64('2022-01-01T00:00:00', 's') + offsets, unit='s')
+    rows = [
+        (f"{stamp}.{ms:03d}Z" if i % 2 else f"{stamp}Z", f"track{i}", f"Track {i}", f"Artist {artist}")
+        for i, (stamp, ms, artist) in enumerate(zip(stamps, millis, artists))
+    ]
+
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    conn = sqlite3.connect(out_path)
+    conn.execute("""
+        CREATE TABLE plays (
+            played_at TEXT PRIMARY KEY,
+            track_id TEXT NOT NULL,
+            track_name TEXT NOT NULL,
+            artist_names TEXT NOT NULL
+        )
+    """)
+    conn.executemany("INSERT INTO plays VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    print(f"✓ Generated {n_plays:,} synthetic plays of {len(np.unique(artists)):,} artists in {out_path}")
+    return out_path
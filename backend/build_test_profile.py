@@ -1,11 +1,13 @@
 from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 import spotipy
-import pylast
 import json
 import os
 import math
 import datetime
+
+from lastfm_fetch import LastfmClient
+from tag_store import TagStore
 load_dotenv()
 
 client_id = os.getenv("SPOTIFY_CLIENT_ID")
@@ -13,7 +15,6 @@ client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
 
 
 lastfm_api_key = os.getenv("LASTFM_API_KEY")
-lastfm_api_secret = os.getenv("LASTFM_API_SECRET")
 # copy and paste from get_listening_history since it's just creating the spotify client
 sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
     client_id=client_id,
@@ -23,10 +24,7 @@ sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
     open_browser=False
 ))
 # connecting now to last.fm since i'll be getting information from here as well 
-network = pylast.LastFMNetwork(
-    api_key=lastfm_api_key,
-    api_secret=lastfm_api_secret
-)
+lastfm = LastfmClient(lastfm_api_key)
 
 unique_artists = set()
 
@@ -44,30 +42,27 @@ print(f"Artists: {unique_artists}")
 # dictionary to store tag data
 tag_data = {}  # should be: {"hip hop": {"sum": 340, "count": 5}, ...}
 
+# top 10 tags per artist through the shared tag cache (tag_store.py), Last.fm only for the ones it doesn't have yet
+with TagStore() as tag_store:
+    tag_lookup = tag_store.top_tags(unique_artists, lastfm)
+
 # looooping through each unique artist
 for artist_name in unique_artists:
-    try:
-        # .get artist from Last.fm
-        artist = network.get_artist(artist_name)
-        tags = artist.get_top_tags(limit=10)  # Get top 10 tags per artist
-        
-       # process each tag
-        for tag in tags:
-            tag_name = tag.item.name
-            tag_weight = int(tag.weight)
-            # this should fix the issue where apparently tag.weight is a string like "100" instead of just a number, these api's return things so interestingly
-            # if we've seen this tag before, update it
-            if tag_name in tag_data:
-                tag_data[tag_name]["sum"] += tag_weight
-                tag_data[tag_name]["count"] += 1
-            else:
-                # if not, add
-                tag_data[tag_name] = {"sum": tag_weight, "count": 1}
-        
-        print(f"✓ Got tags for {artist_name}")
-    # test case LOLLLL but it ended up working so ggood
-    except Exception as e:
-        print(f"✗ Couldn't get tags for {artist_name}: {e}")
+    if artist_name not in tag_lookup.tags:
+        print(f"✗ Couldn't get tags for {artist_name}: {tag_lookup.errors[artist_name]}")
+        continue
+
+    # process each tag (the weights are ints already, Last.fm sends them as strings like "100")
+    for tag_name, tag_weight in tag_lookup.tags[artist_name]:
+        # if we've seen this tag before, update it
+        if tag_name in tag_data:
+            tag_data[tag_name]["sum"] += tag_weight
+            tag_data[tag_name]["count"] += 1
+        else:
+            # if not, add
+            tag_data[tag_name] = {"sum": tag_weight, "count": 1}
+
+    print(f"✓ Got tags for {artist_name}")
 
 # calculate the average and show me 
 print("\n" + "="*50)
@@ -0,0 +1,154 @@
+"""
+FullCircle Tag Embedding
+Optional reduced similarity space: a truncated SVD (LSA) of the candidate pool's unit TF-IDF tag
+vectors down to 32-64 dimensions. Queries are projected with the same components and scored with
+one small dense product. Fitted by training when FC_LSA_DIMENSIONS is set, or afterwards with the
+CLI, and stored next to the model artifacts in model_artifacts/embedding/.
+
+    python embedding.py fit --dimensions 48   # fit on the catalog in model_artifacts/
+    python embedding.py info                  # what's on disk and whether it still matches
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+import artifacts
+
+EMBEDDING_DIRNAME = 'embedding'
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_ARRAYS = ['components', 'rows', 'vectors']
+DEFAULT_DIMENSIONS = 48
+FIT_SAMPLE = 200_000  # rows the SVD is fitted on, every pool row still gets projected
+PROJECT_CHUNK = 65_536
+
+
+class TagEmbedding(NamedTuple):
+    components: np.ndarray  # (dimensions, 300) float32, the SVD basis
+    rows: np.ndarray  # candidate pool row ids, ascending
+    vectors: np.ndarray  # (len(rows), dimensions) float32, unit length
+    manifest: Dict
+
+    @property
+    def dimensions(self) -> int:
+        return self.components.shape[0]
+
+
+def embedding_path(model_dir: str) -> str:
+    return os.path.join(model_dir, EMBEDDING_DIRNAME)
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def fit_lsa(
+    catalog_unit: np.ndarray,
+    candidate_pool_rows: np.ndarray,
+    metadata: Dict,
+    dimensions: int = DEFAULT_DIMENSIONS,
+    seed: int = 0,
+) -> TagEmbedding:
+    from sklearn.decomposition import TruncatedSVD
+
+    # only the pool gets embedded, nothing else is ever ranked
+    pool_rows = np.asarray(candidate_pool_rows, dtype=np.int32)
+    if len(pool_rows) <= dimensions:
+        raise ValueError(f"candidate pool has {len(pool_rows)} artists, too few for {dimensions} dimensions")
+
+    rng = np.random.default_rng(seed)
+    fit_rows = pool_rows
+    if len(pool_rows) > FIT_SAMPLE:
+        fit_rows = np.sort(rng.choice(pool_rows, size=FIT_SAMPLE, replace=False))
+    # no centering (that's what makes it LSA rather than PCA), so cosine in the reduced space
+    # approximates cosine over the tags
+    svd = TruncatedSVD(n_components=dimensions, algorithm='randomized', n_iter=7, random_state=seed)
+    svd.fit(np.asarray(catalog_unit[fit_rows], dtype=np.float32))
+    components = svd.components_.astype(np.float32)
+
+    vectors = np.empty((len(pool_rows), dimensions), dtype=np.float32)
+    for start in range(0, len(pool_rows), PROJECT_CHUNK):
+        block = np.asarray(catalog_unit[pool_rows[start:start + PROJECT_CHUNK]], dtype=np.float32)
+        vectors[start:start + PROJECT_CHUNK] = block @ components.T
+    _unit_rows(vectors)
+
+    return TagEmbedding(
+        components=components,
+        rows=pool_rows,
+        vectors=vectors,
+        manifest={
+            'format_version': EMBEDDING_FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'catalog_digest': artifacts.catalog_digest(pool_rows, metadata),
+            'method': 'truncated_svd',
+            'dimensions': int(dimensions),
+            'n_embedded': int(len(pool_rows)),
+            'fit_rows': int(len(fit_rows)),
+            'explained_variance': float(svd.explained_variance_ratio_.sum()),
+            'seed': int(seed),
+        },
+    )
+
+
+def project(embedding: TagEmbedding, query: np.ndarray) -> np.ndarray:
+    # a unit TF-IDF query into the reduced space, re-normalized so scores stay cosines
+    reduced = embedding.components @ np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(reduced)
+    return reduced / norm if norm > 0 else reduced
+
+
+def search(embedding: TagEmbedding, query: np.ndarray) -> np.ndarray:
+    """Similarity of the unit query to every embedded row, aligned with embedding.rows."""
+    return embedding.vectors @ project(embedding, query)
+
+
+def write_embedding(embedding: TagEmbedding, model_dir: str) -> str:
+    return artifacts.write_sidecar(
+        embedding_path(model_dir), {name: getattr(embedding, name) for name in EMBEDDING_ARRAYS}, embedding.manifest
+    )
+
+
+def load_embedding(model_dir: str, candidate_pool_rows: np.ndarray, metadata: Dict) -> Optional[TagEmbedding]:
+    """The embedding in model_dir/embedding/, or None when there isn't one or it belongs to another catalog."""
+    loaded = artifacts.load_sidecar(
+        embedding_path(model_dir), EMBEDDING_ARRAYS, EMBEDDING_FORMAT_VERSION, candidate_pool_rows, metadata,
+        rebuild="python embedding.py fit",
+    )
+    if loaded is None:
+        return None
+    arrays, manifest = loaded
+    return TagEmbedding(manifest=manifest, **arrays)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FullCircle tag embedding tools")
+    parser.add_argument('command', choices=['fit', 'info'])
+    parser.add_argument('--model-dir', default=artifacts.MODEL_DIR)
+    parser.add_argument('--dimensions', type=int, default=DEFAULT_DIMENSIONS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    loaded = artifacts.load_artifacts(args.model_dir)
+    if args.command == 'fit':
+        started = time.perf_counter()
+        embedding = fit_lsa(loaded.catalog_unit, loaded.candidate_pool_rows, loaded.metadata, args.dimensions, args.seed)
+        path = write_embedding(embedding, args.model_dir)
+        print(f"✓ Embedded {len(embedding.rows):,} of {len(loaded.artist_names):,} artists in {embedding.dimensions} "
+              f"dimensions in {time.perf_counter() - started:.1f} s "
+              f"(explained variance {embedding.manifest['explained_variance']:.1%})")
+        print(f"  {embedding.vectors.nbytes / 1e6:.1f} MB of vectors vs {loaded.catalog_unit.nbytes / 1e6:.1f} MB for the full tag block")
+        print(f"✓ Wrote {path}")
+    else:
+        manifest = artifacts.read_sidecar_manifest(embedding_path(args.model_dir))
+        if manifest is None:
+            print(f"No embedding in {embedding_path(args.model_dir)}")
+        else:
+            print(json.dumps(manifest, indent=2))
+            current = manifest.get('catalog_digest') == artifacts.catalog_digest(loaded.candidate_pool_rows, loaded.metadata)
+            print(f"{'✓ Matches' if current else '✗ Does not match'} the catalog in {args.model_dir}")
@@ -0,0 +1,144 @@
+"""
+FullCircle Tag Featurizer
+Request-path stand-in for TfidfVectorizer.transform(...).toarray(), built from the fitted
+vectorizer's vocabulary_ and idf_. Same tokens, same weights, same normalization, no sparse
+matrix round trip for the ~5 tags a request carries.
+
+    python featurizer.py   # parity check against sklearn on the artifacts in model_artifacts/
+"""
+import math
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class TagFeaturizer:
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        idf: np.ndarray,
+        token_pattern: str,
+        lowercase: bool = True,
+        norm: str = 'l2',
+        use_idf: bool = True,
+        sublinear_tf: bool = False,
+        binary: bool = False,
+    ):
+        self.vocabulary = dict(vocabulary)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self._idf_list = self.idf.tolist()
+        self.n_features = len(self.idf)
+        self.lowercase = lowercase
+        self.norm = norm
+        self.use_idf = use_idf
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self._token_re = re.compile(token_pattern)
+        if self._token_re.groups > 1:
+            raise ValueError("token_pattern can have at most one capturing group (same rule as sklearn)")
+
+    @classmethod
+    def from_params(cls, vocabulary: Dict[str, int], idf: Sequence[float], params: Dict) -> "TagFeaturizer":
+        # only the plain word-unigram setup training uses; anything fancier should stay on sklearn
+        if params.get('analyzer', 'word') != 'word' or tuple(params.get('ngram_range', (1, 1))) != (1, 1):
+            raise ValueError("TagFeaturizer only supports analyzer='word' with ngram_range=(1, 1)")
+        if params.get('strip_accents') is not None:
+            raise ValueError("TagFeaturizer does not support strip_accents")
+        return cls(
+            vocabulary=vocabulary,
+            idf=idf,
+            token_pattern=params['token_pattern'],
+            lowercase=params.get('lowercase', True),
+            norm=params.get('norm', 'l2'),
+            use_idf=params.get('use_idf', True),
+            sublinear_tf=params.get('sublinear_tf', False),
+            binary=params.get('binary', False),
+        )
+
+    @classmethod
+    def from_vectorizer(cls, tfidf) -> "TagFeaturizer":
+        return cls.from_params(tfidf.vocabulary_, tfidf.idf_, tfidf.get_params())
+
+    def transform_text(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(column, weight) pairs for one document, columns ascending."""
+        if self.lowercase:
+            text = text.lower()
+        # stop words never made it into vocabulary_, so dropping unknown tokens drops them too.
+        # plain python on purpose: for ~5 tags this beats any numpy setup cost
+        counts: Dict[int, int] = {}
+        for token in self._token_re.findall(text):
+            column = self.vocabulary.get(token)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        if not counts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        columns = sorted(counts)
+        weights = []
+        for column in columns:
+            tf = counts[column]
+            if self.binary:
+                tf = 1.0
+            elif self.sublinear_tf:
+                tf = math.log(tf) + 1.0
+            weights.append(tf * self._idf_list[column] if self.use_idf else float(tf))
+
+        if self.norm == 'l2':
+            scale = math.sqrt(math.fsum(w * w for w in weights))
+        elif self.norm == 'l1':
+            scale = math.fsum(abs(w) for w in weights)
+        else:
+            scale = 1.0
+        return (
+            np.array(columns, dtype=np.int32),
+            np.array([w / scale for w in weights], dtype=np.float32),
+        )
+
+    def transform_sparse(self, clean_tags: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        # joined exactly like create_feature_vector always did, so multi-word tags tokenize the same
+        return self.transform_text(" | ".join(clean_tags) if clean_tags else "")
+
+    def transform(self, clean_tags: List[str]) -> np.ndarray:
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        columns, weights = self.transform_sparse(clean_tags)
+        vector[columns] = weights
+        return vector
+
+    def transform_many(self, tag_lists: List[List[str]]) -> np.ndarray:
+        matrix = np.zeros((len(tag_lists), self.n_features), dtype=np.float32)
+        for i, clean_tags in enumerate(tag_lists):
+            columns, weights = self.transform_sparse(clean_tags)
+            matrix[i, columns] = weights
+        return matrix
+
+
+def parity_max_error(tfidf, featurizer: TagFeaturizer, documents: List[str]) -> float:
+    """Largest absolute difference from sklearn's transform over a corpus of raw documents."""
+    expected = tfidf.transform(documents).toarray()
+    actual = np.zeros_like(expected)
+    for i, document in enumerate(documents):
+        columns, weights = featurizer.transform_text(document)
+        actual[i, columns] = weights
+    return float(np.abs(expected - actual).max()) if len(documents) else 0.0
+
+
+if __name__ == "__main__":
+    import artifacts
+
+    loaded = artifacts.load_artifacts()
+    featurizer = TagFeaturizer.from_vectorizer(loaded.tfidf)
+
+    # no raw training corpus ships with the artifacts, so rebuild tag documents from the vocabulary,
+    # with some out-of-vocabulary noise and both separators training has used
+    rng = np.random.default_rng(42)
+    terms = sorted(featurizer.vocabulary) + ['the', 'and', 'unknown tag', 'Hip Hop', 's']
+    documents = []
+    for i in range(5000):
+        picked = list(rng.choice(terms, size=rng.integers(0, 11)))
+        documents.append((" | " if i % 2 else " ").join(picked))
+
+    error = parity_max_error(loaded.tfidf, featurizer, documents)
+    print(f"Max |featurizer - sklearn| over {len(documents)} documents: {error:.3g}")
+    assert error < 1e-6, "featurizer drifted from TfidfVectorizer"
+    print("✓ Featurizer matches TfidfVectorizer")
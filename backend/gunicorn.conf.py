@@ -0,0 +1,38 @@
+"""
+FullCircle Gunicorn Config
+Multi-worker serving: the app (and every model artifact predict.py loads at import) is
+imported once in the master, then workers fork from it and share those pages copy-on-write.
+
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import os
+
+# one BLAS/OpenMP thread per worker, otherwise N workers each spin up N threads and fight.
+# has to be set before preload imports numpy/xgboost in the master
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, os.getenv("FC_THREADS_PER_WORKER", "1"))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# one worker unless asked for more: in a container os.cpu_count() is the host's cores, not the
+# container's limit, and every worker adds ~100-150 MB of private memory on top of the shared
+# artifacts, so a core-count default can OOM a 512 MB instance (Render free) on first boot
+workers = int(os.getenv("FC_WORKERS", "1"))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# load artifacts once before forking instead of once per worker (FC_PRELOAD=0 to compare)
+preload_app = os.getenv("FC_PRELOAD", "1") != "0"
+
+# on SIGTERM workers stop accepting, finish what's in flight, then shut the batcher down
+graceful_timeout = int(os.getenv("FC_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("FC_WORKER_TIMEOUT", "60"))
+keepalive = 5
+
+
+def when_ready(server):
+    server.log.info(f"FullCircle artifacts preloaded, forking {workers} workers")
+
+
+def post_fork(server, worker):
+    # anything with a thread or an event loop (micro-batcher, reloaders) starts in the
+    # app lifespan, which runs here in the worker, never in the master
+    server.log.info(f"Worker {worker.pid} forked")
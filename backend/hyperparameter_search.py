@@ -0,0 +1,275 @@
+"""
+FullCircle Hyperparameter Search
+The XGBoost search training runs before its final fit, over PARAM_GRID with the same 5 stratified
+folds whichever strategy does it:
+
+  grid     GridSearchCV, every combination x every fold, each fit from scratch (54 x 5 = 270 fits)
+  halving  successive halving with boosting rounds as the resource: every (max_depth,
+           learning_rate, gamma) combination is grown to the grid's smallest n_estimators, the best
+           third carries on to the next one, and so on. With no time budget every score is a grid point
+  xgbcv    xgb.cv style: every combination grown up to the largest n_estimators, stopped early once
+           the folds' mean logloss stops improving; n_estimators is the round with the lowest
+           logloss, so it can fall between (or below) the grid's values
+
+halving and xgbcv build one DMatrix pair per fold up front and keep each fold's booster between
+rounds, so 300 trees cost 300 rounds, not 100 + 200 + 300 from scratch. Scores are mean accuracy
+over the folds in every case, the same number GridSearchCV's best_score_ was.
+
+A time budget (halving and xgbcv only) is checked before every boosting round. When it runs out
+the search returns the best point scored so far with complete=False:
+  halving  rungs already finished count at their grid n_estimators. boosters in the cut-short rung
+           that got past the previous rung are scored at the round they reached, so the winner can
+           have an n_estimators that isn't in PARAM_GRID (below 100 if the first rung was cut)
+  xgbcv    combinations not reached are skipped; the one cut short is scored at its best round so far
+If not a single round fits in the budget, nothing has been scored: the search prints a ✗, returns
+DEFAULT_PARAMS with best_score NaN and evaluated 0, and training fits with those.
+
+    python hyperparameter_search.py check   # fold-cache parity and tiny time budgets, small random data
+"""
+import argparse
+import itertools
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+
+PARAM_GRID = {
+    'n_estimators': [100, 200, 300],
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.1, 0.05, 0.01],
+    'gamma': [0.1, 0.5],
+}
+STRATEGIES = ('grid', 'halving', 'xgbcv')
+CV_FOLDS = 5
+RANDOM_STATE = 42
+HALVING_KEEP = 1 / 3  # share of combinations that survive each rung
+EARLY_STOPPING_ROUNDS = 30
+# what training falls back to when a time budget runs out before a single round is grown
+# (the settings the synthetic benchmark model uses, middle of the grid)
+DEFAULT_PARAMS = {'gamma': 0.1, 'learning_rate': 0.1, 'max_depth': 5, 'n_estimators': 100}
+
+# XGBClassifier settings every strategy shares, training's final model included
+BASE_PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'tree_method': 'hist',  # xgboost's default since 2.0, spelled out because the fold cache builds hist matrices
+    'random_state': RANDOM_STATE,
+    'n_jobs': -1,
+}
+
+
+class SearchResult(NamedTuple):
+    strategy: str
+    best_params: Dict
+    best_score: float  # mean CV accuracy, NaN when the budget ran out before anything was scored
+    seconds: float
+    evaluated: int  # (combination, n_estimators) points scored
+    boosting_rounds: int  # rounds grown, summed over folds
+    complete: bool  # False when the time budget stopped it early
+
+    def summary(self) -> Dict:
+        return {
+            'strategy': self.strategy,
+            'seconds': round(self.seconds, 2),
+            'evaluated': self.evaluated,
+            'boosting_rounds': self.boosting_rounds,
+            'complete': self.complete,
+        }
+
+
+def classifier(**params) -> xgb.XGBClassifier:
+    return xgb.XGBClassifier(**BASE_PARAMS, **params)
+
+
+def _kfold() -> StratifiedKFold:
+    return StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=RANDOM_STATE)
+
+
+def _combinations() -> List[Dict]:
+    # everything but n_estimators, in ParameterGrid's (sorted key) order so ties break like grid
+    keys = sorted(key for key in PARAM_GRID if key != 'n_estimators')
+    return [dict(zip(keys, values)) for values in itertools.product(*(PARAM_GRID[key] for key in keys))]
+
+
+class _FoldBoosters:
+    """One combination's boosters, one per fold, grown a round at a time. Keeps the fold-mean
+    accuracy and logloss after every round."""
+
+    def __init__(self, folds, params: Dict):
+        self.params = params
+        self.folds = folds
+        booster_params = classifier(**params).get_xgb_params()
+        booster_params['eval_metric'] = ['error', 'logloss']
+        # both matrices in the cache, so evaluating a round reuses the running predictions
+        self.boosters = [xgb.Booster(booster_params, [dtrain, dvalid]) for dtrain, dvalid in folds]
+        self.accuracy: List[float] = []
+        self.logloss: List[float] = []
+
+    @property
+    def rounds(self) -> int:
+        return len(self.accuracy)
+
+    def grow(self, rounds: int, deadline: float) -> bool:
+        """Grow to rounds, False if the deadline came first."""
+        while self.rounds < rounds:
+            if time.perf_counter() > deadline:
+                return False
+            errors, losses = [], []
+            for booster, (dtrain, dvalid) in zip(self.boosters, self.folds):
+                booster.update(dtrain, self.rounds)
+                # "[12]\tvalid-error:0.21\tvalid-logloss:0.48"
+                metrics = dict(item.split(':') for item in booster.eval_set([(dvalid, 'valid')], self.rounds).split('\t')[1:])
+                errors.append(float(metrics['valid-error']))
+                losses.append(float(metrics['valid-logloss']))
+            self.accuracy.append(float(np.mean([1 - error for error in errors])))
+            self.logloss.append(float(np.mean(losses)))
+        return True
+
+    def score(self, n_estimators: int) -> float:
+        return self.accuracy[n_estimators - 1]
+
+
+def _folds(X: np.ndarray, y: np.ndarray):
+    # QuantileDMatrix like XGBClassifier.fit builds for hist, validation binned with the training cuts
+    folds = []
+    for train_rows, valid_rows in _kfold().split(X, y):
+        dtrain = xgb.QuantileDMatrix(X[train_rows], y[train_rows])
+        folds.append((dtrain, xgb.QuantileDMatrix(X[valid_rows], y[valid_rows], ref=dtrain)))
+    return folds
+
+
+def _grid(X: np.ndarray, y: np.ndarray, verbose: int) -> SearchResult:
+    started = time.perf_counter()
+    # refit=False: training fits the final model itself, on its own train split
+    grid_search = GridSearchCV(
+        estimator=classifier(),
+        param_grid=PARAM_GRID,
+        scoring='accuracy',
+        n_jobs=-1,
+        cv=_kfold(),
+        verbose=verbose,
+        refit=False,
+    )
+    grid_search.fit(X, y)
+    n_points = len(grid_search.cv_results_['params'])
+    rounds = sum(params['n_estimators'] for params in grid_search.cv_results_['params']) * CV_FOLDS
+    return SearchResult('grid', grid_search.best_params_, float(grid_search.best_score_),
+                        time.perf_counter() - started, n_points, rounds, True)
+
+
+def _halving(X: np.ndarray, y: np.ndarray, deadline: float, started: float) -> SearchResult:
+    folds = _folds(X, y)
+    alive = [_FoldBoosters(folds, params) for params in _combinations()]
+    grown = list(alive)
+    scores = []  # (score, n_estimators, boosters) for every grid point reached
+    complete = True
+    previous = 0
+    for n_estimators in sorted(PARAM_GRID['n_estimators']):
+        reached = []
+        for boosters in alive:
+            if not boosters.grow(n_estimators, deadline):
+                complete = False
+                break
+            reached.append(boosters)
+            scores.append((boosters.score(n_estimators), n_estimators, boosters))
+        if not complete:
+            # out of time mid-rung: whatever grew past the last rung still counts, at the rounds it got
+            # to, so a budget shorter than the first rung still picks something
+            scores += [(b.accuracy[-1], b.rounds, b) for b in alive if b not in reached and b.rounds > previous]
+            break
+        previous = n_estimators
+        # best third on to the next rung, ties kept in grid order
+        keep = max(1, math.ceil(len(reached) * HALVING_KEEP))
+        alive = sorted(reached, key=lambda b: -b.score(n_estimators))[:keep]
+    return _best('halving', scores, grown, started, complete)
+
+
+def _xgbcv(X: np.ndarray, y: np.ndarray, deadline: float, started: float) -> SearchResult:
+    folds = _folds(X, y)
+    max_rounds = max(PARAM_GRID['n_estimators'])
+    grown, scores = [], []
+    complete = True
+    for params in _combinations():
+        boosters = _FoldBoosters(folds, params)
+        grown.append(boosters)
+        best_round = 0
+        # best_round is an index: stop after EARLY_STOPPING_ROUNDS rounds without a new lowest logloss
+        while boosters.rounds < max_rounds and boosters.rounds - 1 - best_round < EARLY_STOPPING_ROUNDS:
+            if not boosters.grow(boosters.rounds + 1, deadline):
+                complete = False
+                break
+            if boosters.logloss[-1] < boosters.logloss[best_round]:
+                best_round = boosters.rounds - 1
+        if boosters.rounds:
+            scores.append((boosters.accuracy[best_round], best_round + 1, boosters))
+        if not complete:
+            break
+    return _best('xgbcv', scores, grown, started, complete)
+
+
+def _best(strategy: str, scores, grown: List[_FoldBoosters], started: float, complete: bool) -> SearchResult:
+    if not scores:
+        # not a single round inside the budget. training is already past the data and Last.fm work by
+        # now, so carry on with fixed settings rather than throw that away
+        print(f"✗ {strategy} search ran out of time before growing anything, falling back to {DEFAULT_PARAMS}")
+        return SearchResult(strategy, dict(DEFAULT_PARAMS), math.nan, time.perf_counter() - started,
+                            0, 0, False)
+    # highest score; ties go to the earliest combination in grid order, then the fewest trees
+    order = {id(boosters): i for i, boosters in enumerate(grown)}
+    score, n_estimators, boosters = max(scores, key=lambda s: (s[0], -order[id(s[2])], -s[1]))
+    best_params = dict(boosters.params, n_estimators=int(n_estimators))
+    rounds = sum(b.rounds for b in grown) * CV_FOLDS
+    return SearchResult(strategy, dict(sorted(best_params.items())), score,
+                        time.perf_counter() - started, len(scores), rounds, complete)
+
+
+def search(X: np.ndarray, y: np.ndarray, strategy: str = 'grid', time_budget: Optional[float] = None,
+           verbose: int = 1) -> SearchResult:
+    """Best PARAM_GRID settings by mean 5-fold CV accuracy. time_budget (seconds) stops halving and
+    xgbcv early with the best point scored so far; the exhaustive grid always runs to the end."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown search strategy {strategy!r}, expected one of {STRATEGIES}")
+    if strategy == 'grid':
+        return _grid(X, y, verbose)
+    started = time.perf_counter()
+    deadline = started + time_budget if time_budget else math.inf
+    if strategy == 'halving':
+        return _halving(X, y, deadline, started)
+    return _xgbcv(X, y, deadline, started)
+
+
+def _check() -> None:
+    from sklearn.model_selection import cross_val_score
+
+    rng = np.random.default_rng(0)
+    X = rng.random((300, 20)).astype(np.float32)
+    y = ((X - 0.5) @ rng.normal(size=20) + rng.normal(scale=0.5, size=300) > 0).astype(np.int32)
+
+    params = {'gamma': 0.1, 'learning_rate': 0.1, 'max_depth': 3}
+    boosters = _FoldBoosters(_folds(X, y), params)
+    boosters.grow(20, math.inf)
+    expected = cross_val_score(classifier(n_estimators=20, **params), X, y, cv=_kfold(), scoring='accuracy').mean()
+    assert abs(boosters.score(20) - expected) < 1e-9, (boosters.score(20), expected)
+    print(f"✓ fold cache matches cross_val_score ({expected:.4f} at 20 trees)")
+
+    for strategy in ('halving', 'xgbcv'):
+        # shorter than the first rung (100 rounds x 5 folds): scored at whatever round the boosters reached
+        result = search(X, y, strategy=strategy, time_budget=0.1)
+        assert not result.complete and result.evaluated > 0 and not math.isnan(result.best_score), result
+        assert 0 < result.best_params['n_estimators'] < min(PARAM_GRID['n_estimators']), result
+        print(f"✓ {strategy} with a 0.1s budget: {result.evaluated} point(s), best {result.best_params}")
+
+        # nothing grown at all: the fixed defaults, no exception
+        result = search(X, y, strategy=strategy, time_budget=1e-9)
+        assert result.best_params == DEFAULT_PARAMS and result.evaluated == 0 and math.isnan(result.best_score), result
+        print(f"✓ {strategy} with no budget to speak of falls back to DEFAULT_PARAMS")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FullCircle hyperparameter search")
+    parser.add_argument('command', choices=['check'])
+    parser.parse_args()
+    _check()
@@ -0,0 +1,236 @@
+"""
+FullCircle Last.fm Fetching
+Every Last.fm call the scripts make goes through here: a small pool of worker threads shares one
+token bucket (Last.fm asks for no more than about 5 requests a second), transient failures are
+retried with exponential backoff, and each artist ends up with either a value or a recorded
+error. LastfmClient talks to the REST API directly, so FC_LASTFM_API_URL can point it at the
+local stand-in in benchmarks/lastfm_stub.py.
+
+    python lastfm_fetch.py tags "Laufey" "Mac Miller"      # top tags, through the pool
+    python lastfm_fetch.py similar "Laufey" --limit 5
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+LASTFM_API_URL = os.getenv("FC_LASTFM_API_URL", "https://ws.audioscrobbler.com/2.0/")
+LASTFM_RATE = float(os.getenv("FC_LASTFM_RATE", "5"))  # requests per second across all workers, 0 = no limit
+LASTFM_WORKERS = int(os.getenv("FC_LASTFM_WORKERS", "4"))
+MAX_ATTEMPTS = 4  # first try + 3 retries
+BACKOFF_SECONDS = 0.5  # doubles every retry, with jitter
+MAX_BACKOFF_SECONDS = 8.0
+REQUEST_TIMEOUT_SECONDS = 10.0
+USER_AGENT = "FullCircle/1.0"  # Last.fm asks for an identifiable one
+
+# Last.fm error codes: 6 is "The artist you supplied could not be found" (and other bad params),
+# 8 operation failed, 11 service offline, 16 temporary error, 29 rate limit exceeded
+NOT_FOUND_ERRORS = {6}
+TRANSIENT_ERRORS = {8, 11, 16, 29}
+
+Tags = List[Tuple[str, int]]
+
+
+class ArtistNotFound(Exception):
+    """Last.fm has no such artist. Not retried, and cached like an empty tag list by tag_store."""
+
+
+class LastfmError(Exception):
+    def __init__(self, code: Optional[int], message: str, transient: bool):
+        super().__init__(f"{code}: {message}" if code is not None else message)
+        self.code = code
+        self.transient = transient
+
+
+def is_transient(error: Exception) -> bool:
+    """Worth another try: Last.fm's temporary errors, HTTP 5xx / 429, timeouts and dropped connections."""
+    if isinstance(error, LastfmError):
+        return error.transient
+    return isinstance(error, (urllib.error.URLError, http.client.HTTPException, ConnectionError, TimeoutError))
+
+
+class TokenBucket:
+    """Thread-safe rate limiter. Each acquire() reserves the next slot under the lock and sleeps
+    outside it, so waiting workers queue up in order instead of spinning."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may go out, returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # may go negative: that's the queue of callers already holding a future slot
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def backoff_delay(retry: int, base: float = BACKOFF_SECONDS, cap: float = MAX_BACKOFF_SECONDS) -> float:
+    # full range would allow ~0 waits, half-to-full jitter keeps the exponential shape but spreads
+    # retries from workers that failed together
+    return min(cap, base * 2 ** retry) * random.uniform(0.5, 1.0)
+
+
+class FetchReport(NamedTuple):
+    values: Dict[str, object]  # artist -> whatever fetch returned
+    not_found: List[str]
+    errors: Dict[str, str]  # artist -> last error, after every attempt it was allowed
+    attempts: Dict[str, int]  # artist -> requests made for it
+    seconds: float
+
+    @property
+    def requests(self) -> int:
+        return sum(self.attempts.values())
+
+    @property
+    def retries(self) -> int:
+        return self.requests - len(self.attempts)
+
+    def summary(self) -> str:
+        rate = self.requests / self.seconds if self.seconds > 0 else 0.0
+        return (f"{len(self.values):,} fetched, {len(self.not_found):,} not on Last.fm, {len(self.errors):,} failed "
+                f"({self.requests:,} requests, {self.retries:,} retries, {self.seconds:.1f}s, {rate:.1f} req/s)")
+
+
+def _fetch_one(artist: str, fetch: Callable[[str], object], bucket: TokenBucket,
+               max_attempts: int, backoff: float) -> Tuple[str, object, int]:
+    for attempt in range(1, max_attempts + 1):
+        bucket.acquire()
+        try:
+            return 'ok', fetch(artist), attempt
+        except ArtistNotFound:
+            return 'not_found', None, attempt
+        except Exception as e:
+            if attempt == max_attempts or not is_transient(e):
+                return 'error', f"{type(e).__name__}: {e}", attempt
+            if backoff > 0:
+                time.sleep(backoff_delay(attempt - 1, base=backoff))
+
+
+def fetch_all(artists: Iterable[str], fetch: Callable[[str], object], workers: int = LASTFM_WORKERS,
+              rate: float = LASTFM_RATE, max_attempts: int = MAX_ATTEMPTS, backoff: float = BACKOFF_SECONDS,
+              on_result: Optional[Callable[[str, str, object], None]] = None,
+              progress_every: int = 0) -> FetchReport:
+    """Run fetch(artist) for every artist (once per name) on a pool of workers behind one rate limit.
+
+    on_result(artist, status, value) is called from the calling thread as results come in, status
+    being 'ok', 'not_found' or 'error' (value is the error text then), so callers can store
+    results without sharing a connection with the workers.
+    """
+    artists = list(dict.fromkeys(artists))
+    max_attempts = max(1, max_attempts)
+    bucket = TokenBucket(rate)
+    report = FetchReport(values={}, not_found=[], errors={}, attempts={}, seconds=0.0)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_fetch_one, artist, fetch, bucket, max_attempts, backoff): artist for artist in artists}
+        for done, future in enumerate(as_completed(futures), 1):
+            artist = futures[future]
+            status, value, attempts = future.result()
+            report.attempts[artist] = attempts
+            if status == 'ok':
+                report.values[artist] = value
+            elif status == 'not_found':
+                report.not_found.append(artist)
+            else:
+                report.errors[artist] = value
+            if on_result is not None:
+                on_result(artist, status, value)
+            if progress_every and done % progress_every == 0:
+                print(f"  Fetched {done}/{len(artists)} artists...")
+    return report._replace(seconds=time.perf_counter() - started)
+
+
+def _as_list(items) -> List[Dict]:
+    # Last.fm's JSON turns a one-element list into a bare object
+    if items is None:
+        return []
+    return items if isinstance(items, list) else [items]
+
+
+class LastfmClient:
+    """Plain HTTP client for the two read-only calls FullCircle uses. No shared state beyond the
+    settings, so one instance can be used from every worker."""
+
+    def __init__(self, api_key: str, base_url: str = LASTFM_API_URL, timeout: float = REQUEST_TIMEOUT_SECONDS):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def _call(self, method: str, **params) -> Dict:
+        query = urllib.parse.urlencode({'method': method, 'api_key': self.api_key, 'format': 'json', **params})
+        request = urllib.request.Request(f"{self.base_url}?{query}", headers={'User-Agent': USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            # Last.fm sends its error JSON with 4xx/5xx statuses too, keep its code when there is one
+            try:
+                payload = json.loads(e.read())
+            except ValueError:
+                payload = {}
+            if 'error' not in payload:
+                raise LastfmError(None, f"HTTP {e.code}", transient=e.code >= 500 or e.code == 429) from e
+            if e.code >= 500 or e.code == 429:
+                payload['transient'] = True
+        if 'error' in payload:
+            code = int(payload['error'])
+            if code in NOT_FOUND_ERRORS:
+                raise ArtistNotFound(params.get('artist', ''))
+            raise LastfmError(code, payload.get('message', ''),
+                              transient=code in TRANSIENT_ERRORS or payload.get('transient', False))
+        return payload
+
+    def top_tags(self, artist: str, limit: int = 10) -> Tags:
+        """[(tag, weight)] in Last.fm's order, the same list pylast's get_top_tags(limit) gave."""
+        payload = self._call('artist.getTopTags', artist=artist)
+        tags = _as_list(payload.get('toptags', {}).get('tag'))
+        return [(tag['name'], int(tag['count'])) for tag in tags][:limit]
+
+    def similar_artists(self, artist: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """[(artist, match)] with match in 0..1, most similar first."""
+        payload = self._call('artist.getSimilar', artist=artist, limit=limit)
+        similar = _as_list(payload.get('similarartists', {}).get('artist'))
+        return [(item['name'], float(item['match'])) for item in similar][:limit]
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="FullCircle Last.fm fetching")
+    parser.add_argument('command', choices=['tags', 'similar'])
+    parser.add_argument('artists', nargs='+')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = LastfmClient(os.getenv("LASTFM_API_KEY"))
+    if args.command == 'tags':
+        report = fetch_all(args.artists, lambda artist: client.top_tags(artist, limit=args.limit))
+    else:
+        report = fetch_all(args.artists, lambda artist: client.similar_artists(artist, limit=args.limit))
+    for artist in args.artists:
+        if artist in report.values:
+            print(f"✓ {artist}: " + ", ".join(f"{name} ({weight:g})" for name, weight in report.values[artist]))
+        else:
+            print(f"✗ {artist}: {report.errors.get(artist, 'not found on Last.fm')}")
+    print(report.summary())
@@ -0,0 +1,116 @@
+"""
+FullCircle Model Reloader
+Background thread that watches model_artifacts/model_metadata.json and, once a retrain has
+finished writing, builds a fresh model bundle and swaps it in without a restart.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import artifacts
+
+logger = logging.getLogger("fullcircle.reload")
+
+
+class ModelReloader:
+    def __init__(
+        self,
+        model_dir: str,
+        load_bundle: Callable[[str], Any],
+        swap_bundle: Callable[[Any], Any],
+        interval_seconds: float = 5.0,
+    ):
+        # load_bundle(model_dir) builds the new bundle off the request path, swap_bundle(new)
+        # makes it live. a load that raises leaves the current bundle serving.
+        self.model_dir = model_dir
+        self.watch_path = os.path.join(model_dir, 'model_metadata.json')
+        self.load_bundle = load_bundle
+        self.swap_bundle = swap_bundle
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seen = self._signature()
+        self._pending_fingerprint: Optional[str] = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_at: Optional[str] = None
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.watch_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self) -> None:
+        # threads don't survive fork, so this runs in each worker (app lifespan), not in the master
+        if self._thread is None and self.interval_seconds > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-reloader", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("model reload check failed")
+
+    def check(self) -> bool:
+        """One poll. True when a new bundle went live."""
+        signature = self._signature()
+        if signature is None or signature == self._seen:
+            return False
+
+        # training writes several files; only load once the directory has stopped changing
+        # between two polls, so a half-finished retrain is never picked up
+        fingerprint = artifacts.artifact_fingerprint(self.model_dir)
+        if fingerprint != self._pending_fingerprint:
+            self._pending_fingerprint = fingerprint
+            return False
+        return self.reload(signature)
+
+    def reload(self, signature: Optional[Tuple[int, int]] = None) -> bool:
+        started = time.perf_counter()
+        try:
+            bundle = self.load_bundle(self.model_dir)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            # remember this version as seen, a broken retrain gets retried when it's rewritten
+            self._seen = signature or self._signature()
+            self._pending_fingerprint = None
+            logger.error(f"Model reload failed, still serving the previous bundle: {self.last_error}")
+            return False
+
+        previous = self.swap_bundle(bundle)
+        self._seen = signature or self._signature()
+        self._pending_fingerprint = None
+        self.reloads += 1
+        self.last_error = None
+        self.last_reload_at = datetime.now().isoformat()
+        logger.info(
+            f"✓ Reloaded model {getattr(previous, 'version', '?')} -> {getattr(bundle, 'version', '?')} "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "running": self._thread is not None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+        }
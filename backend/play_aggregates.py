@@ -0,0 +1,110 @@
+"""
+FullCircle Play Aggregates
+Per-artist play aggregates computed inside SQLite, so training never pulls the raw play table:
+daily play counts for the recency weighting, and late-night / weekend counts plus day-gap moments
+for the behavioral features. Both queries scan the (artist_names, played_at) index instead of the
+table, which is created on first use.
+
+    python play_aggregates.py                          # summarize listening_history.db
+    python play_aggregates.py --db other_history.db
+"""
+import argparse
+import sqlite3
+import time
+
+import pandas as pd
+
+DB_PATH = "listening_history.db"
+PLAYS_INDEX = 'idx_plays_artist_played_at'
+DAY_MS = 86_400_000
+
+# played_at is ISO 8601 text, with or without milliseconds ('...:05Z' vs '...:05.123Z'), so text
+# order isn't time order within a second. everything time-ordered goes through exact epoch ms:
+# julianday() is built from SQLite's integer ms, the ROUND just undoes the float day fraction
+PLAYED_MS = "CAST(ROUND((julianday(played_at) - 2440587.5) * 86400000) AS INTEGER)"
+
+DAILY_COUNTS_QUERY = f"""
+SELECT
+    artist_names,
+    DATE(played_at) AS day,
+    COUNT(*) AS play_count,
+    MAX({PLAYED_MS}) AS played_at_ms
+FROM plays
+GROUP BY artist_names, day
+"""
+
+# hours and weekdays are UTC, same as pandas on the 'Z' timestamps. %w is 0 = Sunday, so the
+# weekend is 0 and 6. gaps are whole days between consecutive plays of an artist (integer
+# division of non-negative ms floors, like Timedelta.days)
+ARTIST_BEHAVIOR_QUERY = f"""
+WITH play_times AS (
+    SELECT
+        artist_names,
+        CAST(strftime('%H', played_at) AS INTEGER) AS hour,
+        CAST(strftime('%w', played_at) AS INTEGER) AS weekday,
+        {PLAYED_MS} AS played_ms
+    FROM plays
+),
+gaps AS (
+    SELECT
+        artist_names,
+        hour,
+        weekday,
+        (played_ms - LAG(played_ms) OVER (PARTITION BY artist_names ORDER BY played_ms)) / {DAY_MS} AS gap_days
+    FROM play_times
+)
+SELECT
+    artist_names,
+    COUNT(*) AS plays,
+    SUM(hour >= 23 OR hour <= 4) AS late_night_plays,
+    SUM(weekday IN (0, 6)) AS weekend_plays,
+    COUNT(gap_days) AS gaps,
+    COALESCE(SUM(gap_days), 0) AS gap_days_sum,
+    COALESCE(SUM(gap_days * gap_days), 0) AS gap_days_sumsq
+FROM gaps
+GROUP BY artist_names
+"""
+
+
+def ensure_index(conn: sqlite3.Connection) -> None:
+    # existing databases were created before this index, setup_database.py makes it for new ones
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {PLAYS_INDEX} ON plays(artist_names, played_at)")
+    conn.commit()
+
+
+def daily_counts(conn: sqlite3.Connection) -> pd.DataFrame:
+    """One row per (artist, UTC day): artist_names, played_at (that day's latest play), play_count."""
+    daily = pd.read_sql_query(DAILY_COUNTS_QUERY, conn)
+    daily['played_at'] = pd.to_datetime(daily.pop('played_at_ms'), unit='ms', utc=True)
+    return daily[['artist_names', 'played_at', 'play_count']]
+
+
+def artist_behavior(conn: sqlite3.Connection) -> pd.DataFrame:
+    """One row per artist: plays, late_night_plays, weekend_plays and the count / sum / sum of
+    squares of whole-day gaps between consecutive plays. behavioral.behavioral_from_aggregates
+    turns these into the model's features."""
+    return pd.read_sql_query(ARTIST_BEHAVIOR_QUERY, conn)
+
+
+def load(db_path: str = DB_PATH):
+    """(daily counts, artist behavior) from one connection."""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_index(conn)
+        return daily_counts(conn), artist_behavior(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FullCircle play aggregates")
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    daily, behavior = load(args.db)
+    print(f"✓ Aggregated {int(behavior['plays'].sum()):,} plays into {len(daily):,} artist-days "
+          f"and {len(behavior):,} artists in {time.perf_counter() - started:.2f} s")
+    print(f"  {daily['played_at'].min()} to {daily['played_at'].max()}")
+    print(f"  late night {behavior['late_night_plays'].sum() / behavior['plays'].sum():.1%}, "
+          f"weekend {behavior['weekend_plays'].sum() / behavior['plays'].sum():.1%}")
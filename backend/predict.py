@@ -3,59 +3,192 @@ FullCircle Prediction Module
 Predicts whether a new artist will be liked and generates recommendations.
 """
 # I am going to try being as professional as possible here. this is my application to MANGO. 
-import pickle
+import json
+import time
+import itertools
+import logging
 import numpy as np
-import pandas as pd
+from datetime import datetime
 from scipy.spatial.distance import cosine
-from typing import List, Dict, Tuple
+from typing import List, Dict, NamedTuple, Optional, Tuple
 import os
 
-MODEL_DIR = 'model_artifacts'
+import ann_index
+import artifacts
+import embedding
+import metrics
+import scoring
+from featurizer import TagFeaturizer
+from tree_ensemble import TreeEnsemble
+
+MODEL_DIR = os.getenv('FC_MODEL_DIR', 'model_artifacts')
+BATCH_SCORE_CELLS = 1 << 24  # max similarity cells per batch matrix product (~64 MB of float32)
+# the numpy tree engine wins on a handful of rows; past this many Booster.inplace_predict is faster
+# (python tree_ensemble.py measures the crossover: 8 rows on the synthetic 1k model, 24 on the real one)
+TREE_BATCH_LIMIT = 8
+# past this many artists a batch stops sharing one dense matrix product and every query goes
+# through its own postings lookup, the product costs O(batch x catalog) whatever the query
+DENSE_BATCH_MAX_ARTISTS = 5_000
+# candidate search: 'exact' walks the postings of every query tag, 'ivf' scans the nprobe closest
+# lists of model_artifacts/ann_index/ (python ann_index.py build), 'lsa' ranks by cosine in the
+# reduced space of model_artifacts/embedding/ (python embedding.py fit). per request via search=
+SEARCH_MODES = ('exact', 'ivf', 'lsa')
+DEFAULT_SEARCH = os.getenv('FC_SEARCH', 'exact')
+IVF_NPROBE = int(os.getenv('FC_IVF_NPROBE', '8'))
+# seeds that are catalog rows get answered from the bundle's precomputed neighbour table (0 = always score)
+USE_NEIGHBOUR_TABLE = os.getenv('FC_NEIGHBOUR_TABLE', '1') != '0'
 BLACKLIST_TAGS = {'hop', 's', 'boy', 'good', 'east', 'states', 'new'}
 
+# per-request diagnostics: every request at FC_LOG_LEVEL=DEBUG, otherwise 1 in
+# FC_DIAGNOSTIC_SAMPLE_EVERY requests as one JSON line at INFO (0 = never)
+DIAGNOSTIC_SAMPLE_EVERY = int(os.getenv("FC_DIAGNOSTIC_SAMPLE_EVERY", "0"))
+
+# one handler on the "fullcircle" parent, so fullcircle.predict / fullcircle.reload share it
+_root_logger = logging.getLogger("fullcircle")
+if not _root_logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(message)s"))
+    _root_logger.addHandler(_log_handler)
+    _root_logger.propagate = False
+_root_logger.setLevel(os.getenv("FC_LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger("fullcircle.predict")
+_diagnostic_counter = itertools.count(1)
+
+STAGE_SECONDS = metrics.Histogram(
+    "fullcircle_stage_seconds", "Time spent in each recommendation pipeline stage.", labels=("stage",)
+)
+CANDIDATES_SCORED = metrics.Histogram(
+    "fullcircle_candidates_scored", "Candidate artists scored per query.", labels=("path",),
+    buckets=metrics.SIZE_BUCKETS,
+)
+NEIGHBOUR_LOOKUPS = metrics.Counter(
+    "fullcircle_neighbour_lookups_total", "Catalog seeds served from the neighbour table, or sent on to scoring.",
+    labels=("result",),
+)
+
+class ModelBundle(NamedTuple):
+    """Everything a request needs from one trained model, loaded together and never mutated.
+
+    Request paths grab current_bundle() once and use only that, so a reload swapping in a
+    new bundle mid-request can't mix two models' arrays.
+    """
+    version: str
+    source: str
+    model: object
+    tree_model: Optional[TreeEnsemble]
+    tfidf: object
+    featurizer: TagFeaturizer
+    feature_names: List[str]
+    tag_names: np.ndarray
+    idf_weights: Optional[np.ndarray]
+    idf_map: Dict[str, float]
+    behavioral_vector: np.ndarray
+    metadata: Dict
+    artist_names: artifacts.NameTable
+    features: np.ndarray
+    name_index: scoring.NameIndex
+    catalog_unit: np.ndarray
+    postings: scoring.Postings
+    tag_lists: scoring.TagLists
+    candidate_pool: np.ndarray
+    candidate_pool_rows: np.ndarray
+    ann_index: Optional[ann_index.IVFIndex]
+    embedding: Optional[embedding.TagEmbedding]
+    neighbours: Optional[scoring.NeighbourTable]
+    loaded_at: str
+    load_seconds: float
+
+def _behavioral_vector(behavioral_means: Dict) -> np.ndarray:
+    return np.array([behavioral_means[name] for name in artifacts.BEHAVIORAL_FEATURES])
+
+def load_model_bundle(model_dir: str = MODEL_DIR) -> ModelBundle:
+    load_started = time.perf_counter()
+    # the .npy/JSON bundle when training (or `python artifacts.py export`) wrote one, else the old pickles
+    loaded = artifacts.load_artifacts(model_dir)
+    version = f"{loaded.metadata.get('trained_at', 'unknown')}+{artifacts.artifact_fingerprint(model_dir)}"
+
+    try:
+        idf_weights = loaded.tfidf.idf_
+        tag_names = loaded.tfidf.get_feature_names_out()
+        idf_map = dict(zip(tag_names, idf_weights))
+        # vocabulary_ + idf_ lookups instead of a full tfidf.transform(...).toarray() per request
+        featurizer = TagFeaturizer.from_vectorizer(loaded.tfidf)
+    except AttributeError as e:
+        # without a fitted vectorizer every request would fail at featurize time. fail the load
+        # instead: at boot that's a clear error, on reload the previous bundle keeps serving
+        logger.error(f"Error loading TF-IDF components from {model_dir}: {e}")
+        raise ValueError(f"TF-IDF vectorizer in {model_dir} is unusable: {e}") from e
+
+    try:
+        # flattened trees walked in numpy, no sklearn wrapper / DMatrix per request
+        tree_model = TreeEnsemble.from_booster(loaded.model.get_booster())
+    except ValueError as e:
+        logger.warning(f"Compiled tree path unavailable, using predict_proba: {e}")
+        tree_model = None
+
+    # optional, built offline. None when missing or built for another catalog
+    ivf = ann_index.load_index(model_dir, loaded.candidate_pool_rows, loaded.metadata)
+    tag_embedding = embedding.load_embedding(model_dir, loaded.candidate_pool_rows, loaded.metadata)
+
+    assert len(loaded.feature_names) == 307, f"Expected 307 features, got {len(loaded.feature_names)}"
+    # very smart from me, if there's ever more or less it just fails instead of giving me garbage which would cause me to spiral like i've done before. 
+
+    return ModelBundle(
+        version=version,
+        source=loaded.source,
+        model=loaded.model,
+        tree_model=tree_model,
+        tfidf=loaded.tfidf,
+        featurizer=featurizer,
+        feature_names=loaded.feature_names,
+        tag_names=tag_names,
+        idf_weights=idf_weights,
+        idf_map=idf_map,
+        behavioral_vector=_behavioral_vector(loaded.behavioral_means),
+        metadata=loaded.metadata,
+        artist_names=loaded.artist_names,
+        features=loaded.features,
+        name_index=loaded.name_index,
+        # derived scoring arrays come precomputed (and memory-mapped) from the bundle
+        catalog_unit=loaded.catalog_unit,
+        postings=loaded.postings,
+        tag_lists=loaded.tag_lists,
+        candidate_pool=loaded.candidate_pool,
+        candidate_pool_rows=loaded.candidate_pool_rows,
+        ann_index=ivf,
+        embedding=tag_embedding,
+        neighbours=loaded.neighbours,
+        loaded_at=datetime.now().isoformat(),
+        load_seconds=time.perf_counter() - load_started,
+    )
+
+def current_bundle() -> ModelBundle:
+    return _bundle
+
+def swap_bundle(bundle: ModelBundle) -> ModelBundle:
+    """Make `bundle` live and hand back the previous one. A single reference assignment,
+    so requests already holding the old bundle finish on it untouched."""
+    global _bundle
+    previous, _bundle = _bundle, bundle
+    return previous
+
 print("Loading model artifacts...")
-final_xgb_model = pickle.load(open(f'{MODEL_DIR}/final_xgb_model.pkl', 'rb'))
-tfidf = pickle.load(open(f'{MODEL_DIR}/tfidf_vectorizer.pkl', 'rb'))
-all_feature_names = pickle.load(open(f'{MODEL_DIR}/feature_names.pkl', 'rb'))
-behavioral_means = pickle.load(open(f'{MODEL_DIR}/behavioral_means.pkl', 'rb'))
-all_artists_df = pd.read_pickle(f'{MODEL_DIR}/all_artists_df.pkl')
-
-try:
-    print(f"DEBUG: TFIDF loaded successfully: {tfidf}")
-    IDF_WEIGHTS = tfidf.idf_
-    FEATURE_NAMES = tfidf.get_feature_names_out()
-    IDF_MAP = dict(zip(FEATURE_NAMES, IDF_WEIGHTS))
-    
-    # NEW DEBUG CODE:
-    print(f"DEBUG: IDF_WEIGHTS shape: {IDF_WEIGHTS.shape}")
-    print(f"DEBUG: Feature Names count: {len(FEATURE_NAMES)}")
-    print(f"DEBUG: Rarity of 'icelandic' tag (IDF): {IDF_MAP.get('icelandic', 'NOT FOUND')}")
-
-except AttributeError as e:
-    print(f"Error loading TF-IDF components: {e}")
-    IDF_WEIGHTS = None
-    IDF_MAP = {}
-except FileNotFoundError as e:
-    print(f"Error: Missing model file: {e}")
-    IDF_WEIGHTS = None
-    IDF_MAP = {}
-
-print(f"✓ Loaded model with {len(all_feature_names)} features")
-print(f"✓ Loaded {len(all_artists_df)} artists for recommendations")
-print(f"✓ Behavioral means: {behavioral_means}")
-
-print("\nDebug: Analyzing feature vectors...")
-tfidf_nonzero = 0
-for idx, row in all_artists_df.iterrows():
-    vec = row['features']
-    if np.sum(np.abs(vec[:300])) > 0:  # First 300 are TF-IDF
-        tfidf_nonzero += 1
-
-print(f"Artists with non-zero TF-IDF features: {tfidf_nonzero}/{len(all_artists_df)}")
-print(f"Artists with ONLY behavioral features: {len(all_artists_df) - tfidf_nonzero}/{len(all_artists_df)}")
-
-assert len(all_feature_names) == 307, f"Expected 307 features, got {len(all_feature_names)}"
-# very smart from me, if there's ever more or less it just fails instead of giving me garbage which would cause me to spiral like i've done before. 
+_bundle = load_model_bundle(MODEL_DIR)
+print(f"✓ Loaded model with {len(_bundle.feature_names)} features")
+print(f"✓ Loaded {len(_bundle.artist_names)} artists for recommendations ({_bundle.source} artifacts)")
+if _bundle.ann_index is not None:
+    print(f"✓ Loaded ANN index ({_bundle.ann_index.n_lists} lists, {len(_bundle.ann_index.rows)} artists)")
+elif DEFAULT_SEARCH == 'ivf':
+    logger.warning("FC_SEARCH=ivf but there is no ANN index for this catalog, using exact search")
+if _bundle.embedding is not None:
+    print(f"✓ Loaded {_bundle.embedding.dimensions}-dimension tag embedding")
+elif DEFAULT_SEARCH == 'lsa':
+    logger.warning("FC_SEARCH=lsa but there is no tag embedding for this catalog, using exact search")
+if _bundle.neighbours is not None:
+    print(f"✓ Loaded neighbour table (top {_bundle.neighbours.k} per catalog artist)")
+print(f"✓ Model artifacts ready in {_bundle.load_seconds * 1000:.0f} ms")
+# catalog diagnostics (non-zero TF-IDF rows, zero vectors) live in `python artifacts.py diagnose` now
+
 def preprocess_tags(tags: List[str]) -> List[str]:
     cleaned = []
     for tag in tags:
@@ -64,148 +197,442 @@ def preprocess_tags(tags: List[str]) -> List[str]:
             cleaned.append(tag)
     return cleaned
 
-def create_feature_vector(artist_tags: List[str]) -> np.ndarray:
-    clean_tags = preprocess_tags(artist_tags)
-    tag_string = " | ".join(clean_tags) if clean_tags else ""
-    tfidf_vector = tfidf.transform([tag_string]).toarray().flatten()
-    
-    behavioral_features = np.array([
-        behavioral_means['late_night_ratio'],
-        behavioral_means['weekend_ratio'],
-        behavioral_means['consistency_score'],
-        behavioral_means['consistency_std'],
-        behavioral_means['late_weekend_interaction'],
-        behavioral_means['consistency_x_late_night'],
-        behavioral_means['all_behavioral'],
-    ])
-    
-    full_vector = np.hstack([tfidf_vector, behavioral_features])
-    
-    assert full_vector.shape[0] == 307, f"Expected 307 features, got {full_vector.shape[0]}"
-    
-    return full_vector.reshape(1, -1)
+def create_feature_matrix(tag_lists: List[List[str]], bundle: Optional[ModelBundle] = None) -> np.ndarray:
+    bundle = bundle or _bundle
+    # same TF-IDF weights tfidf.transform would give, behavioral means on every row
+    with STAGE_SECONDS.time("featurize"):
+        tfidf_block = bundle.featurizer.transform_many([preprocess_tags(artist_tags) for artist_tags in tag_lists])
+
+        behavioral_block = np.tile(bundle.behavioral_vector, (len(tag_lists), 1))
+        full_matrix = np.hstack([tfidf_block, behavioral_block])
+
+    assert full_matrix.shape[1] == 307, f"Expected 307 features, got {full_matrix.shape[1]}"
+
+    return full_matrix
+
+def create_feature_vector(artist_tags: List[str], bundle: Optional[ModelBundle] = None) -> np.ndarray:
+    return create_feature_matrix([artist_tags], bundle)
 
 # won't pretend like I knew what a Tuple was before this project LOLLLLLLLLLLLLL.
-def predict_artist_probability(artist_name: str, artist_tags: List[str]) -> Tuple[float, np.ndarray]:
-    feature_vector = create_feature_vector(artist_tags)
+def predict_artist_probability(
+    artist_name: str, artist_tags: List[str], bundle: Optional[ModelBundle] = None
+) -> Tuple[float, np.ndarray]:
+    bundle = bundle or _bundle
+    feature_vector = create_feature_vector(artist_tags, bundle)
     
-    probability = final_xgb_model.predict_proba(feature_vector)[0][1]
+    with STAGE_SECONDS.time("predict"):
+        if bundle.tree_model is not None:
+            probability = bundle.tree_model.predict_one(feature_vector[0])
+        else:
+            probability = bundle.model.predict_proba(feature_vector)[0][1]
     
     return probability, feature_vector.flatten()
+
+def _idf_weighted(bundle: ModelBundle, tag_block: np.ndarray) -> np.ndarray:
+    # rare tags count for more: every present tag gets multiplied by its IDF
+    return tag_block * np.where(tag_block > 0, bundle.idf_weights, 0.0)
+
+def _low_score_response(new_artist_name: str, probability: float, threshold: float) -> List[Dict]:
+    return [{
+        "artist": new_artist_name,
+        "probability": float(probability),
+        "recommendation": False,
+        "message": f"Low prediction score ({probability:.2%}). Model is not confident you'll like this artist. Try threshold={threshold:.0%} or higher."
+    }]
+
+def _count_candidates(bundle: ModelBundle, excluded_rows: np.ndarray) -> int:
+    return len(bundle.candidate_pool_rows) - int(bundle.candidate_pool[excluded_rows].sum())
+
+def search_mode(bundle: ModelBundle, search: Optional[str] = None) -> str:
+    """The candidate search a request actually gets: the one asked for (or FC_SEARCH), except
+    'ivf' or 'lsa' on a catalog without the index / embedding, which quietly runs exact."""
+    search = search or DEFAULT_SEARCH
+    if search not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {search!r}, expected one of {SEARCH_MODES}")
+    if (search == 'ivf' and bundle.ann_index is None) or (search == 'lsa' and bundle.embedding is None):
+        return 'exact'
+    return search
+
+def _select_exact(
+    bundle: ModelBundle, query: np.ndarray, excluded_rows: np.ndarray, top_n: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    # only artists sharing at least one of the query's tags can score above zero
+    with STAGE_SECONDS.time("similarity"):
+        matched_rows, matched_similarities = scoring.score_postings(bundle.postings, query)
+    with STAGE_SECONDS.time("candidate_filter"):
+        keep = bundle.candidate_pool[matched_rows] & ~np.isin(matched_rows, excluded_rows)
+        matched_rows, matched_similarities = matched_rows[keep], matched_similarities[keep]
+    CANDIDATES_SCORED.observe(len(matched_rows), "postings")
+
+    with STAGE_SECONDS.time("sort"):
+        best = scoring.top_k(matched_similarities, top_n)
+        top_rows = matched_rows[best]
+        top_similarities = matched_similarities[best]
+
+        if len(top_rows) < top_n:
+            # the full scan used to rank zero-overlap candidates last in catalog order, keep doing that
+            zero_rows = bundle.candidate_pool_rows[~np.isin(bundle.candidate_pool_rows, np.union1d(matched_rows, excluded_rows))]
+            zero_rows = zero_rows[:top_n - len(top_rows)]
+            top_rows = np.concatenate([top_rows, zero_rows])
+            top_similarities = np.concatenate([top_similarities, np.zeros(len(zero_rows))])
+    return top_rows, top_similarities
+
+def _select_ivf(
+    bundle: ModelBundle, query: np.ndarray, excluded_rows: np.ndarray, top_n: int, nprobe: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    # the index only holds the candidate pool, so no pool filter here
+    with STAGE_SECONDS.time("similarity"):
+        rows, similarities = ann_index.search(bundle.ann_index, query, nprobe)
+    with STAGE_SECONDS.time("candidate_filter"):
+        keep = (similarities > 0) & ~np.isin(rows, excluded_rows)
+        rows, similarities = rows[keep], similarities[keep]
+        # catalog order, so ties break by row id like the exact path
+        order = np.argsort(rows, kind='stable')
+        rows, similarities = rows[order], similarities[order]
+    CANDIDATES_SCORED.observe(len(rows), "ivf")
+
+    if len(rows) < top_n:
+        # the probed lists ran dry, a short or zero-padded list would be worse than paying for exact
+        return _select_exact(bundle, query, excluded_rows, top_n)
+    with STAGE_SECONDS.time("sort"):
+        best = scoring.top_k(similarities, top_n)
+    return rows[best], similarities[best]
+
+def _select_lsa(
+    bundle: ModelBundle, query: np.ndarray, excluded_rows: np.ndarray, top_n: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    # every pool row gets a score here, including ones sharing no tag with the query: that
+    # latent similarity is the point of the reduced space. reported similarity is the LSA cosine
+    rows = bundle.embedding.rows
+    with STAGE_SECONDS.time("similarity"):
+        similarities = embedding.search(bundle.embedding, query)
+    with STAGE_SECONDS.time("candidate_filter"):
+        positions = np.searchsorted(rows, excluded_rows)
+        inside = positions < len(rows)
+        positions, wanted = positions[inside], excluded_rows[inside]
+        similarities[positions[rows[positions] == wanted]] = -np.inf
+    CANDIDATES_SCORED.observe(len(rows), "lsa")
+
+    with STAGE_SECONDS.time("sort"):
+        best = scoring.top_k(similarities, top_n)
+    return rows[best], similarities[best]
+
+def _select(
+    bundle: ModelBundle, mode: str, query: np.ndarray, excluded_rows: np.ndarray, top_n: int, nprobe: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    if mode == 'ivf':
+        return _select_ivf(bundle, query, excluded_rows, top_n, nprobe or IVF_NPROBE)
+    if mode == 'lsa':
+        return _select_lsa(bundle, query, excluded_rows, top_n)
+    return _select_exact(bundle, query, excluded_rows, top_n)
+
+def _diagnostic_level() -> int:
+    # 0 means skip: the common case costs one isEnabledFor and nothing else
+    if logger.isEnabledFor(logging.DEBUG):
+        return logging.DEBUG
+    if DIAGNOSTIC_SAMPLE_EVERY > 0 and next(_diagnostic_counter) % DIAGNOSTIC_SAMPLE_EVERY == 0:
+        return logging.INFO
+    return 0
+
+def _log_diagnostics(
+    bundle: ModelBundle,
+    level: int,
+    artist_name: str,
+    n_excluded_requested: int,
+    explore_rows: np.ndarray,
+    excluded_rows: np.ndarray,
+    query_vector: np.ndarray,
+    top_rows: np.ndarray,
+) -> None:
+    # what the old "Top 3 candidate vectors analysis" prints showed, as one JSON record
+    top_candidates = []
+    for row_id in top_rows[:3]:
+        candidate_vec = bundle.features[row_id]
+        distance = float(cosine(query_vector, candidate_vec))
+        top_candidates.append({
+            "artist": bundle.artist_names[row_id],
+            "tfidf_sum": float(np.sum(np.abs(candidate_vec[:300]))),
+            "behavioral": [float(v) for v in candidate_vec[300:]],
+            "cosine_distance": distance,
+            "similarity": 1 - distance,
+        })
+
+    logger.log(level, json.dumps({
+        "event": "recommendation_diagnostics",
+        "artist": artist_name,
+        "excluded_requested": n_excluded_requested,
+        "model_version": bundle.version,
+        "candidates_after_exclude": _count_candidates(bundle, explore_rows),
+        "candidates": _count_candidates(bundle, excluded_rows),
+        "input": {
+            "tfidf_sum": float(np.sum(np.abs(query_vector[:300]))),
+            "behavioral": [float(v) for v in query_vector[300:]],
+        },
+        "top_candidates": top_candidates,
+    }))
+
+def _explain(
+    bundle: ModelBundle, probability: float, vec_a_tags: np.ndarray, top_rows: np.ndarray, top_similarities: np.ndarray
+) -> List[Dict]:
+    # explanations only for the rows that survived, straight from the IDF-sorted tag lists
+    input_ranks = scoring.query_ranks(bundle.tag_lists, vec_a_tags)
+
+    return [
+        _recommendation(bundle, row_id, similarity, probability,
+                        scoring.matching_tag_columns(bundle.tag_lists, row_id, input_ranks, limit=10))
+        for row_id, similarity in zip(top_rows, top_similarities)
+    ]
+
+def _recommendation(
+    bundle: ModelBundle, row_id: int, similarity: float, probability: float, matching_columns: np.ndarray
+) -> Dict:
+    similarity = float(similarity)
+    return {
+        'artist': bundle.artist_names[row_id],
+        'similarity_to_input': similarity,
+        'prediction_confidence': float(probability),
+        'final_ranking_score': float(probability * similarity),
+        'matching_tags': [str(bundle.tag_names[i]) for i in matching_columns],  # Top 10 matching tags
+    }
+
+def _catalog_seed_row(bundle: ModelBundle, artist_name: str) -> Optional[int]:
+    if bundle.neighbours is None or not USE_NEIGHBOUR_TABLE:
+        return None
+    rows = scoring.lookup_rows(bundle.name_index, [artist_name])
+    # a name several catalog rows share is ambiguous, those get scored from the sent tags
+    return int(rows[0]) if len(rows) == 1 else None
+
+def _recommend_from_table(
+    bundle: ModelBundle,
+    seed_row: int,
+    artist_name: str,
+    weighted: bool,
+    threshold: float,
+    top_n: int,
+    exclude_artists: List[str],
+) -> Optional[List[Dict]]:
+    """What scoring the seed's catalog tags would return, read off the neighbour table in O(k).
+
+    None when the table can't answer: top_n past k, or so many stored neighbours excluded
+    that the rest of the ranking (not stored) would be needed.
+    """
+    table = bundle.neighbours
+    if top_n > table.k:
+        NEIGHBOUR_LOOKUPS.inc("fallback")
+        return None
+
+    probability = float(table.seed_probability[seed_row])
+    if probability < threshold:
+        NEIGHBOUR_LOOKUPS.inc("hit")
+        return _low_score_response(artist_name, probability, threshold)
+    if bundle.tag_lists.indptr[seed_row + 1] == bundle.tag_lists.indptr[seed_row]:
+        # no catalog tags, scoring would have had an all-zero query
+        NEIGHBOUR_LOOKUPS.inc("hit")
+        return []
+
+    mode = int(weighted and bundle.idf_weights is not None)
+    with STAGE_SECONDS.time("neighbour_lookup"):
+        # exclusions applied after the lookup, same set the scoring path excludes
+        explore_rows = scoring.lookup_rows(bundle.name_index, exclude_artists)
+        excluded_rows = np.union1d(explore_rows, [seed_row])
+        rows = table.rows[mode, seed_row]
+        listed = rows >= 0
+        slots = np.flatnonzero(listed & ~np.isin(rows, excluded_rows))[:top_n]
+        top_rows = rows[slots]
+        top_similarities = np.asarray(table.similarities[mode, seed_row, slots], dtype=np.float64)
+
+        if len(slots) < top_n:
+            if listed.all():
+                NEIGHBOUR_LOOKUPS.inc("fallback")
+                return None
+            # the row lists every candidate sharing a tag, so the rest is the zero-overlap padding
+            zero_rows = bundle.candidate_pool_rows[~np.isin(bundle.candidate_pool_rows, np.union1d(rows[listed], excluded_rows))]
+            zero_rows = zero_rows[:top_n - len(slots)]
+            top_rows = np.concatenate([top_rows, zero_rows])
+            top_similarities = np.concatenate([top_similarities, np.zeros(len(zero_rows))])
+    NEIGHBOUR_LOOKUPS.inc("hit")
+
+    with STAGE_SECONDS.time("matching_tags"):
+        base = (mode * len(bundle.artist_names) + seed_row) * table.k
+        no_tags = np.empty(0, dtype=np.int16)
+        recommendations = []
+        for position, (row_id, similarity) in enumerate(zip(top_rows, top_similarities)):
+            if position < len(slots):
+                p = base + slots[position]
+                shared = table.shared_ranks[table.shared_indptr[p]:table.shared_indptr[p + 1]]
+            else:
+                shared = no_tags
+            recommendations.append(
+                _recommendation(bundle, row_id, similarity, probability, bundle.tag_lists.rank_to_column[shared])
+            )
+
+    level = _diagnostic_level()
+    if level:
+        seed_tags = np.asarray(bundle.features[seed_row, :300], dtype=np.float64)
+        if mode:
+            seed_tags = _idf_weighted(bundle, seed_tags)
+        query_vector = np.concatenate([seed_tags, bundle.behavioral_vector])
+        _log_diagnostics(bundle, level, artist_name, len(exclude_artists), explore_rows, excluded_rows, query_vector, top_rows)
+    return recommendations
+
 def generate_recommendations(
     new_artist_name: str, 
     new_artist_tags: List[str],
     weighted: bool = True,
     threshold: float = 0.65,
     top_n: int = 10,
-    exclude_artists: List[str] = []
+    exclude_artists: List[str] = [],
+    bundle: Optional[ModelBundle] = None,
+    search: Optional[str] = None,
+    nprobe: Optional[int] = None
 ) -> List[Dict]:
+    bundle = bundle or _bundle
+    mode = search_mode(bundle, search)
 
-    probability, new_artist_vector = predict_artist_probability(new_artist_name, new_artist_tags)
+    # the table holds exact rankings, an lsa request wants the reduced space's
+    seed_row = _catalog_seed_row(bundle, new_artist_name) if mode != 'lsa' else None
+    if seed_row is not None:
+        recommendations = _recommend_from_table(
+            bundle, seed_row, new_artist_name, weighted, threshold, top_n, exclude_artists
+        )
+        if recommendations is not None:
+            return recommendations
 
-    if weighted and IDF_WEIGHTS is not None:
-        tag_vector = new_artist_vector[:300].copy()
-        weight_multiplier = np.zeros_like(tag_vector)
+    probability, new_artist_vector = predict_artist_probability(new_artist_name, new_artist_tags, bundle)
 
-        for i, feature_name in enumerate(FEATURE_NAMES):
-            if tag_vector[i] > 0:
-                weight_multiplier[i] = IDF_MAP.get(feature_name, 1.0)
-        weighted_tag_vector = tag_vector * weight_multiplier
-        new_artist_vector[:300] = weighted_tag_vector
+    with STAGE_SECONDS.time("idf_weighting"):
+        if weighted and bundle.idf_weights is not None:
+            new_artist_vector[:300] = _idf_weighted(bundle, new_artist_vector[:300])
     
     if probability < threshold:
-        return [{
-            "artist": new_artist_name,
-            "probability": float(probability),
-            "recommendation": False,
-            "message": f"Low prediction score ({probability:.2%}). Model is not confident you'll like this artist. Try threshold={threshold:.0%} or higher."
-        }]
-
-    LOW_HISTORY_THRESHOLD = 5 
-
-    not_preferred_candidates = all_artists_df[
-        (all_artists_df['label'] > 0) & 
-        (all_artists_df['label'] < LOW_HISTORY_THRESHOLD) &
-        (all_artists_df['features'].apply(lambda x: np.sum(np.abs(x[:300])) > 0))
-    ].copy()
-    
-    if exclude_artists and len(exclude_artists) > 0:
-        exclude_lower = [a.lower() for a in exclude_artists]
-        not_preferred_candidates = not_preferred_candidates[
-            ~not_preferred_candidates['artist_name'].str.lower().isin(exclude_lower)
-    ]
-    print(f"Explore Mode: Filtered to {len(not_preferred_candidates)} candidates after excluding {len(exclude_artists)} known artists")
-    
-    not_preferred_candidates = not_preferred_candidates[
-        not_preferred_candidates['artist_name'].str.lower() != new_artist_name.lower()
-    ]
-        
-    recommendations = []
-    
-    for _, row in not_preferred_candidates.iterrows():
-        candidate_vector = row['features']
-        if np.sum(np.abs(candidate_vector)) == 0:
-            continue
-        try:
-            vec_a_tags = new_artist_vector[:300]
-            vec_b_tags = candidate_vector[:300]
-          
-            if np.sum(np.abs(vec_a_tags)) == 0 or np.sum(np.abs(vec_b_tags)) == 0:
-                continue
+        return _low_score_response(new_artist_name, probability, threshold)
+
+    # explore mode: the top spotify artists the frontend sends, resolved to row ids through the name index
+    with STAGE_SECONDS.time("exclude_lookup"):
+        explore_rows = scoring.lookup_rows(bundle.name_index, exclude_artists)
+        excluded_rows = np.union1d(explore_rows, scoring.lookup_rows(bundle.name_index, [new_artist_name]))
+
+    vec_a_tags = new_artist_vector[:300]
+    query = scoring.unit_vector(vec_a_tags)
+    if not query.any():
+        return []
+
+    top_rows, top_similarities = _select(bundle, mode, query, excluded_rows, top_n, nprobe)
+
+    with STAGE_SECONDS.time("matching_tags"):
+        recommendations = _explain(bundle, probability, vec_a_tags, top_rows, top_similarities)
+
+    level = _diagnostic_level()
+    if level:
+        _log_diagnostics(bundle, level, new_artist_name, len(exclude_artists), explore_rows, excluded_rows, new_artist_vector, top_rows)
+
+    return recommendations
+
+def generate_recommendations_batch(
+    queries: List[Dict],
+    threshold: float = 0.65,
+    top_n: int = 10,
+    bundle: Optional[ModelBundle] = None
+) -> List[List[Dict]]:
+    """Same output as generate_recommendations for every query, in request order.
 
-            similarity = 1 - cosine(vec_a_tags, vec_b_tags)
-            if np.isnan(similarity) or np.isinf(similarity):
+    Each query is a dict with 'artist_name', 'tags' and optionally 'weighted',
+    'exclude_artists', 'search' and 'nprobe'. Catalog seeds come straight from the
+    neighbour table; the rest share one featurize pass and one model predict, and exact
+    queries against a small catalog also share one matrix-matrix product.
+    """
+    if not queries:
+        return []
+    bundle = bundle or _bundle
+    modes = [search_mode(bundle, q.get('search')) for q in queries]
+
+    results: List[Optional[List[Dict]]] = [None] * len(queries)
+    for i, query in enumerate(queries):
+        seed_row = _catalog_seed_row(bundle, query['artist_name']) if modes[i] != 'lsa' else None
+        if seed_row is not None:
+            results[i] = _recommend_from_table(
+                bundle, seed_row, query['artist_name'], bool(query.get('weighted', True)),
+                threshold, top_n, list(query.get('exclude_artists') or []),
+            )
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        scored_results = _score_batch(bundle, [queries[i] for i in pending], [modes[i] for i in pending], threshold, top_n)
+        for i, result in zip(pending, scored_results):
+            results[i] = result
+    return results
+
+def _score_batch(
+    bundle: ModelBundle, queries: List[Dict], modes: List[str], threshold: float, top_n: int
+) -> List[List[Dict]]:
+    feature_matrix = create_feature_matrix([q['tags'] for q in queries], bundle)
+    with STAGE_SECONDS.time("predict"):
+        if bundle.tree_model is None:
+            probabilities = bundle.model.predict_proba(feature_matrix)[:, 1]
+        elif len(queries) <= TREE_BATCH_LIMIT:
+            probabilities = bundle.tree_model.predict_proba(feature_matrix)[:, 1]
+        else:
+            # the engine only exists for logistic objectives, so this is already P(like)
+            probabilities = bundle.model.get_booster().inplace_predict(feature_matrix)
+
+    with STAGE_SECONDS.time("idf_weighting"):
+        weighted = np.array([bool(q.get('weighted', True)) for q in queries])
+        if bundle.idf_weights is not None and weighted.any():
+            feature_matrix[weighted, :300] = _idf_weighted(bundle, feature_matrix[weighted, :300])
+
+    results: List[List[Dict]] = [[] for _ in queries]
+    scored = []
+    for i, (query, probability) in enumerate(zip(queries, probabilities)):
+        if probability < threshold:
+            results[i] = _low_score_response(query['artist_name'], probability, threshold)
+        else:
+            scored.append(i)
+    if not scored:
+        return results
+
+    query_units = scoring.build_unit_matrix(feature_matrix[scored])
+    small_catalog = len(bundle.artist_names) <= DENSE_BATCH_MAX_ARTISTS
+
+    # chunked so a big batch against a big catalog doesn't allocate an enormous score matrix
+    step = max(1, BATCH_SCORE_CELLS // max(len(bundle.artist_names), 1))
+    for start in range(0, len(scored), step):
+        chunk = range(start, min(start + step, len(scored)))
+        dense = [k for k in chunk if small_catalog and modes[scored[k]] == 'exact']
+        dense_similarities = {}
+        if dense:
+            with STAGE_SECONDS.time("batch_similarity"):
+                similarities = query_units[dense] @ bundle.catalog_unit.T
+                similarities[:, ~bundle.candidate_pool] = -np.inf
+            dense_similarities = dict(zip(dense, similarities))
+
+        for k in chunk:
+            i = scored[k]
+            if not query_units[k].any():
                 continue
 
-            final_score = probability * similarity
-            
-            matching_tags = []
-            for i, feature_name in enumerate(FEATURE_NAMES):
-                if vec_a_tags[i] > 0 and vec_b_tags[i] > 0:
-                    matching_tags.append(feature_name)
-                    
-            matching_tags.sort(key=lambda t: IDF_MAP.get(t, 0), reverse=True)
-
-            recommendations.append({
-                'artist': row['artist_name'],
-                'similarity_to_input': float(similarity),
-                'prediction_confidence': float(probability),
-                'final_ranking_score': float(final_score),
-                'matching_tags': matching_tags[:10],  # Top 10 matching tags
-            })
-        except Exception as e:
-            continue
-    print(f"\nDEBUG: Found {len(recommendations)} candidates with non-zero tags")
-    if len(recommendations) > 0:
-        print("\nTop 3 candidate vectors analysis:")
-        for i, rec in enumerate(recommendations[:3]):
-            artist_name = rec['artist']
-            artist_row = all_artists_df[all_artists_df['artist_name'] == artist_name].iloc[0]
-            candidate_vec = artist_row['features']
-            
-            print(f"\n{i+1}. {artist_name}:")
-            print(f"   TF-IDF portion sum: {np.sum(np.abs(candidate_vec[:300])):.4f}")
-            print(f"   Behavioral portion: {candidate_vec[300:]}")
-            print(f"   Cosine distance: {cosine(new_artist_vector, candidate_vec):.6f}")
-            print(f"   Similarity: {1 - cosine(new_artist_vector, candidate_vec):.6f}")
-    
-    print(f"\nInput artist (Laufey) vector:")
-    print(f"   TF-IDF portion sum: {np.sum(np.abs(new_artist_vector[:300])):.4f}")
-    print(f"   Behavioral portion: {new_artist_vector[300:]}")
-    
-    recommendations.sort(key=lambda x: x['final_ranking_score'], reverse=True)
-    return recommendations[:top_n]
+            query = queries[i]
+            with STAGE_SECONDS.time("exclude_lookup"):
+                exclude_artists = list(query.get('exclude_artists') or [])
+                excluded_rows = scoring.lookup_rows(bundle.name_index, exclude_artists + [query['artist_name']])
+
+            if k in dense_similarities:
+                row_similarities = dense_similarities[k]
+                row_similarities[excluded_rows] = -np.inf
+                CANDIDATES_SCORED.observe(_count_candidates(bundle, excluded_rows), "dense")
+                with STAGE_SECONDS.time("sort"):
+                    top_rows = scoring.top_k(row_similarities, top_n)
+                    top_similarities = row_similarities[top_rows]
+            else:
+                top_rows, top_similarities = _select(bundle, modes[i], query_units[k], excluded_rows, top_n, query.get('nprobe'))
+            with STAGE_SECONDS.time("matching_tags"):
+                results[i] = _explain(bundle, probabilities[i], feature_matrix[i, :300], top_rows, top_similarities)
 
+            level = _diagnostic_level()
+            if level:
+                explore_rows = scoring.lookup_rows(bundle.name_index, exclude_artists)
+                _log_diagnostics(bundle, level, query['artist_name'], len(exclude_artists), explore_rows, excluded_rows, feature_matrix[i], top_rows)
 
-print("\nDebug: Checking for zero-vectors in dataset...")
-zero_count = 0
-for idx, row in all_artists_df.iterrows():
-    if np.sum(np.abs(row['features'])) == 0:
-        zero_count += 1
-        if zero_count <= 5:  # checking...
-            print(f"  Zero-vector artist: {row['artist_name']}")
+    return results
 
-print(f"Total zero-vector artists: {zero_count}/{len(all_artists_df)}")
 # --- Example Usage ---
 if __name__ == "__main__":
     test_artist = "Laufey"
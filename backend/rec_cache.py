@@ -0,0 +1,113 @@
+"""
+FullCircle Recommendation Cache
+Bounded in-process LRU with a TTL for /recommend results, keyed on canonicalized inputs.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+def make_key(
+    model_version: str,
+    clean_tags: Iterable[str],
+    weighted: bool,
+    threshold: float,
+    top_n: int,
+    artist_name: str,
+    exclude_artists: Iterable[str],
+    search: str = 'exact',
+) -> Tuple:
+    # tags come in already through preprocess_tags. sorted but NOT deduplicated, a repeated
+    # tag changes its term frequency and therefore the vector. the exclude list matches
+    # case-insensitively, so its hash does too. the artist name is part of the key because
+    # it gets excluded from its own results and shows up in the low-score message.
+    exclude_hash = hashlib.sha1(
+        "\n".join(sorted({name.lower() for name in exclude_artists})).encode("utf-8")
+    ).hexdigest()
+    return (
+        model_version,
+        tuple(sorted(clean_tags)),
+        bool(weighted),
+        float(threshold),
+        int(top_n),
+        artist_name.strip(),
+        exclude_hash,
+        search,
+    )
+
+
+class RecommendationCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def sync_version(self, model_version: str) -> None:
+        # a retrained model means every cached ranking is stale, drop them all
+        with self._lock:
+            if model_version != self._model_version:
+                if self._model_version is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._model_version = model_version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "model_version": self._model_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -1,21 +1,19 @@
 import sqlite3
-import pylast
 import json
 import glob
 import os
 from dotenv import load_dotenv
 from collections import defaultdict
 
+from lastfm_fetch import LastfmClient, fetch_all
+from tag_store import TagStore
+
 load_dotenv()
 
 # credentials
 api_key = os.getenv("LASTFM_API_KEY")
-api_secret = os.getenv("LASTFM_API_SECRET")
 
-network = pylast.LastFMNetwork(
-    api_key=api_key,
-    api_secret=api_secret
-)
+lastfm = LastfmClient(api_key)
 
 # connecting to database
 conn = sqlite3.connect("listening_history.db")
@@ -43,27 +41,28 @@ print("\n" + "="*60)
 print("Finding similar artists...")
 print("="*60)
 
-for artist_name, play_count in your_artists[:20]:  # top 20 artists to keep it fast
-    try:
-        artist = network.get_artist(artist_name)
-        similar = artist.get_similar(limit=10)  # top 10 
-        
-        for similar_artist in similar:
-            similar_name = similar_artist.item.name
-            
-            # line should skip if it's an artist i already have in my list- will only get better once spotify hands me my data
-            if similar_name in [a[0] for a in your_artists]:
-                continue
-            
-            # weight by play count to include loops! i love looping my songs.
-            weight = play_count
-            candidate_artists[similar_name]["endorsements"] += weight
-            candidate_artists[similar_name]["endorsed_by"].append(artist_name)
-        
-        print(f"✓ {artist_name} ({play_count} plays)")
-    
-    except Exception as e:
-        print(f"✗ Couldn't get similar artists for {artist_name}: {e}")
+top_artists = your_artists[:20]  # top 20 artists to keep it fast
+known_artists = {a[0] for a in your_artists}
+# all 20 lookups at once through the rate limited pool (lastfm_fetch.py), top 10 each
+similar_lookup = fetch_all([name for name, _ in top_artists], lambda name: lastfm.similar_artists(name, limit=10))
+
+for artist_name, play_count in top_artists:
+    if artist_name not in similar_lookup.values:
+        error = similar_lookup.errors.get(artist_name, "not found on Last.fm")
+        print(f"✗ Couldn't get similar artists for {artist_name}: {error}")
+        continue
+
+    for similar_name, _ in similar_lookup.values[artist_name]:
+        # line should skip if it's an artist i already have in my list- will only get better once spotify hands me my data
+        if similar_name in known_artists:
+            continue
+
+        # weight by play count to include loops! i love looping my songs.
+        weight = play_count
+        candidate_artists[similar_name]["endorsements"] += weight
+        candidate_artists[similar_name]["endorsed_by"].append(artist_name)
+
+    print(f"✓ {artist_name} ({play_count} plays)")
 
 print(f"\n✓ Found {len(candidate_artists)} candidate artists")
 
@@ -85,26 +84,25 @@ print(f"✓ Loaded profile with {len(your_tags)} tags")
 # cute statement
 print("\n please wait while I calculate the tag similarity <3")
 
+# candidate tags through the shared tag cache (tag_store.py), repeat runs only fetch candidates it hasn't seen
+with TagStore() as tag_store:
+    tag_lookup = tag_store.top_tags(list(candidate_artists.keys()), lastfm)
+
 for candidate_name in list(candidate_artists.keys()):
-    try:
-        artist = network.get_artist(candidate_name)
-        tags = artist.get_top_tags(limit=10)
-        
-        # similarity score for loop 
-        similarity_score = 0
-        for tag in tags:
-            tag_name = tag.item.name
-            if tag_name in your_tags:
-                # doing both the wights of the similar artist tags and my profile score for the total similarity score! just adding to the math so it's a normalzied score and not some massive number.
-                artist_tag_weight = int(tag.weight)
-                your_tag_score = your_tags[tag_name]["score"]
-                similarity_score += (artist_tag_weight * your_tag_score) / 100
-        
-        candidate_artists[candidate_name]["similarity"] = similarity_score
-        
-    except Exception as e:
+    if candidate_name not in tag_lookup.tags:
         # **if** can't get tags, remove this candidate
         del candidate_artists[candidate_name]
+        continue
+
+    # similarity score for loop 
+    similarity_score = 0
+    for tag_name, artist_tag_weight in tag_lookup.tags[candidate_name]:
+        if tag_name in your_tags:
+            # doing both the wights of the similar artist tags and my profile score for the total similarity score! just adding to the math so it's a normalzied score and not some massive number.
+            your_tag_score = your_tags[tag_name]["score"]
+            similarity_score += (artist_tag_weight * your_tag_score) / 100
+
+    candidate_artists[candidate_name]["similarity"] = similarity_score
 
 print(f"✓ Calculated similarity for {len(candidate_artists)} candidates")
 
@@ -0,0 +1,254 @@
+"""
+FullCircle Scoring Helpers
+Vectorized cosine similarity and top-k selection over the precomputed artist catalog.
+"""
+import hashlib
+from typing import Iterable, NamedTuple, Tuple
+
+import numpy as np
+from scipy import sparse
+
+TAG_DIM = 300  # first 300 columns of every feature vector are the TF-IDF tags
+LOW_HISTORY_THRESHOLD = 5  # only artists with 0 < label < this are ever recommended
+
+
+def build_unit_matrix(features: np.ndarray) -> np.ndarray:
+    # stacked once at load: contiguous float32 tag block with every row L2-normalized,
+    # so a whole request is one matrix-vector product. zero rows stay zero.
+    tags = np.array(features[:, :TAG_DIM], dtype=np.float32, order='C')
+    norms = np.linalg.norm(tags, axis=1, keepdims=True)
+    np.divide(tags, norms, out=tags, where=norms > 0)
+    return tags
+
+
+def unit_vector(vector: np.ndarray) -> np.ndarray:
+    query = np.asarray(vector[:TAG_DIM], dtype=np.float32)
+    norm = np.linalg.norm(query)
+    return query / norm if norm > 0 else query
+
+
+def build_candidate_pool(features: np.ndarray, labels: np.ndarray, max_label: int) -> np.ndarray:
+    # label filter and non-zero-tag filter, materialized once at load
+    has_tags = np.abs(features[:, :TAG_DIM]).sum(axis=1) > 0
+    return (labels > 0) & (labels < max_label) & has_tags
+
+
+class NameIndex(NamedTuple):
+    # hashed lowercase name -> row id, as two parallel arrays sorted by hash
+    hashes: np.ndarray
+    rows: np.ndarray
+
+
+def name_hash(name: str) -> int:
+    # blake2b instead of hash() so the index is stable across processes and can live on disk.
+    # 64 bits is plenty: a collision at a few million artists is a ~1e-7 event
+    return int.from_bytes(hashlib.blake2b(name.lower().encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def build_name_index(names: Iterable[str]) -> NameIndex:
+    hashes = np.fromiter((name_hash(name) for name in names), dtype=np.uint64)
+    order = np.argsort(hashes, kind='stable')
+    return NameIndex(hashes=hashes[order], rows=order.astype(np.int32))
+
+
+def lookup_rows(name_index: NameIndex, names: Iterable[str]) -> np.ndarray:
+    wanted = np.unique(np.fromiter((name_hash(name) for name in names), dtype=np.uint64))
+    lo = np.searchsorted(name_index.hashes, wanted, side='left')
+    hi = np.searchsorted(name_index.hashes, wanted, side='right')
+    if not (hi > lo).any():
+        return np.empty(0, dtype=np.int32)
+    return np.unique(np.concatenate([name_index.rows[a:b] for a, b in zip(lo, hi)]))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row ids of the k best finite scores, best first.
+
+    Ties are broken by row id, which is exactly what the old stable
+    sort over the DataFrame order produced.
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < scores.shape[0]:
+        part = np.argpartition(-scores, k - 1)[:k]
+        # everything tied with the k-th score has to stay in the running,
+        # otherwise argpartition picks an arbitrary one of them
+        kth = scores[part].min()
+        rows = np.flatnonzero(scores >= kth)
+    else:
+        rows = np.arange(scores.shape[0])
+
+    rows = rows[np.isfinite(scores[rows])]
+    order = np.lexsort((rows, -scores[rows]))
+    return rows[order[:k]]
+
+
+class Postings(NamedTuple):
+    # CSC layout over the tag columns: rows with tag j are indices[indptr[j]:indptr[j+1]]
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    n_rows: int
+
+
+def build_postings(unit_matrix: np.ndarray) -> Postings:
+    csc = sparse.csc_matrix(unit_matrix)
+    csc.sort_indices()
+    return Postings(
+        indptr=csc.indptr.astype(np.int64),
+        indices=csc.indices.astype(np.int32),
+        data=csc.data.astype(np.float32),
+        n_rows=unit_matrix.shape[0],
+    )
+
+
+def score_postings(postings: Postings, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Cosine similarity for every row that shares at least one tag with the query.
+
+    Only the postings of the query's non-zero columns are touched, so the cost is
+    O(matching postings) instead of O(catalog). Returns (sorted row ids, similarities);
+    every row not returned has similarity exactly 0.
+    """
+    cols = np.flatnonzero(query)
+    starts = postings.indptr[cols]
+    lengths = postings.indptr[cols + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+    # positions of every posting of every query column, laid out column after column
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.repeat(starts - offsets, lengths) + np.arange(total)
+
+    rows, inverse = np.unique(postings.indices[positions], return_inverse=True)
+    weights = postings.data[positions] * np.repeat(query[cols], lengths)
+    return rows, np.bincount(inverse, weights=weights, minlength=len(rows))
+
+
+class TagLists(NamedTuple):
+    # CSR: the tags of row i, as IDF ranks in ascending order (rarest first), are
+    # ranks[indptr[i]:indptr[i+1]]. column_rank / rank_to_column convert between the two.
+    indptr: np.ndarray
+    ranks: np.ndarray
+    column_rank: np.ndarray
+    rank_to_column: np.ndarray
+
+
+def build_tag_lists(features: np.ndarray, idf: np.ndarray) -> TagLists:
+    # stable so equal IDFs keep column order, same as the old list.sort(key=IDF, reverse=True)
+    rank_to_column = np.argsort(-idf, kind='stable')
+    column_rank = np.empty_like(rank_to_column)
+    column_rank[rank_to_column] = np.arange(len(rank_to_column))
+
+    present = features[:, :TAG_DIM] > 0
+    rows, cols = np.nonzero(present)
+    ranks = column_rank[cols]
+    order = np.lexsort((ranks, rows))
+
+    indptr = np.zeros(features.shape[0] + 1, dtype=np.int64)
+    np.cumsum(present.sum(axis=1), out=indptr[1:])
+    return TagLists(
+        indptr=indptr,
+        ranks=ranks[order].astype(np.int16),
+        column_rank=column_rank,
+        rank_to_column=rank_to_column,
+    )
+
+
+def query_ranks(tag_lists: TagLists, query: np.ndarray) -> np.ndarray:
+    return np.sort(tag_lists.column_rank[np.flatnonzero(query[:TAG_DIM] > 0)])
+
+
+def matching_tag_columns(tag_lists: TagLists, row_id: int, ranks: np.ndarray, limit: int) -> np.ndarray:
+    # sorted intersection of two small int arrays, already in IDF order
+    row_ranks = tag_lists.ranks[tag_lists.indptr[row_id]:tag_lists.indptr[row_id + 1]]
+    shared = np.intersect1d(row_ranks, ranks, assume_unique=True)[:limit]
+    return tag_lists.rank_to_column[shared]
+
+
+class NeighbourTable(NamedTuple):
+    # per weighting (0 = plain, 1 = IDF-weighted) and catalog row: the k best candidate rows
+    # best first (-1 once a row runs out of candidates sharing a tag) and their similarities.
+    # the tags each pair shares, as IDF ranks rarest first, are a CSR over the flat (mode, row, slot)
+    # position: shared_ranks[shared_indptr[p]:shared_indptr[p+1]]
+    rows: np.ndarray
+    similarities: np.ndarray
+    shared_indptr: np.ndarray
+    shared_ranks: np.ndarray
+    seed_probability: np.ndarray
+
+    @property
+    def k(self) -> int:
+        return self.rows.shape[2]
+
+
+def seed_query(tag_block: np.ndarray, idf: np.ndarray, weighted: bool) -> np.ndarray:
+    # the same query vector the request path builds from a seed's TF-IDF tags
+    tags = np.asarray(tag_block, dtype=np.float64)
+    if weighted:
+        tags = tags * np.where(tags > 0, idf, 0.0)
+    return unit_vector(tags)
+
+
+def build_neighbour_table(
+    features: np.ndarray,
+    postings: Postings,
+    tag_lists: TagLists,
+    candidate_pool: np.ndarray,
+    idf: np.ndarray,
+    seed_probability: np.ndarray,
+    k: int,
+    shared_limit: int = 10,
+) -> NeighbourTable:
+    """Every catalog row's top-k candidates, ranked exactly like the request path ranks them.
+
+    Nothing is excluded here, not even the row itself: exclusions are per request and get
+    applied on lookup.
+    """
+    n_rows = features.shape[0]
+    rows = np.full((2, n_rows, k), -1, dtype=np.int32)
+    similarities = np.zeros((2, n_rows, k), dtype=np.float32)
+    shared_counts = np.zeros(2 * n_rows * k, dtype=np.int64)
+    shared_chunks = []
+
+    for mode, weighted in enumerate((False, True)):
+        for row_id in range(n_rows):
+            query = seed_query(features[row_id, :TAG_DIM], idf, weighted)
+            matched_rows, matched_similarities = score_postings(postings, query)
+            keep = candidate_pool[matched_rows]
+            matched_rows, matched_similarities = matched_rows[keep], matched_similarities[keep]
+            best = top_k(matched_similarities, k)
+            neighbours = matched_rows[best]
+            rows[mode, row_id, :len(best)] = neighbours
+            similarities[mode, row_id, :len(best)] = matched_similarities[best]
+
+            # shared tags of all neighbours at once: their IDF-sorted rank lists back to back,
+            # filtered to the seed's tags, first shared_limit kept per neighbour
+            seed_has = np.zeros(len(tag_lists.rank_to_column), dtype=bool)
+            seed_has[query_ranks(tag_lists, query)] = True
+            starts = tag_lists.indptr[neighbours]
+            lengths = tag_lists.indptr[neighbours + 1] - starts
+            total = int(lengths.sum())
+            positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+            owner = np.repeat(np.arange(len(neighbours)), lengths)
+            ranks = tag_lists.ranks[positions]
+            kept = seed_has[ranks]
+            ranks, owner = ranks[kept], owner[kept]
+            counts = np.bincount(owner, minlength=len(neighbours))
+            within = np.arange(len(owner)) - (np.cumsum(counts) - counts)[owner]
+            ranks, owner = ranks[within < shared_limit], owner[within < shared_limit]
+
+            base = (mode * n_rows + row_id) * k
+            shared_counts[base:base + len(neighbours)] = np.bincount(owner, minlength=len(neighbours))
+            shared_chunks.append(ranks)
+
+    # int32 is plenty below NEIGHBOUR_TABLE_MAX_ARTISTS and halves the biggest array
+    shared_indptr = np.zeros(len(shared_counts) + 1, dtype=np.int32)
+    np.cumsum(shared_counts, out=shared_indptr[1:])
+    return NeighbourTable(
+        rows=rows,
+        similarities=similarities,
+        shared_indptr=shared_indptr,
+        shared_ranks=np.concatenate(shared_chunks).astype(np.int16) if shared_chunks else np.empty(0, dtype=np.int16),
+        seed_probability=np.asarray(seed_probability, dtype=np.float64),
+    )
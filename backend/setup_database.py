@@ -32,6 +32,11 @@ def setup_database():
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_track_id ON plays(track_id)
     """)
+
+    # per-artist scans for training's aggregates (play_aggregates.py) read only this index
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_plays_artist_played_at ON plays(artist_names, played_at)
+    """)
     
     conn.commit()
     conn.close()
@@ -40,6 +45,7 @@ def setup_database():
     print(f"  - plays table: stores each play with timestamp")
     print(f"  - sync_metadata table: tracks last sync time")
     print(f"  - index on track_id for fast lookups")
+    print(f"  - index on (artist_names, played_at) for training aggregates")
 
 if __name__ == "__main__":
     setup_database()
@@ -0,0 +1,289 @@
+"""
+FullCircle Tag Store
+SQLite cache of Last.fm top tags per artist, shared by training, the taste profile and discovery.
+Each artist's tags are kept as Last.fm returns them plus training's normalized form, refreshed
+once they're older than the TTL, and read back in bulk. Anything with a top_tags(artist) method
+can fill it: lastfm_fetch.LastfmClient for the real API (fetched concurrently, rate limited and
+retried by lastfm_fetch.fetch_all), StubClient offline.
+
+    python tag_store.py info     # what's cached and how much of it is stale
+    python tag_store.py check    # cold / warm / expired runs against StubClient, no network
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import lastfm_fetch
+from lastfm_fetch import ArtistNotFound, FetchReport
+
+TAG_DB_PATH = os.getenv("FC_TAG_DB", "tag_cache.db")
+TAG_TTL_DAYS = float(os.getenv("FC_TAG_TTL_DAYS", "30"))
+TOP_TAGS_LIMIT = 10
+NOISE_TAGS = {'hop', 'the', 's', 'and', 'new'}  # stand alone noise that showed up all over training
+READ_CHUNK = 500  # names per IN (...), well under SQLite's bound-variable limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artist_fetches (
+    artist_key TEXT PRIMARY KEY,
+    artist TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    found INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artist_tags (
+    artist_key TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    normalized TEXT,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (artist_key, rank)
+);
+"""
+
+Tags = List[Tuple[str, int]]
+
+
+class TagLookup(NamedTuple):
+    # tags for every artist that has them (an empty list when Last.fm has none), errors for the
+    # rest: not found, or a fetch that failed and had nothing cached to fall back on
+    tags: Dict[str, Tags]
+    errors: Dict[str, str]
+
+
+def artist_key(artist: str) -> str:
+    # Last.fm artist names are case-insensitive
+    return artist.strip().lower()
+
+
+def normalize_tag(tag: str) -> Optional[str]:
+    """Training's form of a tag, None for the noise it drops."""
+    tag = tag.lower()  # no more separate "hip hop" and "Hip Hop" tags
+    tag = tag.replace('hip hop', 'hip-hop').replace('hip_hop', 'hip-hop')  # very specific to this library, on purpose
+    # literally just the character "s" used to show up in the top reasons for high ranking
+    if tag in NOISE_TAGS or len(tag) <= 1:
+        return None
+    return tag
+
+
+class StubClient:
+    """Offline stand-in: answers from a dict, counts calls, and can be told to fail."""
+
+    def __init__(self, catalog: Dict[str, Tags], failing: Iterable[str] = ()):
+        self.catalog = {artist_key(name): tags for name, tags in catalog.items()}
+        self.failing = {artist_key(name) for name in failing}
+        self.calls = 0
+        self._lock = threading.Lock()  # called from fetch_all's workers
+
+    def top_tags(self, artist: str) -> Tags:
+        with self._lock:
+            self.calls += 1
+        key = artist_key(artist)
+        if key in self.failing:
+            raise ConnectionError(f"stub failure for {artist}")
+        if key not in self.catalog:
+            raise ArtistNotFound(artist)
+        return list(self.catalog[key])
+
+
+class TagStore:
+    def __init__(self, path: str = TAG_DB_PATH, ttl_days: float = TAG_TTL_DAYS):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86_400
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "TagStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _chunks(self, artists: Iterable[str]):
+        keys = sorted({artist_key(artist) for artist in artists})
+        for start in range(0, len(keys), READ_CHUNK):
+            yield keys[start:start + READ_CHUNK]
+
+    def _fetches(self, artists: Iterable[str]) -> Dict[str, Tuple[float, bool]]:
+        fetches = {}
+        for keys in self._chunks(artists):
+            marks = ",".join("?" * len(keys))
+            rows = self.conn.execute(
+                f"SELECT artist_key, fetched_at, found FROM artist_fetches WHERE artist_key IN ({marks})", keys
+            )
+            fetches.update({key: (fetched_at, bool(found)) for key, fetched_at, found in rows})
+        return fetches
+
+    def stale(self, artists: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """The artists (in the order given, once per key) never fetched or older than the TTL."""
+        unique: Dict[str, str] = {}
+        for artist in artists:
+            unique.setdefault(artist_key(artist), artist)
+        artists = list(unique.values())
+        now = time.time() if now is None else now
+        fetches = self._fetches(artists)
+        return [
+            artist for artist in artists
+            if artist_key(artist) not in fetches or now - fetches[artist_key(artist)][0] >= self.ttl_seconds
+        ]
+
+    def put(self, artist: str, tags: Optional[Tags], fetched_at: Optional[float] = None) -> None:
+        """Store one fetch: the tag list in Last.fm's order, or None when the artist doesn't exist."""
+        key = artist_key(artist)
+        with self.conn:
+            self.conn.execute("DELETE FROM artist_tags WHERE artist_key = ?", (key,))
+            self.conn.executemany(
+                "INSERT INTO artist_tags (artist_key, rank, tag, normalized, weight) VALUES (?, ?, ?, ?, ?)",
+                [(key, rank, tag, normalize_tag(tag), int(weight)) for rank, (tag, weight) in enumerate(tags or [])],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO artist_fetches (artist_key, artist, fetched_at, found) VALUES (?, ?, ?, ?)",
+                (key, artist, time.time() if fetched_at is None else fetched_at, int(tags is not None)),
+            )
+
+    def refresh(self, artists: Iterable[str], client, progress_every: int = 100, **fetch_options) -> FetchReport:
+        """Fetch every stale artist through client with lastfm_fetch.fetch_all (fetch_options go to
+        it: workers, rate, max_attempts, backoff). Failed fetches are in the report's errors and
+        aren't cached, so the next run tries them again."""
+        pending = self.stale(artists)
+
+        def store(artist: str, status: str, value) -> None:
+            # workers only fetch, every write happens here on the store's own thread
+            if status == 'ok':
+                self.put(artist, value)
+            elif status == 'not_found':
+                self.put(artist, None)
+
+        report = lastfm_fetch.fetch_all(pending, client.top_tags, on_result=store,
+                                        progress_every=progress_every, **fetch_options)
+        if pending:
+            print(f"  Tags from Last.fm: {report.summary()}")
+        return report
+
+    def _read(self, artists: Iterable[str], column: str) -> Dict[str, Tags]:
+        tags: Dict[str, Tags] = {}
+        for keys in self._chunks(artists):
+            marks = ",".join("?" * len(keys))
+            rows = self.conn.execute(
+                f"SELECT artist_key, {column}, weight FROM artist_tags "
+                f"WHERE artist_key IN ({marks}) AND {column} IS NOT NULL ORDER BY artist_key, rank",
+                keys,
+            )
+            for key, tag, weight in rows:
+                tags.setdefault(key, []).append((tag, weight))
+        return tags
+
+    def _lookup(self, artists: Iterable[str], client, column: str, fetch_options: Dict) -> TagLookup:
+        artists = list(artists)
+        errors = self.refresh(artists, client, **fetch_options).errors if client is not None else {}
+        errors = {artist_key(artist): error for artist, error in errors.items()}
+        fetches = self._fetches(artists)
+        cached = self._read(artists, column)
+
+        lookup = TagLookup(tags={}, errors={})
+        for artist in artists:
+            key = artist_key(artist)
+            if key in fetches and fetches[key][1]:
+                # a failed refresh of an expired entry still serves the old tags
+                lookup.tags[artist] = cached.get(key, [])
+            elif key in fetches:
+                lookup.errors[artist] = "not found on Last.fm"
+            else:
+                lookup.errors[artist] = errors.get(key, "not cached")
+        return lookup
+
+    def top_tags(self, artists: Iterable[str], client=None, **fetch_options) -> TagLookup:
+        """Tags as Last.fm names them, refreshing stale artists through client first (None = cache only)."""
+        return self._lookup(artists, client, 'tag', fetch_options)
+
+    def normalized_tags(self, artists: Iterable[str], client=None, **fetch_options) -> TagLookup:
+        """Same as top_tags, in training's normalized form with the noise tags dropped."""
+        return self._lookup(artists, client, 'normalized', fetch_options)
+
+    def stats(self) -> Dict:
+        now = time.time()
+        artists, found, oldest, stale = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(found), 0), MIN(fetched_at), COALESCE(SUM(? - fetched_at >= ?), 0) "
+            "FROM artist_fetches",
+            (now, self.ttl_seconds),
+        ).fetchone()
+        tags = self.conn.execute("SELECT COUNT(*) FROM artist_tags").fetchone()[0]
+        return {
+            'path': self.path,
+            'artists': artists,
+            'not_found': artists - found,
+            'tags': tags,
+            'stale': stale,
+            'ttl_days': self.ttl_seconds / 86_400,
+            'oldest_age_days': (now - oldest) / 86_400 if oldest is not None else None,
+        }
+
+
+def _check() -> None:
+    catalog = {
+        "Laufey": [("jazz", 100), ("Bedroom Pop", 60), ("icelandic", 40)],
+        "Mac Miller": [("Hip Hop", 100), ("rap", 80), ("s", 5)],
+        "Quiet Artist": [],
+    }
+    artists = list(catalog) + ["Not On Lastfm", "Flaky Artist"]
+    fast = {'rate': 0, 'backoff': 0}  # no rate limit or backoff sleeps against the stub
+    retries = lastfm_fetch.MAX_ATTEMPTS - 1
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tags.db")
+        client = StubClient(catalog, failing=["Flaky Artist"])
+
+        with TagStore(path) as store:
+            cold = store.top_tags(artists, client, **fast)
+        # the failing artist is tried MAX_ATTEMPTS times, everyone else once
+        assert client.calls == 5 + retries, client.calls
+        assert cold.tags["Laufey"][1] == ("Bedroom Pop", 60) and cold.tags["Quiet Artist"] == []
+        assert set(cold.errors) == {"Not On Lastfm", "Flaky Artist"}
+        print(f"✓ cold run: {client.calls} fetches, {len(cold.tags)} artists with tags, errors {sorted(cold.errors)}")
+
+        client.calls, client.failing = 0, set()
+        with TagStore(path) as store:
+            warm = store.normalized_tags(artists, client, **fast)
+        # only the artist that failed last time gets fetched again
+        assert client.calls == 1, client.calls
+        assert warm.tags["Mac Miller"] == [("hip-hop", 100), ("rap", 80)]
+        print(f"✓ warm run: {client.calls} fetch (the one that failed before), normalized {warm.tags['Mac Miller']}")
+
+        client.calls = 0
+        with TagStore(path) as store:
+            store.top_tags(artists, client, **fast)
+        assert client.calls == 0, client.calls
+        print("✓ second warm run: 0 fetches")
+
+        client.calls = 0
+        with TagStore(path, ttl_days=0) as store:
+            store.top_tags(artists, client, **fast)
+        assert client.calls == len(artists), client.calls
+        print(f"✓ expired run: {client.calls} fetches with a zero TTL")
+
+        client.calls, client.failing = 0, {artist_key("Laufey")}
+        with TagStore(path, ttl_days=0) as store:
+            fallback = store.top_tags(["Laufey"], client, **fast)
+        assert fallback.tags["Laufey"] == catalog["Laufey"] and client.calls == 1 + retries, client.calls
+        print("✓ failed refresh falls back to the cached tags")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FullCircle Last.fm tag store")
+    parser.add_argument('command', choices=['info', 'check'])
+    parser.add_argument('--db', default=TAG_DB_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        _check()
+    else:
+        with TagStore(args.db) as store:
+            stats = store.stats()
+        print(f"{stats['path']}: {stats['artists']:,} artists ({stats['not_found']:,} not on Last.fm), "
+              f"{stats['tags']:,} tags, {stats['stale']:,} older than {stats['ttl_days']:g} days")
+        if stats['oldest_age_days'] is not None:
+            print(f"  oldest fetch {stats['oldest_age_days']:.1f} days ago")
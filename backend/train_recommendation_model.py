@@ -1,43 +1,34 @@
 import os
 import json
-import pylast
 import pickle
-import sqlite3
 import numpy as np
 import pandas as pd
-import xgboost as xgb
 from datetime import datetime
 from dotenv import load_dotenv
 from collections import defaultdict
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.model_selection import train_test_split
+
+import artifacts
+import behavioral
+import hyperparameter_search
+import play_aggregates
+from featurizer import TagFeaturizer, parity_max_error
+from lastfm_fetch import LastfmClient
+from tag_store import TagStore
 # Note: Took 4 hours to study modules, I have a fairly good idea of specifically all of sklearn, the jack of all trades. 
  
 load_dotenv()
 api_key = os.getenv("LASTFM_API_KEY")
-api_secret = os.getenv("LASTFM_API_SECRET")
-network = pylast.LastFMNetwork(api_key=api_key, api_secret=api_secret)
-
-conn = sqlite3.connect("listening_history.db")
-
-query = """
-SELECT 
-    artist_names,
-    played_at,
-    COUNT(*) as play_count
-FROM plays
-GROUP BY artist_names, DATE(played_at)
-ORDER BY played_at
-"""
-# see how i made it reabable very cool very nice i'm listening to who knows by daniel ceaser i did it to the tempo of this song
-df = pd.read_sql_query(query, conn)
-conn.close()
-
-# next part is just converting played_at into readable time, so using datetime we imported earlier
+
+# one connection, and only per-artist aggregates come back: daily play counts for the time weighting
+# and the late night / weekend / gap counts for the behavioral features, both computed in SQLite
+# (see play_aggregates.py, the queries used to be in here)
+df, behavior_aggregates = play_aggregates.load("listening_history.db")
+
 print(f"Loaded {len(df)} play records")
 print(f"\nDate range: {df['played_at'].min()} to {df['played_at'].max()}")
-df['played_at'] = pd.to_datetime(df['played_at'], format='ISO8601')
 half_life_days = 90
 most_recent_play = df['played_at'].max()
 df['days_ago'] = (most_recent_play - df['played_at']).dt.days
@@ -75,64 +66,8 @@ print("\n" + "="*60)
 print("Calculating behavioral features...")
 print("="*60)
 
-conn = sqlite3.connect("listening_history.db")
-
-plays_query = """
-SELECT 
-    artist_names,
-    played_at,
-    COUNT(*) as plays
-FROM plays
-GROUP BY artist_names, played_at
-"""
-plays_df = pd.read_sql_query(plays_query, conn)
-conn.close()
-
-plays_df['played_at'] = pd.to_datetime(plays_df['played_at'], format='ISO8601')
-
-plays_df['hour'] = plays_df['played_at'].dt.hour
-plays_df['day_of_week'] = plays_df['played_at'].dt.dayofweek  # 0=Monday, 6=Sunday
-
-behavioral_features = []
-
-for artist in artist_stats['artist']:
-    artist_plays = plays_df[plays_df['artist_names'] == artist]
-    
-    if len(artist_plays) == 0:
-        behavioral_features.append({
-            'artist': artist,
-            'late_night_ratio': 0,
-            'weekend_ratio': 0,
-            'consistency_score': 0
-        })
-        continue
-    
-    total_plays = len(artist_plays)
-    
-    late_night_plays = len(artist_plays[(artist_plays['hour'] >= 23) | (artist_plays['hour'] <= 4)])
-    late_night_ratio = late_night_plays / total_plays
-    
-    weekend_plays = len(artist_plays[artist_plays['day_of_week'].isin([5, 6])])
-    weekend_ratio = weekend_plays / total_plays
-    
-    if len(artist_plays) > 1:
-        artist_plays_sorted = artist_plays.sort_values('played_at')
-        days_between = artist_plays_sorted['played_at'].diff().dt.days.dropna()
-        if len(days_between) > 0:
-            consistency_score = 1 / (days_between.std() + 1)  # +1 to avoid division by zero
-        else:
-            consistency_score = 0
-    else:
-        consistency_score = 0
-    
-    behavioral_features.append({
-        'artist': artist,
-        'late_night_ratio': late_night_ratio,
-        'weekend_ratio': weekend_ratio,
-        'consistency_score': consistency_score
-    })
-
-behavioral_df = pd.DataFrame(behavioral_features)
+# all seven behavioral columns (ratios, consistency and the interaction terms) from the SQL aggregates
+behavioral_df = behavioral.behavioral_from_aggregates(behavior_aggregates, artist_stats['artist'])
 artist_stats = artist_stats.merge(behavioral_df, on='artist', how='left')
 
 print(f"✓ Calculated behavioral features for {len(behavioral_df)} artists")
@@ -160,37 +95,22 @@ print(f"{'='*60}")
 all_tags = defaultdict(int)
 artist_tags = {}
 
-for idx, row in training_artists.iterrows():
-    artist_name = row['artist']
-    
-    try:
-        artist = network.get_artist(artist_name)
-        tags = artist.get_top_tags(limit=10)
-     # this entire section is just me putting in separations for tags, as well as some english alphabet rules!
-        tag_dict = {}
-        for tag in tags:
-            tag_name = tag.item.name.lower() # no more separate "hip hop" and "Hip Hop" tags
-            
-            tag_name = tag_name.replace('hip hop', 'hip-hop')
-            tag_name = tag_name.replace('hip_hop', 'hip-hop') # is this very specific to me? yes. do I care? no
-# stand alone noise that i saw very often in my results 
-            if tag_name in ['hop', 'the', 's', 'and', 'new']:
-                continue
-
-            if len(tag_name) > 1:  # literally just the character "s" was showing up in my top reasons for high ranking?? get out
-                tag_weight = int(tag.weight)
-                tag_dict[tag_name] = tag_weight  
-                all_tags[tag_name] += 1
-        
-        artist_tags[artist_name] = tag_dict
-        
-        if len(artist_tags) % 100 == 0:
-            print(f"  Processed {len(artist_tags)}/{len(training_artists)} artists...")
-    
-    except Exception as e:
-        artist_tags[artist_name] = {}  
-
-print(f"\n✓ Collected tags for {len(artist_tags)} artists")
+# through the local tag cache (tag_store.py): only artists never fetched or older than FC_TAG_TTL_DAYS
+# hit Last.fm, so a warm retrain makes no tag calls at all. the normalizing (lowercase, hip-hop,
+# the noise tags and the stray "s") happens in tag_store.normalize_tag now. the ones it does fetch go
+# out FC_LASTFM_WORKERS at a time under the FC_LASTFM_RATE limit, with retries (lastfm_fetch.py)
+with TagStore() as tag_store:
+    tag_lookup = tag_store.normalized_tags(training_artists['artist'], LastfmClient(api_key))
+
+for artist_name in training_artists['artist']:
+    tag_dict = {}
+    for tag_name, tag_weight in tag_lookup.tags.get(artist_name, []):
+        tag_dict[tag_name] = tag_weight
+        all_tags[tag_name] += 1
+    # failed or unknown artists get no tags, same as before
+    artist_tags[artist_name] = tag_dict
+
+print(f"\n✓ Collected tags for {len(artist_tags)} artists ({len(tag_lookup.errors)} without any: not on Last.fm or failed)")
 print(f"✓ Found {len(all_tags)} unique tags")
 
 print("\n" + "="*60)
@@ -215,6 +135,11 @@ X_tags_tfidf = tfidf.fit_transform(artist_tag_sentences).toarray()
 
 print(f"TF-IDF tag features: {X_tags_tfidf.shape[1]}")
 
+# predict.py featurizes requests with TagFeaturizer instead of tfidf.transform, make sure they still agree
+featurizer_error = parity_max_error(tfidf, TagFeaturizer.from_vectorizer(tfidf), artist_tag_sentences)
+assert featurizer_error < 1e-6, f"TagFeaturizer drifted from TfidfVectorizer (max error {featurizer_error:.3g})"
+print(f"✓ Request featurizer matches TF-IDF on the training corpus (max error {featurizer_error:.2g})")
+
 X_behavioral = training_artists[[
     'late_night_ratio',
     'weekend_ratio', 
@@ -239,34 +164,8 @@ print("\n" + "="*60)
 print("Adding feature interactions and refining features...")
 print("="*60)
 
-behavioral_features_refined = []
-for artist in artist_stats['artist']:
-    artist_plays = plays_df[plays_df['artist_names'] == artist]
-    
-    if len(artist_plays) > 1:
-        artist_plays_sorted = artist_plays.sort_values('played_at')
-        days_between = artist_plays_sorted['played_at'].diff().dt.days.dropna()
-        if len(days_between) > 0:
-            consistency_std = days_between.std()  # raw dev
-        else:
-            consistency_std = 0
-    else:
-        consistency_std = 0
-    
-    behavioral_features_refined.append({
-        'artist': artist,
-        'consistency_std': consistency_std
-    })
-
-behavioral_refined_df = pd.DataFrame(behavioral_features_refined)
-artist_stats = artist_stats.merge(behavioral_refined_df, on='artist', how='left')
-training_artists = training_artists.merge(behavioral_refined_df, on='artist', how='left')
-
 # I was getting an inflated score, which is cool but i figured it was a data leakage problem
-training_artists['late_weekend_interaction'] = training_artists['late_night_ratio'] * training_artists['weekend_ratio']
-training_artists['consistency_x_late_night'] = training_artists['consistency_score'] * training_artists['late_night_ratio']
-training_artists['all_behavioral'] = training_artists['late_night_ratio'] * training_artists['weekend_ratio'] * training_artists['consistency_score']
-
+# (consistency_std and the 3 interaction terms came along with behavioral_df above)
 print("✓ Added refined consistency score and 3 interaction features")
 
 
@@ -284,44 +183,27 @@ X = np.hstack((X_tags_tfidf, X_behavioral_enhanced))
 
 print(f"Enhanced feature matrix: {X.shape[1]} features ({X_tags_tfidf.shape[1]} tags + {X_behavioral_enhanced.shape[1]} behavioral)")
 
-param_grid = {
-    'n_estimators': [100, 200, 300],
-    'max_depth': [3, 5, 7],
-    'learning_rate': [0.1, 0.05, 0.01],
-    'gamma': [0.1, 0.5]
-}
-
-kfold = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
-xgb_base = xgb.XGBClassifier(
-    objective='binary:logistic',
-    eval_metric='logloss',
-    random_state=42,
-    n_jobs=-1
-)
-
-grid_search = GridSearchCV(
-    estimator=xgb_base,
-    param_grid=param_grid,
-    scoring='accuracy',
-    n_jobs=-1,
-    cv=kfold,
-    verbose=1
-)
+# which search picks the hyperparameters (hyperparameter_search.py): 'grid' is the full 54 x 5-fold
+# GridSearchCV, 'halving' and 'xgbcv' cover the same grid growing boosters on cached fold DMatrices.
+# FC_HPARAM_BUDGET_SECONDS stops those two early with the best found so far
+search_strategy = os.getenv("FC_HPARAM_SEARCH", "grid")
+search_budget = float(os.getenv("FC_HPARAM_BUDGET_SECONDS", "0")) or None
 
 print("\n" + "="*60)
-print("Starting XGBoost Grid Search Cross-Validation (5-Fold)...")
+print(f"Starting XGBoost hyperparameter search ({search_strategy}, 5-Fold)...")
 print("This may take a few minutes as it trains many models.")
 print("="*60)
 
-grid_search.fit(X, y)
+search = hyperparameter_search.search(X, y, strategy=search_strategy, time_budget=search_budget)
 
-print("\n✓ Grid Search Complete!")
-print(f"Best CV Accuracy found: {grid_search.best_score_:.2%}")
-print(f"Best Hyperparameters: {grid_search.best_params_}")
+print(f"\n✓ Search Complete! ({search.seconds:.1f}s, {search.evaluated} settings scored"
+      f"{'' if search.complete else ', stopped by the time budget'})")
+# a budget that ran out before anything was scored leaves the default params and no CV score
+print(f"Best CV Accuracy found: {search.best_score:.2%}" if search.evaluated else "Best CV Accuracy found: none (budget ran out)")
+print(f"Best Hyperparameters: {search.best_params}")
 
-# was indeed the final model
-final_xgb_model = grid_search.best_estimator_
+# was indeed the final model, fit once on the train split below (the search doesn't refit)
+final_xgb_model = hyperparameter_search.classifier(**search.best_params)
 
 X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42, stratify=y
@@ -433,11 +315,12 @@ print(f"✓ Saved artist database ({len(all_artists_for_recs)} artists) to {all_
 metadata = {
     'trained_at': datetime.now().isoformat(),
     'test_accuracy': float(accuracy),
-    'cv_accuracy': float(grid_search.best_score_),
+    'cv_accuracy': float(search.best_score) if search.evaluated else None,
     'n_training_samples': int(len(X_train)),
     'n_test_samples': int(len(X_test)),
     'n_features': int(X.shape[1]),
-    'best_params': grid_search.best_params_,
+    'best_params': search.best_params,
+    'hyperparameter_search': search.summary(),
     'half_life_days': 90,
     'quantile_threshold': 0.75,
     'behavioral_means': behavioral_means,
@@ -448,6 +331,31 @@ metadata = {
     }
 }
 
+# same artifacts as one versioned .npy/JSON bundle, this is what predict.py loads first (no unpickling, no per-row work)
+bundle_dir = artifacts.write_bundle(
+    artifacts.bundle_path(MODEL_DIR),
+    model=final_xgb_model,
+    tfidf=tfidf,
+    feature_names=all_feature_names,
+    behavioral_means=behavioral_means,
+    artist_names=all_artists_for_recs['artist_name'].tolist(),
+    labels=all_artists_for_recs['label'].values,
+    features=np.vstack(all_feature_vectors),
+    metadata=metadata,
+)
+print(f"✓ Saved artifact bundle to {bundle_dir}/")
+
+# optional reduced similarity space for search='lsa', e.g. FC_LSA_DIMENSIONS=48 (python embedding.py fit does the same later)
+lsa_dimensions = int(os.getenv("FC_LSA_DIMENSIONS", "0"))
+if lsa_dimensions > 0:
+    import embedding
+    saved = artifacts.load_artifacts(MODEL_DIR)
+    tag_embedding = embedding.fit_lsa(saved.catalog_unit, saved.candidate_pool_rows, saved.metadata, lsa_dimensions)
+    embedding.write_embedding(tag_embedding, MODEL_DIR)
+    print(f"✓ Saved {lsa_dimensions}-dimension tag embedding to {embedding.embedding_path(MODEL_DIR)}/ "
+          f"(explained variance {tag_embedding.manifest['explained_variance']:.1%})")
+
+# written last on purpose: a running API reloads when this file changes, by then everything else is on disk
 metadata_path = os.path.join(MODEL_DIR, 'model_metadata.json')
 with open(metadata_path, 'w') as f:
     json.dump(metadata, f, indent=2)
@@ -464,4 +372,5 @@ print("  - feature_names.pkl (307 feature names in order)")
 print("  - behavioral_means.pkl (average behavioral features for liked artists)")
 print("  - all_artists_df.pkl (1,468 artists with pre computed vectors)")
 print("  - model_metadata.json (training metadata and performance)")
+print(f"  - {artifacts.BUNDLE_DIRNAME}/ (the same artifacts as .npy + JSON, format v{artifacts.BUNDLE_FORMAT_VERSION})")
 print("\nReady for FastAPI deployment! WOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOO")
@@ -0,0 +1,194 @@
+"""
+FullCircle Tree Ensemble
+Serving-side XGBoost inference from the booster's JSON dump: every tree flattened into shared
+node arrays and walked with vectorized NumPy, so a prediction skips the sklearn wrapper and
+DMatrix construction entirely.
+
+    python tree_ensemble.py [model_dir]   # parity + speed vs predict_proba and Booster.inplace_predict
+"""
+import json
+import math
+from typing import Dict, Union
+
+import numpy as np
+
+SUPPORTED_OBJECTIVES = {'binary:logistic', 'reg:logistic'}
+
+
+class TreeEnsemble:
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        default_left: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        base_margin: float,
+    ):
+        # leaves point at themselves, so walking max_depth steps parks every tree on its leaf
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_margin = base_margin
+
+    @classmethod
+    def from_model_json(cls, model: Union[Dict, str]) -> "TreeEnsemble":
+        if isinstance(model, str):
+            with open(model) as f:
+                model = json.load(f)
+
+        learner = model['learner']
+        objective = learner['objective']['name']
+        booster = learner['gradient_booster']
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"TreeEnsemble only handles {sorted(SUPPORTED_OBJECTIVES)}, not {objective}")
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"TreeEnsemble only handles gbtree boosters, not {booster['name']}")
+
+        trees = booster['model']['trees']
+        features, thresholds, lefts, rights, defaults, values, roots, depths = [], [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            if any(tree['split_type']):
+                raise ValueError("categorical splits are not supported")
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            right = np.asarray(tree['right_children'], dtype=np.int64)
+            is_leaf = left == -1
+            ids = np.arange(len(left))
+
+            features.append(np.where(is_leaf, 0, tree['split_indices']))
+            thresholds.append(np.asarray(tree['split_conditions'], dtype=np.float32))
+            lefts.append(np.where(is_leaf, ids, left) + offset)
+            rights.append(np.where(is_leaf, ids, right) + offset)
+            defaults.append(np.asarray(tree['default_left'], dtype=bool))
+            # a leaf's value lives in split_conditions in the JSON format
+            values.append(np.where(is_leaf, np.asarray(tree['split_conditions'], dtype=np.float32), 0.0))
+            roots.append(offset)
+            depths.append(_tree_depth(left, right))
+            offset += len(left)
+
+        # base_score is stored as a probability ("[5E-1]" in newer versions, "5E-1" in older ones)
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            default_left=np.concatenate(defaults),
+            value=np.concatenate(values).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(depths, default=0),
+            base_margin=math.log(base_score / (1.0 - base_score)),
+        )
+
+    @classmethod
+    def from_booster(cls, booster) -> "TreeEnsemble":
+        return cls.from_model_json(json.loads(booster.save_raw(raw_format='json')))
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        # same float32 comparisons xgboost does: go left when x < threshold, NaN takes the default branch
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        X = np.ascontiguousarray(X)
+        flat = X.ravel()
+        row_starts = (np.arange(X.shape[0], dtype=np.int64) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            # flat gathers are cheaper than X[rows, cols] fancy indexing
+            x = flat[row_starts + self.feature[nodes]]
+            go_left = x < self.threshold[nodes]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.base_margin + self.value[nodes].sum(axis=1, dtype=np.float64)
+
+    def predict_one(self, x: np.ndarray) -> float:
+        """Fast path for a single row: the walk is over one (n_trees,) node vector."""
+        x = np.asarray(x, dtype=np.float32).ravel()
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            values = x[self.feature[nodes]]
+            go_left = np.where(np.isnan(values), self.default_left[nodes], values < self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        margin = self.base_margin + float(self.value[nodes].sum(dtype=np.float64))
+        return 1.0 / (1.0 + math.exp(-margin))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # (n, 2) like the sklearn wrapper
+        positive = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    deepest = 0
+    stack = [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if left[node] == -1:
+            deepest = max(deepest, depth)
+        else:
+            stack.append((int(left[node]), depth + 1))
+            stack.append((int(right[node]), depth + 1))
+    return deepest
+
+
+if __name__ == "__main__":
+    import sys
+    import timeit
+
+    import artifacts
+
+    loaded = artifacts.load_artifacts(sys.argv[1] if len(sys.argv) > 1 else artifacts.MODEL_DIR)
+    model = loaded.model
+    booster = model.get_booster()
+    engine = TreeEnsemble.from_booster(booster)
+
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(loaded.features), size=min(2048, len(loaded.features)), replace=False)
+    X = np.asarray(loaded.features[rows], dtype=np.float64)
+    X[::7, 300:] = rng.random((len(X[::7]), X.shape[1] - 300))  # some off-catalog behavioral values
+    X[::11, 5] = np.nan
+
+    error = float(np.abs(engine.predict_proba(X)[:, 1] - model.predict_proba(X)[:, 1]).max())
+    single_error = max(abs(engine.predict_one(x) - model.predict_proba(x.reshape(1, -1))[0, 1]) for x in X[:200])
+    print(f"Trees: {len(engine.roots)}, nodes: {len(engine.feature)}, max depth: {engine.max_depth}")
+    print(f"Max |engine - predict_proba|: batch {error:.2e}, single {single_error:.2e}")
+    assert max(error, single_error) < 1e-6, "TreeEnsemble drifted from predict_proba"
+
+    def bench(label, fn, number):
+        seconds = timeit.timeit(fn, number=number) / number
+        print(f"  {label:38} {seconds * 1e6:10.1f} us")
+
+    x1 = X[:1]
+    print("\nSingle row:")
+    bench("XGBClassifier.predict_proba", lambda: model.predict_proba(x1), 300)
+    bench("Booster.inplace_predict", lambda: booster.inplace_predict(x1), 300)
+    bench("TreeEnsemble.predict_one", lambda: engine.predict_one(x1[0]), 3000)
+    for size in (64, 1024):
+        Xb = X[:size]
+        print(f"\nBatch of {size}:")
+        bench("XGBClassifier.predict_proba", lambda: model.predict_proba(Xb), 50)
+        bench("Booster.inplace_predict", lambda: booster.inplace_predict(Xb), 50)
+        bench("TreeEnsemble.predict_proba", lambda: engine.predict_proba(Xb), 50)
+
+    # where predict.TREE_BATCH_LIMIT should sit: the biggest batch up to which the engine still wins
+    print("\nEngine vs Booster.inplace_predict by batch size (best of 3):")
+    crossover, engine_ahead = 0, True
+    for size in (1, 2, 4, 8, 12, 16, 24, 32, 48, 64):
+        Xb = X[:size]
+        engine_seconds = min(timeit.repeat(lambda: engine.predict_proba(Xb), number=200, repeat=3)) / 200
+        inplace_seconds = min(timeit.repeat(lambda: booster.inplace_predict(Xb), number=200, repeat=3)) / 200
+        engine_ahead = engine_ahead and engine_seconds < inplace_seconds
+        crossover = size if engine_ahead else crossover
+        print(f"  {size:4} rows   engine {engine_seconds * 1e6:8.1f} us   inplace_predict {inplace_seconds * 1e6:8.1f} us")
+    print(f"Engine is faster up to {crossover} rows")
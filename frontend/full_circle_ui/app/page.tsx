@@ -98,18 +98,16 @@ export default function Home() {
     const tagsList = tagsInput.split(',').map(tag => tag.trim()).filter(tag => tag.length > 0);
 
     try {
-      const res = await fetch(`${API_BASE_URL}/recommend`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          artist_name: artistName,
-          tags: tagsList,
-          weighted_similarity: isWeighted,
-          exclude_artists: exploreMode ? topArtists.map(a => a.name) : [],
-        }),
+      // GET so the browser (and anything in front of the API) can cache and revalidate it
+      const params = new URLSearchParams({
+        artist_name: artistName,
+        weighted_similarity: String(isWeighted),
       });
+      tagsList.forEach(tag => params.append('tags', tag));
+      if (exploreMode) {
+        topArtists.forEach(a => params.append('exclude_artists', a.name));
+      }
+      const res = await fetch(`${API_BASE_URL}/recommend?${params.toString()}`);
 
       if (!res.ok) {
         throw new Error(`Server error: ${res.statusText}`);